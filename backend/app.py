@@ -1,18 +1,28 @@
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 from config import Config
+from app.utils.database import db
+from app.utils.records import RecordJSONProvider
+from app.utils.instrumentation import query_stats
+from app.utils.scheduler import deadline_scheduler
+from app.utils.matchmaking import matchmaker
+from app.utils.leaderboard import leaderboard
 import os
 
 app = Flask(__name__)
+app.json = RecordJSONProvider(app)
 
 # 禁用 URL 尾部斜線的嚴格匹配，避免不必要的重定向
 app.url_map.strict_slashes = False
 
 # 簡單的 CORS 配置 - 開發環境允許所有來源
-CORS(app, resources={r"/*": {"origins": "*"}})
+CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=['X-Refreshed-Token', 'Server-Timing'])
+
+# 每個請求的查詢統計（Server-Timing 標頭）
+query_stats.init_app(app)
 
 # 導入路由
-from app.routes import auth, users, topics, debates, rounds, votes, ranking, admin
+from app.routes import auth, users, topics, debates, rounds, votes, ranking, admin, matchmaking
 
 # 註冊藍圖
 app.register_blueprint(auth.bp, url_prefix='/api/auth')
@@ -23,7 +33,7 @@ app.register_blueprint(rounds.bp, url_prefix='/api/rounds')
 app.register_blueprint(votes.bp, url_prefix='/api/votes')
 app.register_blueprint(ranking.bp, url_prefix='/api/ranking')
 app.register_blueprint(admin.bp, url_prefix='/api/admin')
-
+app.register_blueprint(matchmaking.bp, url_prefix='/api/matchmaking')
 
 # 靜態文件路由 - 提供前端文件
 @app.route('/pages/<path:filename>')
@@ -48,7 +58,7 @@ def index():
 
 @app.route('/health')
 def health():
-    return jsonify({'status': 'healthy'})
+    return jsonify({'status': 'healthy', 'db_pool': db.pool_stats()})
 
 
 @app.errorhandler(404)
@@ -61,7 +71,20 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 
+def start_background_tasks():
+    """啟動服務用的背景工作（只在伺服器入口呼叫：python app.py 與 gunicorn.conf.py；腳本與測試導入 app.py 時不啟動）"""
+    # 投票截止排程（多個工作行程中只有取得租約者執行）
+    deadline_scheduler.start(votes.close_rounds)
+    # 排行榜（啟動時載入，之後增量維護）
+    leaderboard.start()
+    # 辯論配對（同上，只有取得租約者執行配對）
+    matchmaker.start()
+
+
 if __name__ == '__main__':
+    # debug 模式的 reloader 監視行程不處理請求，只在實際服務的子行程啟動
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
     app.run(
         host='0.0.0.0',
         port=Config.PORT,
@@ -1,6 +1,13 @@
 from flask import Blueprint, request, jsonify
 from app.utils.database import db
-from app.utils.auth import admin_required
+from app.utils.auth import admin_required, invalidate_principal, principal_cache, revoke_tokens, revocation_table
+from app.utils.instrumentation import query_stats
+from app.utils.vote_buffer import vote_buffer
+from app.utils.scheduler import deadline_scheduler
+from app.utils.events import event_bus
+from app.utils.snapshots import debate_snapshots
+from app.utils.tally import vote_tally
+from app.utils.pagination import KeysetPage
 
 bp = Blueprint('admin', __name__)
 
@@ -8,19 +15,25 @@ bp = Blueprint('admin', __name__)
 @bp.route('/topics/pending', methods=['GET'])
 @admin_required
 def get_pending_topics():
-    """獲取待審核的話題"""
+    """獲取待審核的話題（?cursor=&limit= 游標分頁）"""
+    try:
+        page = KeysetPage.from_request('t.created_at', 't.topic_id')
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
     topics = db.execute_query(
-        """
+        f"""
         SELECT t.*, u.nickname as creator_nickname
         FROM DebateTopics t
         JOIN Users u ON t.created_by = u.user_id
-        WHERE t.status = 'pending'
-        ORDER BY t.created_at DESC
+        WHERE t.status = 'pending' {page.where}
+        {page.order_by}
         """,
+        page.params,
         fetch_all=True
     )
 
-    return jsonify({'topics': topics})
+    return jsonify({'topics': list(page.rows(topics)), 'next_cursor': page.next_cursor})
 
 
 @bp.route('/topics/<int:topic_id>/approve', methods=['POST'])
@@ -94,17 +107,58 @@ def force_end_debate(debate_id):
     if winner_id and winner_id not in [debate['pros_user_id'], debate['cons_user_id']]:
         return jsonify({'error': 'Invalid winner_id'}), 400
 
-    # 更新辯論狀態
-    db.execute_query(
-        "UPDATE Debates SET status = 'FINISHED', winner_id = ? WHERE debate_id = ?",
-        (winner_id, debate_id)
-    )
-
-    # 如果有勝者，更新 Elo 評分
-    if winner_id:
-        from app.routes.votes import update_player_ratings
-        debate['winner_id'] = winner_id  # 更新 winner_id
-        update_player_ratings(debate)
+    # 更新辯論狀態、關閉未完成的回合與評分在同一交易中完成；
+    # 狀態條件在鎖定辯論行後判斷，與投票截止排程的關閉互斥
+    with db.transaction() as tx:
+        updated = tx.execute_query(
+            db.engine.returning(
+                """
+                UPDATE Debates SET status = 'FINISHED', winner_id = ?, version = version + 1
+                WHERE debate_id = ? AND status <> 'FINISHED'
+                """,
+                ('version',)
+            ),
+            (winner_id, debate_id),
+            fetch_one=True
+        )
+        if not updated:
+            return jsonify({'error': 'Debate is already finished'}), 400
+
+        # 進行中（含投票中）的回合一併結束，不再由投票截止排程關閉
+        closed_rounds = tx.execute_query(
+            db.engine.returning(
+                "UPDATE Rounds SET status = 'ROUND_RESULT', version = ? WHERE debate_id = ? AND status <> 'ROUND_RESULT'",
+                ('round_id',)
+            ),
+            (updated['version'], debate_id),
+            fetch_all=True
+        )
+
+        # 如果有勝者，更新 Elo 評分
+        if winner_id:
+            from app.routes.votes import update_player_ratings
+            debate['winner_id'] = winner_id  # 更新 winner_id
+            update_player_ratings(debate)
+
+        def after_commit():
+            debate_snapshots.invalidate(debate_id)
+            for round_data in closed_rounds:
+                vote_tally.discard(round_data['round_id'])
+                event_bus.publish(debate_id, 'round', {
+                    'round_id': round_data['round_id'],
+                    'status': 'ROUND_RESULT',
+                    'winner_side': None,
+                    'version': updated['version'],
+                })
+            event_bus.publish(debate_id, 'debate', {
+                'debate_id': debate_id,
+                'status': 'FINISHED',
+                'round_count': debate['round_count'],
+                'winner_id': winner_id,
+                'debate_finished': True,
+                'version': updated['version'],
+            })
+        tx.on_commit(after_commit)
 
     return jsonify({'message': 'Debate ended successfully'})
 
@@ -125,10 +179,13 @@ def set_admin(user_id):
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    db.execute_query(
-        "UPDATE Users SET is_admin = ? WHERE user_id = ?",
-        (is_admin, user_id)
-    )
+    with db.transaction():
+        db.execute_query(
+            "UPDATE Users SET is_admin = ? WHERE user_id = ?",
+            (is_admin, user_id)
+        )
+        invalidate_principal(user_id)
+        revoke_tokens(user_id)
 
     return jsonify({'message': 'User admin status updated successfully'})
 
@@ -185,3 +242,20 @@ def assign_judge():
     )
 
     return jsonify({'message': 'Judge assigned successfully'})
+
+
+@bp.route('/db/stats', methods=['GET'])
+@admin_required
+def get_db_stats():
+    """獲取數據庫連接池、查詢快取與各端點查詢統計"""
+    return jsonify({
+        'pool': db.pool_stats(),
+        'cache': db.cache.stats() if db.cache is not None else None,
+        'principal_cache': principal_cache.stats(),
+        'revocations': revocation_table.stats(),
+        'vote_buffer': vote_buffer.stats(),
+        'deadline_scheduler': deadline_scheduler.stats(),
+        'events': event_bus.stats(),
+        'debate_snapshots': debate_snapshots.stats(),
+        'endpoints': query_stats.report()
+    })
@@ -3,7 +3,8 @@ import requests
 from urllib.parse import urlencode
 from config import Config
 from app.utils.database import db
-from app.utils.auth import generate_jwt_token
+from app.utils.auth import generate_jwt_token, invalidate_principal
+from app.utils.http_client import line_session
 
 bp = Blueprint('auth', __name__)
 
@@ -41,14 +42,14 @@ def callback():
     }
 
     try:
-        token_response = requests.post(Config.LINE_TOKEN_URL, data=token_data)
+        token_response = line_session.post(Config.LINE_TOKEN_URL, data=token_data)
         token_response.raise_for_status()
         token_json = token_response.json()
         access_token = token_json.get('access_token')
 
         # 獲取用戶資料
         headers = {'Authorization': f'Bearer {access_token}'}
-        profile_response = requests.get(Config.LINE_PROFILE_URL, headers=headers)
+        profile_response = line_session.get(Config.LINE_PROFILE_URL, headers=headers)
         profile_response.raise_for_status()
         profile = profile_response.json()
 
@@ -60,15 +61,18 @@ def callback():
         )
 
         if user:
-            # 更新用戶資料
-            db.execute_query(
-                """
-                UPDATE Users
-                SET nickname = ?, avatar = ?, updated_at = GETDATE()
-                WHERE user_id = ?
-                """,
-                (profile.get('displayName'), profile.get('pictureUrl'), user['user_id'])
-            )
+            # 僅在暱稱或頭像變更時更新用戶資料
+            nickname, avatar = profile.get('displayName'), profile.get('pictureUrl')
+            if (nickname, avatar) != (user['nickname'], user['avatar']):
+                db.execute_query(
+                    """
+                    UPDATE Users
+                    SET nickname = ?, avatar = ?, updated_at = GETDATE()
+                    WHERE user_id = ?
+                    """,
+                    (nickname, avatar, user['user_id'])
+                )
+                invalidate_principal(user['user_id'])
             user_id = user['user_id']
         else:
             # 創建新用戶
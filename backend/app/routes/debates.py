@@ -1,46 +1,122 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app
+from config import Config
 from app.utils.database import db
 from app.utils.auth import token_required, admin_required
+from app.utils.streaming import stream_json_list
+from app.utils.pagination import KeysetPage
+from app.utils.events import event_bus
+from app.utils.versions import DELTA_FIELDS
+from app.utils.round_summary import ROUND_COLUMNS, summary_columns, summary_select, load_rounds_json
+from app.utils.snapshots import debate_snapshots
+from app.utils.tally import vote_tally, TALLY_FIELDS
 
 bp = Blueprint('debates', __name__)
 
 
 @bp.route('/', methods=['GET', 'OPTIONS'], strict_slashes=False)
 def get_debates():
-    """獲取辯論列表"""
+    """獲取辯論列表（?cursor=&limit= 游標分頁）"""
     # 處理 OPTIONS 請求（CORS preflight）
     if request.method == 'OPTIONS':
         return '', 204
     
     status = request.args.get('status', 'ONGOING')
+    try:
+        page = KeysetPage.from_request('d.created_at', 'd.debate_id')
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    debates = db.execute_query(
-        """
+    debates = db.stream_query(
+        f"""
         SELECT d.*, dt.title as topic_title,
                pu.nickname as pros_nickname, cu.nickname as cons_nickname
         FROM Debates d
         JOIN DebateTopics dt ON d.topic_id = dt.topic_id
         JOIN Users pu ON d.pros_user_id = pu.user_id
         JOIN Users cu ON d.cons_user_id = cu.user_id
-        WHERE d.status = ?
-        ORDER BY d.created_at DESC
+        WHERE d.status = ? {page.where}
+        {page.order_by}
         """,
-        (status,),
-        fetch_all=True
+        (status, *page.params)
     )
 
-    return jsonify({'debates': debates})
+    return stream_json_list('debates', page.rows(debates), extra=page.trailer)
 
 
 @bp.route('/<int:debate_id>', methods=['GET'])
 def get_debate(debate_id):
-    """獲取辯論詳情"""
+    """獲取辯論詳情
+
+    ?since=<version> 時只返回該版本之後變更的欄位與回合，無變更返回 304；
+    ?rounds=summary 時回合只含中繼資料與內容長度、摘錄，全文經 /api/rounds 獲取。
+    完整詳情中的 version 不隨投票遞增（計數為即時值），以它增量同步時會多收到投票中的回合。
+    """
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid since'}), 400
+
+    projection = request.args.get('rounds', 'full')
+    if projection not in ('full', 'summary'):
+        return jsonify({'error': 'Invalid rounds projection'}), 400
+
+    if since is None:
+        # 完整詳情：以辯論快照返回，寫入時失效（投票不失效，計數於讀取時覆蓋）
+        snapshot = debate_snapshots.get(debate_id, projection, lambda: build_debate_detail(debate_id, projection))
+        if snapshot is None:
+            return jsonify({'error': 'Debate not found'}), 404
+        return Response(overlay_live_tallies(*snapshot), mimetype='application/json')
+
+    debate = db.execute_query(
+        f"SELECT {', '.join(DELTA_FIELDS)} FROM Debates WHERE debate_id = ?",
+        (debate_id,),
+        fetch_one=True
+    )
+
+    if not debate:
+        return jsonify({'error': 'Debate not found'}), 404
+
+    if since >= debate['version']:
+        return '', 304
+
+    # 只返回變更過的回合
+    round_columns = summary_select() if projection == 'summary' else '*'
+    rounds = db.execute_query(
+        f"""
+        SELECT {round_columns} FROM Rounds
+        WHERE debate_id = ? AND version > ?
+        ORDER BY round_number
+        """,
+        (debate_id, since),
+        fetch_all=True
+    )
+
+    delta = dict(debate)
+    delta['since'] = since
+    delta['rounds'] = rounds
+    return jsonify(delta)
+
+
+def build_debate_detail(debate_id, projection):
+    """以一條語句查詢辯論、雙方用戶、辯題與所有回合（JSON 聚合），返回快照；辯論不存在時返回 None
+
+    快照為 (序列化的回應, 詳情)：有投票中回合時保留詳情供覆蓋即時計數，否則為 None。
+    """
+    round_columns = summary_columns() if projection == 'summary' else ROUND_COLUMNS
+    rounds_json = db.engine.json_array(
+        round_columns,
+        "FROM Rounds r WHERE r.debate_id = d.debate_id ORDER BY r.round_number"
+    )
+
     debate = db.execute_query(
-        """
+        f"""
         SELECT d.*, dt.title as topic_title, dt.description as topic_description,
                dt.side_pros, dt.side_cons,
                pu.nickname as pros_nickname, pu.avatar as pros_avatar, pu.rating as pros_rating,
-               cu.nickname as cons_nickname, cu.avatar as cons_avatar, cu.rating as cons_rating
+               cu.nickname as cons_nickname, cu.avatar as cons_avatar, cu.rating as cons_rating,
+               {rounds_json} as rounds_json
         FROM Debates d
         JOIN DebateTopics dt ON d.topic_id = dt.topic_id
         JOIN Users pu ON d.pros_user_id = pu.user_id
@@ -52,22 +128,58 @@ def get_debate(debate_id):
     )
 
     if not debate:
-        return jsonify({'error': 'Debate not found'}), 404
+        return None
+
+    detail = dict(debate)
+    detail['rounds'] = load_rounds_json(detail.pop('rounds_json'))
+    voting = any(round_data['status'] == 'WAIT_VOTING' for round_data in detail['rounds'])
+    return current_app.json.dumps(detail) + '\n', detail if voting else None
+
+
+def overlay_live_tallies(body, detail):
+    """以即時計數覆蓋快照中投票中回合的計數欄位；計數未變或無投票中回合時直接返回快照"""
+    if detail is None:
+        return body
+    rounds = []
+    changed = False
+    for round_data in detail['rounds']:
+        if round_data['status'] == 'WAIT_VOTING':
+            tally = vote_tally.get(round_data['round_id'])
+            if tally and any(round_data[field] != tally[field] for field in TALLY_FIELDS):
+                round_data = {**round_data, **{field: tally[field] for field in TALLY_FIELDS}}
+                changed = True
+        rounds.append(round_data)
+    if not changed:
+        return body
+    return current_app.json.dumps({**detail, 'rounds': rounds}) + '\n'
 
-    # 獲取所有回合
-    rounds = db.execute_query(
-        """
-        SELECT * FROM Rounds
-        WHERE debate_id = ?
-        ORDER BY round_number
-        """,
-        (debate_id,),
-        fetch_all=True
-    )
 
-    debate['rounds'] = rounds
+@bp.route('/<int:debate_id>/events', methods=['GET'])
+def debate_events(debate_id):
+    """辯論即時事件（Server-Sent Events）：回合狀態、投票計數與辯論結果的變更"""
+    # 辯論不會刪除，存在的結果可快取；未命中時重新查詢，剛建立的辯論不會被誤判為不存在
+    query = "SELECT debate_id FROM Debates WHERE debate_id = ?"
+    debate = (db.execute_query(query, (debate_id,), fetch_one=True, cache=True)
+              or db.execute_query(query, (debate_id,), fetch_one=True))
 
-    return jsonify(debate)
+    if not debate:
+        return jsonify({'error': 'Debate not found'}), 404
+
+    subscription = event_bus.subscribe(debate_id)
+    if subscription is None:
+        response = jsonify({'error': 'Too many live connections, please retry'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    response = Response(
+        event_bus.stream(subscription, heartbeat=Config.EVENTS_HEARTBEAT_SECONDS),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # 串流未被迭代時（HEAD 請求、客戶端在第一段資料前斷線）生成器的 finally 不會執行，
+    # 改在回應關閉時取消訂閱
+    response.call_on_close(lambda: event_bus.unsubscribe(subscription))
+    return response
 
 
 @bp.route('/create', methods=['POST'])
@@ -89,59 +201,55 @@ def create_debate():
         if pros_user_id == cons_user_id:
             return jsonify({'error': 'Pros and cons users must be different'}), 400
 
-        # 檢查話題是否已批准
-        topic = db.execute_query(
-            "SELECT * FROM DebateTopics WHERE topic_id = ? AND status = 'approved'",
-            (topic_id,),
-            fetch_one=True
-        )
-
-        if not topic:
-            return jsonify({'error': 'Topic not found or not approved'}), 404
-
-        # 檢查正方用戶是否存在
-        pros_user = db.execute_query(
-            "SELECT * FROM Users WHERE user_id = ?",
-            (pros_user_id,),
-            fetch_one=True
-        )
-
-        if not pros_user:
-            return jsonify({'error': f'Pros user (ID: {pros_user_id}) not found'}), 404
-
-        # 檢查反方用戶是否存在
-        cons_user = db.execute_query(
-            "SELECT * FROM Users WHERE user_id = ?",
-            (cons_user_id,),
-            fetch_one=True
-        )
-
-        if not cons_user:
-            return jsonify({'error': f'Cons user (ID: {cons_user_id}) not found'}), 404
-
-        # 創建辯論
-        debate_id = db.execute_insert(
-            """
-            INSERT INTO Debates (topic_id, pros_user_id, cons_user_id, status)
-            VALUES (?, ?, ?, 'ONGOING')
-            """,
-            (topic_id, pros_user_id, cons_user_id)
-        )
-
-        # 創建第一回合
-        round_id = db.execute_insert(
-            """
-            INSERT INTO Rounds (debate_id, round_number, status)
-            VALUES (?, 1, 'WAIT_PROS_STATEMENT')
-            """,
-            (debate_id,)
-        )
-
-        # 更新辯論回合數
-        db.execute_query(
-            "UPDATE Debates SET round_count = 1 WHERE debate_id = ?",
-            (debate_id,)
-        )
+        # 驗證與建立在同一交易中完成，只提交一次
+        with db.transaction() as tx:
+            # 檢查話題是否已批准
+            topic = tx.execute_query(
+                "SELECT * FROM DebateTopics WHERE topic_id = ? AND status = 'approved'",
+                (topic_id,),
+                fetch_one=True
+            )
+
+            if not topic:
+                return jsonify({'error': 'Topic not found or not approved'}), 404
+
+            # 檢查正方用戶是否存在
+            pros_user = tx.execute_query(
+                "SELECT * FROM Users WHERE user_id = ?",
+                (pros_user_id,),
+                fetch_one=True
+            )
+
+            if not pros_user:
+                return jsonify({'error': f'Pros user (ID: {pros_user_id}) not found'}), 404
+
+            # 檢查反方用戶是否存在
+            cons_user = tx.execute_query(
+                "SELECT * FROM Users WHERE user_id = ?",
+                (cons_user_id,),
+                fetch_one=True
+            )
+
+            if not cons_user:
+                return jsonify({'error': f'Cons user (ID: {cons_user_id}) not found'}), 404
+
+            # 創建辯論
+            debate_id = tx.execute_insert(
+                """
+                INSERT INTO Debates (topic_id, pros_user_id, cons_user_id, status, round_count)
+                VALUES (?, ?, ?, 'ONGOING', 1)
+                """,
+                (topic_id, pros_user_id, cons_user_id)
+            )
+
+            # 創建第一回合
+            round_id = tx.execute_insert(
+                """
+                INSERT INTO Rounds (debate_id, round_number, status)
+                VALUES (?, 1, 'WAIT_PROS_STATEMENT')
+                """,
+                (debate_id,)
+            )
 
         return jsonify({
             'message': 'Debate created successfully',
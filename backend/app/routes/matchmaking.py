@@ -0,0 +1,51 @@
+from flask import Blueprint, request, jsonify
+from app.utils.database import db
+from app.utils.auth import token_required, admin_required
+from app.utils.matchmaking import matchmaker
+
+bp = Blueprint('matchmaking', __name__)
+
+
+@bp.route('/queue', methods=['POST', 'DELETE', 'OPTIONS'])
+@token_required
+def queue():
+    """加入（POST）或離開（DELETE）話題的配對佇列"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    user = request.current_user
+    if request.method == 'DELETE':
+        if not matchmaker.leave(user['user_id']):
+            return jsonify({'error': 'Not in queue'}), 404
+        return jsonify({'message': 'Left matchmaking queue'})
+
+    data = request.get_json()
+    topic_id = data.get('topic_id')
+    if not topic_id:
+        return jsonify({'error': 'Missing required field: topic_id'}), 400
+
+    # 批准後不再變更，命中的結果可快取；未命中時重新查詢，剛批准的話題不會被拒絕
+    query = "SELECT topic_id FROM DebateTopics WHERE topic_id = ? AND status = 'approved'"
+    topic = (db.execute_query(query, (topic_id,), fetch_one=True, cache=True)
+             or db.execute_query(query, (topic_id,), fetch_one=True))
+    if not topic:
+        return jsonify({'error': 'Topic not found or not approved'}), 404
+
+    return jsonify(matchmaker.join(topic_id, user['user_id'], user['rating']))
+
+
+@bp.route('/status', methods=['GET', 'OPTIONS'])
+@token_required
+def status():
+    """獲取當前用戶的配對狀態"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    return jsonify(matchmaker.status(request.current_user['user_id']))
+
+
+@bp.route('/pair', methods=['POST'])
+@admin_required
+def pair():
+    """立即配對所有佇列（管理員）"""
+    debates = matchmaker.run_pass()
+    return jsonify({'debates': debates, 'queues': matchmaker.stats()})
@@ -1,32 +1,50 @@
-from flask import Blueprint, jsonify, request
-from app.utils.database import db
+from flask import Blueprint, request, jsonify
+from config import Config
+from app.utils.auth import token_required
+from app.utils.leaderboard import leaderboard
 
 bp = Blueprint('ranking', __name__)
 
 
+def _int_arg(name, default, minimum, maximum=None):
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        value = default
+    value = max(value, minimum)
+    return min(value, maximum) if maximum is not None else value
+
+
 @bp.route('/', methods=['GET', 'OPTIONS'], strict_slashes=False)
 def get_ranking():
-    """獲取排行榜"""
+    """獲取排行榜（?offset=&limit= 分頁）"""
     if request.method == 'OPTIONS':
         return '', 204
-    users = db.execute_query(
-        """
-        SELECT user_id, nickname, avatar, rating, wins, losses, draws,
-               CASE
-                   WHEN (wins + losses + draws) > 0
-                   THEN CAST(wins AS FLOAT) / (wins + losses + draws) * 100
-                   ELSE 0
-               END as win_rate
-        FROM Users
-        WHERE (wins + losses + draws) > 0
-        ORDER BY rating DESC, wins DESC
-        """,
-        fetch_all=True
-    )
-
-    # 添加排名
-    for i, user in enumerate(users):
-        user['rank'] = i + 1
-        user['win_rate'] = round(user['win_rate'], 2)
-
-    return jsonify({'ranking': users})
+    offset = _int_arg('offset', 0, 0)
+    limit = _int_arg('limit', Config.LEADERBOARD_PAGE_SIZE, 1, Config.LEADERBOARD_MAX_PAGE_SIZE)
+
+    total, users = leaderboard.page(offset, limit)
+    return jsonify({'ranking': users, 'total': total, 'offset': offset, 'limit': limit})
+
+
+@bp.route('/users/<int:user_id>', methods=['GET'])
+def get_user_rank(user_id):
+    """獲取用戶排名及前後名次的用戶（?radius=）"""
+    return _rank_response(user_id)
+
+
+@bp.route('/me', methods=['GET', 'OPTIONS'])
+@token_required
+def get_my_rank():
+    """獲取當前用戶排名及前後名次的用戶"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    return _rank_response(request.current_user['user_id'])
+
+
+def _rank_response(user_id):
+    radius = _int_arg('radius', 5, 0, 50)
+    user, neighbours = leaderboard.around(user_id, radius)
+    if user is None:
+        return jsonify({'error': 'User is not ranked yet'}), 404
+    return jsonify({'user': user, 'neighbours': neighbours, 'total': len(leaderboard)})
@@ -2,29 +2,35 @@ from flask import Blueprint, request, jsonify
 import json
 from app.utils.database import db
 from app.utils.auth import token_required
+from app.utils.streaming import stream_json_list
+from app.utils.pagination import KeysetPage
 
 bp = Blueprint('topics', __name__)
 
 
 @bp.route('/', methods=['GET', 'OPTIONS'], strict_slashes=False)
 def get_topics():
-    """獲取話題列表"""
+    """獲取話題列表（?cursor=&limit= 游標分頁）"""
     # 處理 OPTIONS 請求（CORS preflight）
     if request.method == 'OPTIONS':
         return '', 204
     
     status = request.args.get('status', 'approved')
+    try:
+        page = KeysetPage.from_request('t.created_at', 't.topic_id')
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    query = """
+    query = f"""
         SELECT t.*, u.nickname as creator_nickname
         FROM DebateTopics t
         JOIN Users u ON t.created_by = u.user_id
-        WHERE t.status = ?
-        ORDER BY t.created_at DESC
+        WHERE t.status = ? {page.where}
+        {page.order_by}
     """
 
-    topics = db.execute_query(query, (status,), fetch_all=True)
-    return jsonify({'topics': topics})
+    topics = db.stream_query(query, (status, *page.params))
+    return stream_json_list('topics', page.rows(topics), extra=page.trailer)
 
 
 @bp.route('/<int:topic_id>', methods=['GET', 'OPTIONS'])
@@ -32,16 +38,15 @@ def get_topic(topic_id):
     """獲取話題詳情"""
     if request.method == 'OPTIONS':
         return '', 204
-    topic = db.execute_query(
-        """
+    query = """
         SELECT t.*, u.nickname as creator_nickname
         FROM DebateTopics t
         JOIN Users u ON t.created_by = u.user_id
         WHERE t.topic_id = ?
-        """,
-        (topic_id,),
-        fetch_one=True
-    )
+    """
+    # 已批准的話題不再變更，可快取；其他狀態直接查詢
+    topic = (db.execute_query(query + " AND t.status = 'approved'", (topic_id,), fetch_one=True, cache=True)
+             or db.execute_query(query, (topic_id,), fetch_one=True))
 
     if not topic:
         return jsonify({'error': 'Topic not found'}), 404
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app.utils.database import db
 from app.utils.auth import token_required
+from app.utils.streaming import stream_json_list
+from app.utils.pagination import KeysetPage
 
 bp = Blueprint('users', __name__)
 
@@ -44,9 +46,14 @@ def get_user(user_id):
 
 @bp.route('/<int:user_id>/matches', methods=['GET'])
 def get_user_matches(user_id):
-    """獲取用戶的比賽歷史"""
-    matches = db.execute_query(
-        """
+    """獲取用戶的比賽歷史（?cursor=&limit= 游標分頁）"""
+    try:
+        page = KeysetPage.from_request('mh.created_at', 'mh.match_id')
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    matches = db.stream_query(
+        f"""
         SELECT mh.*, d.topic_id, dt.title as topic_title,
                CASE
                    WHEN d.pros_user_id = ? THEN d.cons_user_id
@@ -61,11 +68,10 @@ def get_user_matches(user_id):
         JOIN DebateTopics dt ON d.topic_id = dt.topic_id
         LEFT JOIN Users pu ON d.pros_user_id = pu.user_id
         LEFT JOIN Users cu ON d.cons_user_id = cu.user_id
-        WHERE mh.user_id = ?
-        ORDER BY mh.created_at DESC
+        WHERE mh.user_id = ? {page.where}
+        {page.order_by}
         """,
-        (user_id, user_id, user_id),
-        fetch_all=True
+        (user_id, user_id, user_id, *page.params)
     )
 
-    return jsonify({'matches': matches})
+    return stream_json_list('matches', page.rows(matches), extra=page.trailer)
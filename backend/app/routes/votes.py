@@ -1,8 +1,14 @@
 from flask import Blueprint, request, jsonify
 from config import Config
 from app.utils.database import db
-from app.utils.auth import token_required
+from app.utils.auth import token_required, invalidate_principal
 from app.utils.elo import calculate_elo, get_score_from_result
+from app.utils.leaderboard import leaderboard
+from app.utils.events import event_bus
+from app.utils.versions import bump_open_round_versions
+from app.utils.tally import vote_tally, tally_summary, record_vote
+from app.utils import vote_buffer as buffered
+from app.utils.vote_buffer import vote_buffer, PendingVotesError
 
 bp = Blueprint('votes', __name__)
 
@@ -17,65 +23,59 @@ def submit_vote(round_id):
     if side_voted not in ['pros', 'cons']:
         return jsonify({'error': 'Invalid side_voted value'}), 400
 
-    # 獲取回合信息
-    round_data = db.execute_query(
-        "SELECT * FROM Rounds WHERE round_id = ?",
-        (round_id,),
-        fetch_one=True
-    )
+    if vote_buffer.enabled:
+        return _submit_buffered(round_id, side_voted)
 
-    if not round_data:
-        return jsonify({'error': 'Round not found'}), 404
+    try:
+        with db.transaction() as tx:
+            weight = record_vote(tx, round_id, request.current_user['user_id'], side_voted)
+    except db.engine.IntegrityError:
+        return jsonify({'error': 'You have already voted in this round'}), 400
 
-    if round_data['status'] != 'WAIT_VOTING':
+    if weight is None:
+        # 未寫入：回合不存在或未開放投票
+        round_data = db.execute_query(
+            "SELECT status FROM Rounds WHERE round_id = ?",
+            (round_id,),
+            fetch_one=True
+        )
+        if not round_data:
+            return jsonify({'error': 'Round not found'}), 404
         return jsonify({'error': 'Voting is not open for this round'}), 400
 
-    # 檢查用戶是否已投票
-    existing_vote = db.execute_query(
-        "SELECT * FROM Votes WHERE round_id = ? AND voter_id = ?",
-        (round_id, request.current_user['user_id']),
-        fetch_one=True
-    )
+    return jsonify({'message': 'Vote submitted successfully'})
+
 
-    if existing_vote:
+def _submit_buffered(round_id, side_voted):
+    """批次寫入模式：投票放入佇列，與其他請求的投票在同一交易寫入後才返回"""
+    result = vote_buffer.submit(round_id, request.current_user['user_id'], side_voted)
+    if result == buffered.ACCEPTED:
+        return jsonify({'message': 'Vote submitted successfully'})
+    if result == buffered.DUPLICATE:
         return jsonify({'error': 'You have already voted in this round'}), 400
+    if result == buffered.NOT_FOUND:
+        return jsonify({'error': 'Round not found'}), 404
+    if result == buffered.CLOSED:
+        return jsonify({'error': 'Voting is not open for this round'}), 400
 
-    # 檢查用戶是否為法官
-    debate = db.execute_query(
-        "SELECT * FROM Debates WHERE debate_id = ?",
-        (round_data['debate_id'],),
-        fetch_one=True
-    )
-
-    is_judge = db.execute_query(
-        "SELECT * FROM JudgeAssignments WHERE debate_id = ? AND user_id = ?",
-        (debate['debate_id'], request.current_user['user_id']),
-        fetch_one=True
-    ) is not None
-
-    # 設置投票權重
-    weight = Config.JUDGE_VOTE_WEIGHT if is_judge else Config.REGULAR_VOTE_WEIGHT
-
-    # 插入投票
-    db.execute_insert(
-        """
-        INSERT INTO Votes (round_id, voter_id, side_voted, is_judge, weight)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (round_id, request.current_user['user_id'], side_voted, is_judge, weight)
-    )
+    if result == buffered.FAILED:
+        return jsonify({'error': 'Vote could not be recorded, please retry'}), 503
+    if result == buffered.UNCONFIRMED:
+        return jsonify({'error': 'Vote is still being written, please check again later'}), 503
 
-    return jsonify({'message': 'Vote submitted successfully'})
+    # 佇列已滿：請客戶端稍後重試
+    response = jsonify({'error': 'Too many votes in flight, please retry'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 
 @bp.route('/<int:round_id>/results', methods=['GET'])
 def get_voting_results(round_id):
     """獲取投票結果"""
-    round_data = db.execute_query(
-        "SELECT * FROM Rounds WHERE round_id = ?",
-        (round_id,),
-        fetch_one=True
-    )
+    # 已產生結果的回合不再變更，可快取；其他狀態直接查詢
+    round_data = (db.execute_query("SELECT * FROM Rounds WHERE round_id = ? AND status = 'ROUND_RESULT'",
+                                   (round_id,), fetch_one=True, cache=True)
+                  or db.execute_query("SELECT * FROM Rounds WHERE round_id = ?", (round_id,), fetch_one=True))
 
     if not round_data:
         return jsonify({'error': 'Round not found'}), 404
@@ -83,181 +83,39 @@ def get_voting_results(round_id):
     if round_data['status'] not in ['VOTING_CLOSED', 'ROUND_RESULT']:
         return jsonify({'error': 'Voting results not available yet'}), 400
 
-    # 統計投票
-    vote_stats = db.execute_query(
-        """
-        SELECT side_voted, SUM(weight) as total_votes, COUNT(*) as vote_count
-        FROM Votes
-        WHERE round_id = ?
-        GROUP BY side_voted
-        """,
-        (round_id,),
-        fetch_all=True
-    )
-
-    pros_votes = 0
-    cons_votes = 0
-
-    for stat in vote_stats:
-        if stat['side_voted'] == 'pros':
-            pros_votes = stat['total_votes']
-        elif stat['side_voted'] == 'cons':
-            cons_votes = stat['total_votes']
-
-    total_votes = pros_votes + cons_votes
-
-    if total_votes > 0:
-        pros_percentage = (pros_votes / total_votes) * 100
-        cons_percentage = (cons_votes / total_votes) * 100
-    else:
-        pros_percentage = 0
-        cons_percentage = 0
-
     return jsonify({
         'round_id': round_id,
-        'pros_votes': pros_votes,
-        'cons_votes': cons_votes,
-        'total_votes': total_votes,
-        'pros_percentage': round(pros_percentage, 2),
-        'cons_percentage': round(cons_percentage, 2),
+        **tally_summary(round_data),
         'winner_side': round_data.get('winner_side')
     })
 
 
-@bp.route('/<int:round_id>/close_voting', methods=['POST'])
-def close_voting(round_id):
-    """關閉投票並計算結果（可由定時任務調用）"""
-    round_data = db.execute_query(
-        "SELECT * FROM Rounds WHERE round_id = ?",
-        (round_id,),
-        fetch_one=True
-    )
-
-    if not round_data or round_data['status'] != 'WAIT_VOTING':
-        return jsonify({'error': 'Invalid round status'}), 400
+@bp.route('/<int:round_id>/tally', methods=['GET'])
+def get_live_tally(round_id):
+    """獲取即時投票計數（投票進行中亦可查詢）"""
+    tally = vote_tally.get(round_id)
+    if not tally:
+        return jsonify({'error': 'Round not found'}), 404
 
-    # 統計投票
-    vote_stats = db.execute_query(
-        """
-        SELECT side_voted, SUM(weight) as total_votes
-        FROM Votes
-        WHERE round_id = ?
-        GROUP BY side_voted
-        """,
-        (round_id,),
-        fetch_all=True
-    )
-
-    pros_votes = 0
-    cons_votes = 0
-
-    for stat in vote_stats:
-        if stat['side_voted'] == 'pros':
-            pros_votes = stat['total_votes']
-        elif stat['side_voted'] == 'cons':
-            cons_votes = stat['total_votes']
-
-    total_votes = pros_votes + cons_votes
-
-    # 確定勝者
-    winner_side = None
-    if total_votes > 0:
-        pros_percentage = pros_votes / total_votes
-        cons_percentage = cons_votes / total_votes
-
-        if pros_percentage >= Config.INSTANT_WIN_PERCENTAGE:
-            winner_side = 'pros'
-        elif cons_percentage >= Config.INSTANT_WIN_PERCENTAGE:
-            winner_side = 'cons'
-        elif pros_votes > cons_votes:
-            winner_side = 'pros'
-        elif cons_votes > pros_votes:
-            winner_side = 'cons'
-        else:
-            winner_side = 'draw'
-
-    # 更新回合狀態
-    db.execute_query(
-        "UPDATE Rounds SET status = 'ROUND_RESULT', winner_side = ? WHERE round_id = ?",
-        (winner_side, round_id)
-    )
-
-    # 獲取辯論信息
-    debate = db.execute_query(
-        "SELECT * FROM Debates WHERE debate_id = ?",
-        (round_data['debate_id'],),
-        fetch_one=True
-    )
-
-    # 更新連勝計數
-    if winner_side == 'pros':
-        new_pros_wins = debate['pros_consecutive_wins'] + 1
-        new_cons_wins = 0
-    elif winner_side == 'cons':
-        new_pros_wins = 0
-        new_cons_wins = debate['cons_consecutive_wins'] + 1
-    else:
-        new_pros_wins = 0
-        new_cons_wins = 0
-
-    db.execute_query(
-        """
-        UPDATE Debates
-        SET pros_consecutive_wins = ?, cons_consecutive_wins = ?
-        WHERE debate_id = ?
-        """,
-        (new_pros_wins, new_cons_wins, debate['debate_id'])
-    )
-
-    # 檢查勝利條件
-    debate_finished = False
-    final_winner_id = None
-
-    # 檢查即時獲勝（70%以上得票率）
-    if total_votes > 0 and (pros_percentage >= Config.INSTANT_WIN_PERCENTAGE or cons_percentage >= Config.INSTANT_WIN_PERCENTAGE):
-        debate_finished = True
-        final_winner_id = debate['pros_user_id'] if winner_side == 'pros' else debate['cons_user_id']
-
-    # 檢查連勝3局
-    elif new_pros_wins >= Config.CONSECUTIVE_WINS_FOR_VICTORY:
-        debate_finished = True
-        final_winner_id = debate['pros_user_id']
-
-    elif new_cons_wins >= Config.CONSECUTIVE_WINS_FOR_VICTORY:
-        debate_finished = True
-        final_winner_id = debate['cons_user_id']
-
-    # 檢查是否達到最大回合數
-    elif round_data['round_number'] >= Config.MAX_ROUNDS:
-        debate_finished = True
-        # 需要管理員手動判定
-
-    if debate_finished and final_winner_id:
-        # 更新辯論狀態
-        db.execute_query(
-            "UPDATE Debates SET status = 'FINISHED', winner_id = ? WHERE debate_id = ?",
-            (final_winner_id, debate['debate_id'])
-        )
+    return jsonify({
+        'round_id': round_id,
+        'status': tally['status'],
+        **tally_summary(tally)
+    })
 
-        # 更新 Elo 評分
-        update_player_ratings(debate)
 
-    elif not debate_finished:
-        # 創建新回合
-        new_round_number = round_data['round_number'] + 1
-        db.execute_insert(
-            """
-            INSERT INTO Rounds (debate_id, round_number, status)
-            VALUES (?, ?, 'WAIT_PROS_STATEMENT')
-            """,
-            (debate['debate_id'], new_round_number)
-        )
+@bp.route('/<int:round_id>/close_voting', methods=['POST'])
+def close_voting(round_id):
+    """關閉投票並計算結果（到期回合由 deadline_scheduler 自動調用 close_rounds）"""
+    try:
+        results = close_rounds([round_id])
+    except PendingVotesError:
+        return jsonify({'error': 'Pending votes are still being written, please retry'}), 503
 
-        db.execute_query(
-            "UPDATE Debates SET round_count = ? WHERE debate_id = ?",
-            (new_round_number, debate['debate_id'])
-        )
+    if round_id not in results:
+        return jsonify({'error': 'Invalid round status'}), 400
 
+    winner_side, debate_finished = results[round_id]
     return jsonify({
         'message': 'Voting closed',
         'winner_side': winner_side,
@@ -265,95 +123,270 @@ def close_voting(round_id):
     })
 
 
-def update_player_ratings(debate):
-    """更新玩家 Elo 評分"""
-    # 獲取玩家當前評分
-    pros_user = db.execute_query(
-        "SELECT * FROM Users WHERE user_id = ?",
-        (debate['pros_user_id'],),
-        fetch_one=True
-    )
-
-    cons_user = db.execute_query(
-        "SELECT * FROM Users WHERE user_id = ?",
-        (debate['cons_user_id'],),
-        fetch_one=True
-    )
-
-    pros_rating_before = pros_user['rating']
-    cons_rating_before = cons_user['rating']
-
-    # 確定勝負
-    if debate['winner_id'] == debate['pros_user_id']:
-        pros_result = 'win'
-        cons_result = 'loss'
-        pros_score = 1.0
-        cons_score = 0.0
-    elif debate['winner_id'] == debate['cons_user_id']:
-        pros_result = 'loss'
-        cons_result = 'win'
-        pros_score = 0.0
-        cons_score = 1.0
-    else:
-        pros_result = 'draw'
-        cons_result = 'draw'
-        pros_score = 0.5
-        cons_score = 0.5
-
-    # 計算新評分
-    pros_rating_after, cons_rating_after = calculate_elo(
-        pros_rating_before,
-        cons_rating_before,
-        pros_score,
-        cons_score
-    )
-
-    # 更新用戶評分和戰績
-    if pros_result == 'win':
-        db.execute_query(
-            "UPDATE Users SET rating = ?, wins = wins + 1 WHERE user_id = ?",
-            (pros_rating_after, debate['pros_user_id'])
+def _winner_side(pros_votes, cons_votes):
+    """依加權票數判定回合勝方；無人投票時返回 None"""
+    if pros_votes + cons_votes == 0:
+        return None
+    if pros_votes > cons_votes:
+        return 'pros'
+    if cons_votes > pros_votes:
+        return 'cons'
+    return 'draw'
+
+
+def close_rounds(round_ids):
+    """批量關閉投票並計算結果，返回 {round_id: (winner_side, debate_finished)}
+
+    不在投票中、或所屬辯論已不在進行中（如已被管理員強制結束）的回合會被略過。
+    所有回合在同一交易中處理：計數直接讀取
+    Rounds 的計數欄位，回合、辯論的更新與新回合各以一次批次寫入。
+    """
+    round_ids = list(round_ids)
+    # 先停止接受並寫入緩衝中的投票，再計票
+    if vote_buffer.enabled:
+        vote_buffer.close_rounds(round_ids, timeout=Config.VOTE_BUFFER_FLUSH_TIMEOUT)
+
+    results = {}
+    with db.transaction() as tx:
+        # 先遞增辯論版本（鎖定辯論行），再鎖定回合行，讓進行中的投票計數更新在關閉前完成
+        if not bump_open_round_versions(tx, round_ids):
+            return results
+        rounds = tx.execute_query(
+            f"""
+            SELECT r.* FROM Rounds r WITH (UPDLOCK)
+            JOIN Debates d ON d.debate_id = r.debate_id
+            WHERE r.status = 'WAIT_VOTING' AND d.status = 'ONGOING'
+              AND r.round_id IN ({', '.join('?' for _ in round_ids)})
+            ORDER BY r.round_id
+            """,
+            round_ids,
+            fetch_all=True
+        )
+        if not rounds:
+            return results
+
+        debate_ids = sorted({round_data['debate_id'] for round_data in rounds})
+        debates = tx.execute_query(
+            f"SELECT * FROM Debates WHERE debate_id IN ({', '.join('?' for _ in debate_ids)})",
+            debate_ids,
+            fetch_all=True
+        )
+        debates = {debate['debate_id']: debate for debate in debates}
+
+        round_updates = []
+        debate_updates = {}
+        new_rounds = []
+        finished = []
+
+        for round_data in rounds:
+            debate = debates[round_data['debate_id']]
+            # 計數欄位已隨投票增量更新，無需再彙總 Votes
+            pros_votes = round_data['pros_votes']
+            cons_votes = round_data['cons_votes']
+            total_votes = pros_votes + cons_votes
+            winner_side = _winner_side(pros_votes, cons_votes)
+            round_updates.append((winner_side, debate['version'], round_data['round_id']))
+
+            # 更新連勝計數
+            if winner_side == 'pros':
+                new_pros_wins = debate['pros_consecutive_wins'] + 1
+                new_cons_wins = 0
+            elif winner_side == 'cons':
+                new_pros_wins = 0
+                new_cons_wins = debate['cons_consecutive_wins'] + 1
+            else:
+                new_pros_wins = 0
+                new_cons_wins = 0
+
+            # 檢查勝利條件
+            debate_finished = False
+            final_winner_id = None
+
+            # 檢查即時獲勝（70%以上得票率）
+            if total_votes > 0 and max(pros_votes, cons_votes) / total_votes >= Config.INSTANT_WIN_PERCENTAGE:
+                debate_finished = True
+                final_winner_id = debate['pros_user_id'] if winner_side == 'pros' else debate['cons_user_id']
+
+            # 檢查連勝3局
+            elif new_pros_wins >= Config.CONSECUTIVE_WINS_FOR_VICTORY:
+                debate_finished = True
+                final_winner_id = debate['pros_user_id']
+
+            elif new_cons_wins >= Config.CONSECUTIVE_WINS_FOR_VICTORY:
+                debate_finished = True
+                final_winner_id = debate['cons_user_id']
+
+            # 檢查是否達到最大回合數
+            elif round_data['round_number'] >= Config.MAX_ROUNDS:
+                debate_finished = True
+                # 需要管理員手動判定
+
+            round_count = debate['round_count']
+            if debate_finished and final_winner_id:
+                debate['winner_id'] = final_winner_id
+                finished.append(debate)
+            elif not debate_finished:
+                # 創建新回合
+                round_count = round_data['round_number'] + 1
+                new_rounds.append((debate['debate_id'], round_count, 'WAIT_PROS_STATEMENT', debate['version']))
+
+            debate_updates[debate['debate_id']] = (new_pros_wins, new_cons_wins, round_count, debate['debate_id'])
+            results[round_data['round_id']] = (winner_side, debate_finished)
+
+        # 更新回合狀態
+        tx.execute_many(
+            "UPDATE Rounds SET status = 'ROUND_RESULT', winner_side = ?, version = ? WHERE round_id = ?",
+            round_updates
         )
-    elif pros_result == 'loss':
-        db.execute_query(
-            "UPDATE Users SET rating = ?, losses = losses + 1 WHERE user_id = ?",
-            (pros_rating_after, debate['pros_user_id'])
+        tx.execute_many(
+            """
+            UPDATE Debates
+            SET pros_consecutive_wins = ?, cons_consecutive_wins = ?, round_count = ?
+            WHERE debate_id = ?
+            """,
+            list(debate_updates.values())
         )
-    else:
-        db.execute_query(
-            "UPDATE Users SET rating = ?, draws = draws + 1 WHERE user_id = ?",
-            (pros_rating_after, debate['pros_user_id'])
+        if finished:
+            # 更新辯論狀態
+            tx.execute_many(
+                "UPDATE Debates SET status = 'FINISHED', winner_id = ? WHERE debate_id = ?",
+                [(debate['winner_id'], debate['debate_id']) for debate in finished]
+            )
+        if new_rounds:
+            tx.bulk_insert('Rounds', ('debate_id', 'round_number', 'status', 'version'), new_rounds)
+
+        # 更新 Elo 評分
+        for debate in finished:
+            update_player_ratings(debate)
+
+        finished_ids = {debate['debate_id'] for debate in finished}
+
+        def after_commit():
+            # 清除即時計數，並通知觀看中的連線
+            for round_data in rounds:
+                round_id = round_data['round_id']
+                vote_tally.discard(round_id)
+                winner_side, debate_finished = results[round_id]
+                debate = debates[round_data['debate_id']]
+                event_bus.publish(debate['debate_id'], 'round', {
+                    'round_id': round_id,
+                    'status': 'ROUND_RESULT',
+                    'winner_side': winner_side,
+                    'version': debate['version'],
+                })
+                event_bus.publish(debate['debate_id'], 'debate', {
+                    'debate_id': debate['debate_id'],
+                    'status': 'FINISHED' if debate['debate_id'] in finished_ids else debate['status'],
+                    'round_count': debate_updates[debate['debate_id']][2],
+                    'winner_id': debate['winner_id'],
+                    'debate_finished': debate_finished,
+                    'version': debate['version'],
+                })
+        tx.on_commit(after_commit)
+
+    return results
+
+
+def update_player_ratings(debate):
+    """更新玩家 Elo 評分（在呼叫者的交易中執行時會使用儲存點）"""
+    with db.transaction() as tx:
+        # 獲取玩家當前評分
+        pros_user = tx.execute_query(
+            "SELECT * FROM Users WHERE user_id = ?",
+            (debate['pros_user_id'],),
+            fetch_one=True
         )
 
-    if cons_result == 'win':
-        db.execute_query(
-            "UPDATE Users SET rating = ?, wins = wins + 1 WHERE user_id = ?",
-            (cons_rating_after, debate['cons_user_id'])
+        cons_user = tx.execute_query(
+            "SELECT * FROM Users WHERE user_id = ?",
+            (debate['cons_user_id'],),
+            fetch_one=True
         )
-    elif cons_result == 'loss':
-        db.execute_query(
-            "UPDATE Users SET rating = ?, losses = losses + 1 WHERE user_id = ?",
-            (cons_rating_after, debate['cons_user_id'])
+
+        pros_rating_before = pros_user['rating']
+        cons_rating_before = cons_user['rating']
+
+        # 確定勝負
+        if debate['winner_id'] == debate['pros_user_id']:
+            pros_result = 'win'
+            cons_result = 'loss'
+            pros_score = 1.0
+            cons_score = 0.0
+        elif debate['winner_id'] == debate['cons_user_id']:
+            pros_result = 'loss'
+            cons_result = 'win'
+            pros_score = 0.0
+            cons_score = 1.0
+        else:
+            pros_result = 'draw'
+            cons_result = 'draw'
+            pros_score = 0.5
+            cons_score = 0.5
+
+        # 計算新評分
+        pros_rating_after, cons_rating_after = calculate_elo(
+            pros_rating_before,
+            cons_rating_before,
+            pros_score,
+            cons_score
         )
-    else:
-        db.execute_query(
-            "UPDATE Users SET rating = ?, draws = draws + 1 WHERE user_id = ?",
-            (cons_rating_after, debate['cons_user_id'])
+
+        # 更新用戶評分和戰績
+        if pros_result == 'win':
+            tx.execute_query(
+                "UPDATE Users SET rating = ?, wins = wins + 1 WHERE user_id = ?",
+                (pros_rating_after, debate['pros_user_id'])
+            )
+        elif pros_result == 'loss':
+            tx.execute_query(
+                "UPDATE Users SET rating = ?, losses = losses + 1 WHERE user_id = ?",
+                (pros_rating_after, debate['pros_user_id'])
+            )
+        else:
+            tx.execute_query(
+                "UPDATE Users SET rating = ?, draws = draws + 1 WHERE user_id = ?",
+                (pros_rating_after, debate['pros_user_id'])
+            )
+
+        if cons_result == 'win':
+            tx.execute_query(
+                "UPDATE Users SET rating = ?, wins = wins + 1 WHERE user_id = ?",
+                (cons_rating_after, debate['cons_user_id'])
+            )
+        elif cons_result == 'loss':
+            tx.execute_query(
+                "UPDATE Users SET rating = ?, losses = losses + 1 WHERE user_id = ?",
+                (cons_rating_after, debate['cons_user_id'])
+            )
+        else:
+            tx.execute_query(
+                "UPDATE Users SET rating = ?, draws = draws + 1 WHERE user_id = ?",
+                (cons_rating_after, debate['cons_user_id'])
+            )
+
+        invalidate_principal(debate['pros_user_id'], debate['cons_user_id'])
+
+        # 提交後增量更新記憶體排行榜
+        pros_updated = _with_result(pros_user, pros_rating_after, pros_result)
+        cons_updated = _with_result(cons_user, cons_rating_after, cons_result)
+        tx.on_commit(lambda: leaderboard.update(pros_updated))
+        tx.on_commit(lambda: leaderboard.update(cons_updated))
+
+        # 記錄比賽歷史（一次批量寫入）
+        tx.bulk_insert(
+            'MatchHistory',
+            ('debate_id', 'user_id', 'result', 'rating_before', 'rating_after'),
+            [
+                (debate['debate_id'], debate['pros_user_id'], pros_result, pros_rating_before, pros_rating_after),
+                (debate['debate_id'], debate['cons_user_id'], cons_result, cons_rating_before, cons_rating_after)
+            ]
         )
 
-    # 記錄比賽歷史
-    db.execute_insert(
-        """
-        INSERT INTO MatchHistory (debate_id, user_id, result, rating_before, rating_after)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (debate['debate_id'], debate['pros_user_id'], pros_result, pros_rating_before, pros_rating_after)
-    )
-
-    db.execute_insert(
-        """
-        INSERT INTO MatchHistory (debate_id, user_id, result, rating_before, rating_after)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (debate['debate_id'], debate['cons_user_id'], cons_result, cons_rating_before, cons_rating_after)
-    )
+
+def _with_result(user, rating, result):
+    """返回套用比賽結果後的用戶資料"""
+    stats_field = {'win': 'wins', 'loss': 'losses', 'draw': 'draws'}[result]
+    updated = {field: user[field] for field in leaderboard.FIELDS}
+    updated['rating'] = rating
+    updated[stats_field] += 1
+    return updated
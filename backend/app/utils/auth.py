@@ -1,22 +1,237 @@
 import jwt
+import time
 import datetime
+import threading
+from collections import OrderedDict
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, make_response
 from config import Config
 from app.utils.database import db
 
 
-def generate_jwt_token(user_id):
-    """生成 JWT token"""
+class PrincipalCache:
+    """已驗證用戶的快取（以 user_id 為鍵，短 TTL、容量有限）
+
+    用戶資料變更時需呼叫 invalidate；其他行程（如 manage_admin.py）的變更
+    最多延遲 TTL 秒生效。
+    """
+
+    def __init__(self, ttl=30, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (expires_at, user)
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """返回快取的用戶資料副本；未命中時返回 None"""
+        if not self.ttl:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return dict(entry[1])
+
+    def generation(self):
+        """讀取數據庫前記錄世代，避免讀取期間發生的失效被舊資料覆蓋"""
+        return self._generation
+
+    def put(self, user_id, user, generation):
+        if not self.ttl:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, dict(user))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# 全局用戶快取實例
+principal_cache = PrincipalCache(
+    ttl=Config.AUTH_PRINCIPAL_CACHE_TTL,
+    max_size=Config.AUTH_PRINCIPAL_CACHE_SIZE
+)
+
+
+def invalidate_principal(*user_ids):
+    """在當前交易提交後使用戶快取失效"""
+    db.on_commit(lambda: principal_cache.invalidate(*user_ids))
+
+
+def load_principal(user_id):
+    """獲取用戶資料（優先使用快取）"""
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+
+    generation = principal_cache.generation()
+    user = db.execute_query(
+        "SELECT * FROM Users WHERE user_id = ?",
+        (user_id,),
+        fetch_one=True
+    )
+    if user:
+        principal_cache.put(user_id, user, generation)
+    return user
+
+
+class RevocationTable:
+    """無狀態 token 的版本表（user_id -> 最新 token 版本）
+
+    只保存 claims 有效期內被撤銷的用戶：更早簽發的 claims 已自行過期，
+    因此表格大小與近期權限變更數量成正比。每 refresh_interval 秒由
+    數據庫重新載入一次，其他行程（如 manage_admin.py）的變更最多延遲
+    此間隔生效。
+    """
+
+    # 應用伺服器與數據庫時鐘誤差的容許範圍
+    CLOCK_SKEW = datetime.timedelta(minutes=1)
+
+    def __init__(self, refresh_interval=10, window_minutes=15):
+        self.refresh_interval = refresh_interval
+        self.window = datetime.timedelta(minutes=window_minutes)
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._loaded_at = None
+        self.refreshes = 0
+
+    def version(self, user_id):
+        """返回用戶目前的 token 版本（未被撤銷過為 0）"""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_interval:
+            self._refresh(wait=loaded_at is None)
+        return self._versions.get(user_id, 0)
+
+    def _refresh(self, wait):
+        # 只由一個執行緒重新載入，其餘執行緒沿用舊表（首次載入除外）
+        if not self._lock.acquire(blocking=wait):
+            return
+        try:
+            loaded_at = self._loaded_at
+            if loaded_at is not None and time.monotonic() - loaded_at < self.refresh_interval:
+                return
+            cutoff = datetime.datetime.now() - self.window - self.CLOCK_SKEW
+            try:
+                rows = db.execute_query(
+                    "SELECT user_id, token_version FROM TokenRevocations WHERE revoked_at >= ?",
+                    (cutoff,),
+                    fetch_all=True
+                )
+                self._versions = {row['user_id']: row['token_version'] for row in rows}
+                self.refreshes += 1
+            except Exception as e:
+                # 載入失敗時沿用舊表，下個間隔再重試
+                print(f"Revocation table refresh error: {e}")
+            self._loaded_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def expire(self):
+        """標記為過期，下次查詢時重新載入"""
+        self._loaded_at = None
+
+    def stats(self):
+        return {
+            'entries': len(self._versions),
+            'refresh_interval': self.refresh_interval,
+            'refreshes': self.refreshes,
+        }
+
+
+# 全局撤銷表實例
+revocation_table = RevocationTable(
+    refresh_interval=Config.AUTH_REVOCATION_REFRESH_SECONDS,
+    window_minutes=Config.AUTH_CLAIMS_TTL_MINUTES
+)
+
+
+def revoke_tokens(user_id):
+    """提升用戶的 token 版本，使已簽發的 claims 失效（權限變更時呼叫）"""
+    updated = db.execute_query(
+        "UPDATE TokenRevocations SET token_version = token_version + 1, revoked_at = GETDATE() WHERE user_id = ?",
+        (user_id,)
+    )
+    if not updated:
+        db.execute_query(
+            "INSERT INTO TokenRevocations (user_id, token_version) VALUES (?, 1)",
+            (user_id,)
+        )
+    db.on_commit(revocation_table.expire)
+
+
+# 嵌入 token 的用戶欄位
+CLAIM_FIELDS = ('user_id', 'nickname', 'avatar', 'rating', 'wins', 'losses', 'draws', 'is_admin')
+
+
+def _user_claims(user):
+    claims = {field: user[field] for field in CLAIM_FIELDS}
+    claims['is_admin'] = bool(claims['is_admin'])
+    return claims
+
+
+def generate_jwt_token(user_id, user=None):
+    """生成 JWT token
+
+    AUTH_MODE 為 claims 時，token 另外帶有用戶資料、版本號與較短的
+    claims 到期時間，驗證時可不查詢數據庫。
+    """
+    now = datetime.datetime.utcnow()
     payload = {
         'user_id': user_id,
-        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=Config.JWT_EXPIRATION_HOURS),
-        'iat': datetime.datetime.utcnow()
+        'exp': now + datetime.timedelta(hours=Config.JWT_EXPIRATION_HOURS),
+        'iat': now
     }
+    if Config.AUTH_MODE == 'claims':
+        user = user or load_principal(user_id)
+        if user:
+            payload['usr'] = _user_claims(user)
+            payload['ver'] = revocation_table.version(user_id)
+            payload['cexp'] = int((now + datetime.timedelta(minutes=Config.AUTH_CLAIMS_TTL_MINUTES)).timestamp())
     token = jwt.encode(payload, Config.JWT_SECRET_KEY, algorithm=Config.JWT_ALGORITHM)
     return token
 
 
+def _trusted_claims(payload):
+    """返回仍可信任的 claims；過期或已被撤銷時返回 None"""
+    claims = payload.get('usr')
+    if not claims or payload.get('cexp', 0) <= time.time():
+        return None
+    if payload.get('ver', 0) < revocation_table.version(payload['user_id']):
+        return None
+    return dict(claims)
+
+
 def decode_jwt_token(token):
     """解碼 JWT token"""
     try:
@@ -54,20 +269,27 @@ def token_required(f):
         if not payload:
             return jsonify({'error': 'Token is invalid or expired'}), 401
 
-        # 獲取用戶信息
-        user = db.execute_query(
-            "SELECT * FROM Users WHERE user_id = ?",
-            (payload['user_id'],),
-            fetch_one=True
-        )
+        # 獲取用戶信息（claims 模式下優先信任 token 內的資料）
+        refreshed_token = None
+        user = _trusted_claims(payload) if Config.AUTH_MODE == 'claims' else None
+        if user is None:
+            user = load_principal(payload['user_id'])
+
+            if not user:
+                return jsonify({'error': 'User not found'}), 401
 
-        if not user:
-            return jsonify({'error': 'User not found'}), 401
+            # claims 已過期或被撤銷：以最新資料換發 token
+            if Config.AUTH_MODE == 'claims':
+                refreshed_token = generate_jwt_token(payload['user_id'], user)
 
         # 將用戶信息添加到請求上下文
         request.current_user = user
 
-        return f(*args, **kwargs)
+        if refreshed_token is None:
+            return f(*args, **kwargs)
+        response = make_response(f(*args, **kwargs))
+        response.headers['X-Refreshed-Token'] = refreshed_token
+        return response
 
     return decorated
 
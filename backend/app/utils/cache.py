@@ -0,0 +1,182 @@
+import re
+import time
+import threading
+import importlib
+from collections import OrderedDict
+from functools import lru_cache
+from config import Config
+
+
+_READ_TABLES_RE = re.compile(r'\b(?:FROM|JOIN)\s+([\[\]\w.]+)', re.IGNORECASE)
+_WRITE_TABLE_RE = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|DELETE|MERGE\s+INTO|MERGE)\s+([\[\]\w.]+)',
+                             re.IGNORECASE)
+# WITH ... AS (...) 之後的寫入語句
+_CTE_WRITE_RE = re.compile(r'^\s*WITH\b.*\)\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|DELETE|MERGE\s+INTO|MERGE)\s+([\[\]\w.]+)',
+                           re.IGNORECASE | re.DOTALL)
+
+
+def _normalize_table(name):
+    return name.replace('[', '').replace(']', '').split('.')[-1].lower()
+
+
+@lru_cache(maxsize=1024)
+def tables_read(query):
+    """解析查詢讀取的資料表（作為快取標籤）"""
+    return frozenset(_normalize_table(name) for name in _READ_TABLES_RE.findall(query))
+
+
+@lru_cache(maxsize=1024)
+def tables_written(query):
+    """解析寫入語句影響的資料表；非寫入語句返回空集合
+
+    WITH ... UPDATE/INSERT/DELETE/MERGE 的目標可能是 CTE 名稱，因此同時計入查詢讀取的資料表。
+    """
+    match = _WRITE_TABLE_RE.match(query)
+    if match:
+        return frozenset((_normalize_table(match.group(1)),))
+    match = _CTE_WRITE_RE.match(query)
+    if match:
+        return tables_read(query) | {_normalize_table(match.group(1))}
+    return frozenset()
+
+
+class MemoryCacheBackend:
+    """行程內快取：LRU 淘汰、TTL 到期、依資料表標籤失效"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tag_keys = {}
+        self._tag_versions = {}
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def set(self, key, value, ttl, tags, versions=None):
+        """寫入快取；若讀取期間標籤已失效（版本不同）則放棄寫入"""
+        with self._lock:
+            if versions is not None and versions != tuple(self._tag_versions.get(tag, 0) for tag in tags):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, tags, value)
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def invalidate_tags(self, tags):
+        """使帶有任一標籤的快取失效，返回移除的項目數"""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+                for key in list(self._tag_keys.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_keys.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'evictions': self.evictions}
+
+
+def load_backend(spec):
+    """依配置載入快取後端：'memory' 或 'package.module:ClassName'（共享快取）
+
+    自訂後端需實作 get / set / tag_versions / invalidate_tags / clear / stats。
+    """
+    if not spec or spec == 'memory':
+        return MemoryCacheBackend(max_entries=Config.DB_CACHE_MAX_ENTRIES)
+    module_name, _, class_name = spec.partition(':')
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    return backend_class()
+
+
+class QueryCache:
+    """查詢結果快取，鍵為查詢語句與參數，標籤為讀取的資料表"""
+
+    def __init__(self, backend, default_ttl=30):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query, params, fetch_one):
+        return (query, tuple(params) if params else (), bool(fetch_one))
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def snapshot(self, query):
+        """讀取前記錄標籤版本，避免寫入與讀取交錯時快取舊資料"""
+        tags = tables_read(query)
+        return tags, self.backend.tag_versions(tags)
+
+    def set(self, key, value, ttl, snapshot):
+        tags, versions = snapshot
+        ttl = self.default_ttl if ttl is True else ttl
+        return self.backend.set(key, value, ttl, tags, versions)
+
+    def invalidate(self, tables):
+        if not tables:
+            return
+        self.backend.invalidate_tags(frozenset(tables))
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+        stats.update(self.backend.stats())
+        return stats
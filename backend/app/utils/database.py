@@ -1,85 +1,847 @@
-import pyodbc
+import re
+import time
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from flask import g, has_request_context
 from config import Config
+from app.utils.engines import create_engine
+from app.utils.records import record_class
+from app.utils.instrumentation import query_stats
+from app.utils.cache import QueryCache, load_backend, tables_written
 
 
-class Database:
-    def __init__(self):
-        self.connection_string = Config.DB_CONNECTION_STRING
+# 可送往唯讀副本的語句
+_READ_ONLY_RE = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
 
-    def get_connection(self):
-        """獲取數據庫連接"""
+
+def is_read_only(query):
+    """依語句動詞判斷是否唯讀：SELECT，或不含寫入語句的 WITH 查詢"""
+    return bool(_READ_ONLY_RE.match(query)) and not tables_written(query)
+
+
+def build_insert(table, columns):
+    """構建參數化 INSERT 語句"""
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)})"
+    )
+
+
+class PoolTimeoutError(Exception):
+    """等待連接池可用連接逾時"""
+
+
+class _PooledConnection:
+    """連接池中的連接記錄"""
+    __slots__ = ('conn', 'created_at', 'last_used', '__weakref__')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """執行緒安全的數據庫連接池"""
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30,
+                 recycle=1800, pre_ping=True):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0  # 已建立的連接數（含使用中）
+        self._in_use = 0
+        self._filled = False
+
+        # 統計數據
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _open(self):
+        entry = _PooledConnection(self._connect())
+        with self._cond:
+            self._created += 1
+        return entry
+
+    def _is_stale(self, entry):
+        """檢查連接是否超過回收時間或已失效"""
+        if self.recycle and time.monotonic() - entry.created_at > self.recycle:
+            return True
+        if self.pre_ping:
+            cursor = None
+            try:
+                cursor = entry.conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            except Exception:
+                return True
+            finally:
+                if cursor:
+                    try:
+                        cursor.close()
+                    except Exception:
+                        pass
+        return False
+
+    def _close_quietly(self, entry):
         try:
-            conn = pyodbc.connect(self.connection_string)
-            return conn
-        except Exception as e:
-            print(f"Database connection error: {e}")
-            raise
+            entry.conn.close()
+        except Exception:
+            pass
 
-    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False):
-        """執行查詢並返回結果"""
-        conn = None
-        cursor = None
+    def _fill(self):
+        """首次使用時預先建立最少連接數"""
+        with self._cond:
+            if self._filled:
+                return
+            self._filled = True
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+
+        opened = 0
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            for _ in range(max(missing, 0)):
+                entry = self._open()
+                opened += 1
+                with self._cond:
+                    self._idle.append(entry)
+                    self._cond.notify()
+        finally:
+            if opened < missing:
+                with self._cond:
+                    self._size -= missing - opened
+
+    def acquire(self):
+        """從連接池取出一個連接"""
+        if not self._filled:
+            self._fill()
+
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout is not None else None
+
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a database connection"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._size += 1
+                self._in_use += 1
+
+            if entry is not None and self._is_stale(entry):
+                self._close_quietly(entry)
+                with self._cond:
+                    self._discarded += 1
+                entry = None
 
-            if params:
-                cursor.execute(query, params)
+            if entry is None:
+                try:
+                    entry = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                if waited > self._wait_max:
+                    self._wait_max = waited
+            return entry
+
+    def release(self, entry, discard=False):
+        """將連接歸還連接池"""
+        if not discard:
+            try:
+                # 重置連接狀態，避免殘留未提交的交易
+                entry.conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+                self._discarded += 1
             else:
-                cursor.execute(query)
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+
+        if discard:
+            self._close_quietly(entry)
+
+    def close_all(self):
+        """關閉所有閒置連接"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._filled = False
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry)
+
+    def stats(self):
+        """返回連接池統計數據"""
+        with self._cond:
+            return {
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'discarded': self._discarded,
+                'wait_time_total': round(self._wait_total, 6),
+                'wait_time_avg': round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+                'wait_time_max': round(self._wait_max, 6),
+            }
+
+
+class ThreadLocalConnectionPool:
+    """每個執行緒各持有一個長駐連接的連接池（用於嵌入式 SQLite）"""
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._entries = weakref.WeakSet()  # 執行緒結束後其連接會自動回收
+        self._created = 0
+        self._checkouts = 0
+        self._in_use = 0
+
+    def acquire(self):
+        """取出當前執行緒的連接（可重入）"""
+        entry = getattr(self._local, 'entry', None)
+        if entry is None:
+            entry = _PooledConnection(self._connect())
+            self._local.entry = entry
+            self._local.depth = 0
+            with self._lock:
+                self._created += 1
+                self._entries.add(entry)
+        if self._local.depth == 0:
+            with self._lock:
+                self._in_use += 1
+        self._local.depth += 1
+        with self._lock:
+            self._checkouts += 1
+        return entry
+
+    def release(self, entry, discard=False):
+        """歸還連接；最外層歸還時重置交易狀態"""
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        with self._lock:
+            self._in_use -= 1
+        if not discard:
+            try:
+                entry.conn.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._local.entry = None
+            with self._lock:
+                self._entries.discard(entry)
+            try:
+                entry.conn.close()
+            except Exception:
+                pass
+        else:
+            entry.last_used = time.monotonic()
+
+    def close_all(self):
+        """關閉當前執行緒的連接"""
+        entry = getattr(self._local, 'entry', None)
+        if entry is not None and not getattr(self._local, 'depth', 0):
+            self._local.entry = None
+            with self._lock:
+                self._entries.discard(entry)
+            try:
+                entry.conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """返回連接池統計數據"""
+        with self._lock:
+            size = len(self._entries)
+            return {
+                'size': size,
+                'in_use': self._in_use,
+                'idle': size - self._in_use,
+                'checkouts': self._checkouts,
+                'created': self._created,
+                'wait_time_total': 0.0,
+                'wait_time_avg': 0.0,
+                'wait_time_max': 0.0,
+            }
+
+
+class _Replica:
+    """唯讀副本及其健康狀態"""
+    __slots__ = ('name', 'pool', 'down_until', 'failures')
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.down_until = 0.0
+        self.failures = 0
+
+
+class ReplicaSet:
+    """唯讀副本集合：輪詢選擇健康副本，失敗的副本暫停使用一段時間"""
+
+    def __init__(self, replicas, retry_after=30):
+        self.replicas = replicas
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def choose(self):
+        """輪詢選擇下一個健康副本；全部不可用時返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+                if replica.down_until <= now:
+                    return replica
+        return None
+
+    def mark_down(self, replica, error):
+        with self._lock:
+            replica.failures += 1
+            replica.down_until = time.monotonic() + self.retry_after
+        print(f"Replica {replica.name} marked down for {self.retry_after}s: {error}")
+
+    def mark_up(self, replica):
+        if replica.down_until:
+            with self._lock:
+                replica.down_until = 0.0
+
+    def stats(self):
+        now = time.monotonic()
+        return [
+            {
+                'name': replica.name,
+                'healthy': replica.down_until <= now,
+                'failures': replica.failures,
+                'pool': replica.pool.stats()
+            }
+            for replica in self.replicas
+        ]
+
+
+class Transaction:
+    """交易（unit of work），所有語句在同一連接上執行，不個別提交"""
+
+    def __init__(self, database, conn):
+        self.database = database
+        self.engine = database.engine
+        self.conn = conn
+        self._savepoint_seq = 0
+        self.written_tables = set()  # 提交後用於使查詢快取失效
+        self.after_commit = []
+
+    def on_commit(self, callback):
+        """註冊交易提交後才執行的回呼（如使快取失效）"""
+        self.after_commit.append(callback)
+
+    def _track_write(self, query):
+        self.written_tables.update(tables_written(query))
+
+    def _execute(self, cursor, query, params):
+        query = self.engine.translate(query)
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+
+    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False):
+        """在交易中執行查詢（不提交）"""
+        start = time.perf_counter()
+        rows = 0
+        cursor = self.conn.cursor()
+        try:
+            self._execute(cursor, query, params)
+            # 寫入語句也可能返回結果行（OUTPUT / RETURNING）
+            self._track_write(query)
 
             if fetch_one:
                 result = cursor.fetchone()
-                return self._row_to_dict(cursor, result) if result else None
+                if not result:
+                    return None
+                rows = 1
+                return self.database.row_factory(query, cursor)(result)
             elif fetch_all:
                 results = cursor.fetchall()
-                return [self._row_to_dict(cursor, row) for row in results]
+                rows = len(results)
+                make_row = self.database.row_factory(query, cursor)
+                return [make_row(row) for row in results]
             else:
-                conn.commit()
                 return cursor.rowcount
 
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Query execution error: {e}")
             raise
         finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
+            cursor.close()
+            query_stats.record(query, time.perf_counter() - start, rows)
 
-    def execute_insert(self, query, params=None):
-        """執行 INSERT 並返回新插入的 ID"""
-        conn = None
-        cursor = None
+    def fetch_raw(self, query, params=None, fetch_one=False):
+        """執行查詢並返回 (欄位名稱, 行元組列表)，供查詢快取儲存"""
+        start = time.perf_counter()
+        rows = []
+        cursor = self.conn.cursor()
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            if params:
-                cursor.execute(query, params)
+            self._execute(cursor, query, params)
+            columns = tuple(column[0] for column in cursor.description)
+            if fetch_one:
+                result = cursor.fetchone()
+                rows = [tuple(result)] if result else []
             else:
-                cursor.execute(query)
+                rows = [tuple(row) for row in cursor.fetchall()]
+            return columns, rows
+
+        except Exception as e:
+            print(f"Query execution error: {e}")
+            raise
+        finally:
+            cursor.close()
+            query_stats.record(query, time.perf_counter() - start, len(rows))
 
-            # 獲取新插入的 ID
-            cursor.execute("SELECT @@IDENTITY AS id")
-            result = cursor.fetchone()
-            new_id = result[0] if result else None
+    def execute_insert(self, query, params=None):
+        """在交易中執行 INSERT 並返回新插入的 ID（不提交）
 
-            conn.commit()
-            return new_id
+        SQL Server 透過 OUTPUT INSERTED 子句在同一語句中返回新 ID，不需額外查詢。
+        """
+        start = time.perf_counter()
+        self._track_write(query)
+        cursor = self.conn.cursor()
+        try:
+            self._execute(cursor, self.engine.prepare_insert(query), params)
+            return self.engine.fetch_insert_id(cursor)
 
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Insert execution error: {e}")
             raise
         finally:
-            if cursor:
+            cursor.close()
+            query_stats.record(query, time.perf_counter() - start)
+
+    def execute_many(self, query, params_seq, chunk_size=None):
+        """在交易中批次執行同一語句（不提交），返回影響的總行數
+
+        SQL Server 使用 pyodbc fast_executemany，每個批次只需一次往返。
+        """
+        chunk_size = chunk_size or Config.DB_BULK_CHUNK_SIZE
+        self._track_write(query)
+        translated = self.engine.translate(query)
+        cursor = self.conn.cursor()
+        total = 0
+        try:
+            self.engine.prepare_executemany(cursor)
+            chunk = []
+            for params in params_seq:
+                chunk.append(params)
+                if len(chunk) >= chunk_size:
+                    self._execute_chunk(cursor, query, translated, chunk)
+                    total += len(chunk)
+                    chunk = []
+            if chunk:
+                self._execute_chunk(cursor, query, translated, chunk)
+                total += len(chunk)
+            return total
+
+        except Exception as e:
+            print(f"Batch execution error: {e}")
+            raise
+        finally:
+            cursor.close()
+
+    def _execute_chunk(self, cursor, query, translated, chunk):
+        start = time.perf_counter()
+        try:
+            cursor.executemany(translated, chunk)
+        finally:
+            query_stats.record(query, time.perf_counter() - start)
+
+    def bulk_insert(self, table, columns, rows, chunk_size=None):
+        """在交易中批量插入多行（不提交），返回插入的行數"""
+        return self.execute_many(build_insert(table, columns), rows, chunk_size=chunk_size)
+
+    def insert_returning(self, table, columns, rows, returning, chunk_size=None):
+        """在交易中以多行 INSERT 插入並返回指定欄位（不提交）
+
+        每批為一條語句、一次往返。返回行的順序不保證與輸入相同，
+        呼叫者應以 returning 中的欄位對應輸入行。
+        """
+        rows = list(rows)
+        chunk_size = chunk_size or Config.DB_BULK_CHUNK_SIZE
+        chunk_size = max(1, min(chunk_size, self.engine.MAX_PARAMS // len(columns)))
+        results = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            query = self.engine.insert_returning_sql(table, columns, returning, len(chunk))
+            results.extend(self.execute_query(query, [value for row in chunk for value in row], fetch_all=True))
+        return results
+
+    def stream_query(self, query, params=None, batch_size=None):
+        """以 fetchmany 分批讀取查詢結果，逐行產生結果行"""
+        batch_size = batch_size or Config.DB_STREAM_BATCH_SIZE
+        start = time.perf_counter()
+        count = 0
+        cursor = self.conn.cursor()
+        try:
+            self._execute(cursor, query, params)
+            make_row = self.database.row_factory(query, cursor)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                for row in rows:
+                    yield make_row(row)
+        finally:
+            cursor.close()
+            query_stats.record(query, time.perf_counter() - start, count)
+
+    @contextmanager
+    def savepoint(self):
+        """建立巢狀儲存點，區塊內發生例外時只回滾到儲存點"""
+        self._savepoint_seq += 1
+        name = f"sp_{self._savepoint_seq}"
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(self.engine.SAVEPOINT_SQL.format(name=name))
+        finally:
+            cursor.close()
+
+        try:
+            yield self
+        except Exception:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(self.engine.ROLLBACK_TO_SAVEPOINT_SQL.format(name=name))
+            finally:
                 cursor.close()
-            if conn:
-                conn.close()
+            raise
+        else:
+            if self.engine.RELEASE_SAVEPOINT_SQL:
+                cursor = self.conn.cursor()
+                try:
+                    cursor.execute(self.engine.RELEASE_SAVEPOINT_SQL.format(name=name))
+                finally:
+                    cursor.close()
+
+
+class Database:
+    def __init__(self, engine=None, replica_dsns=None):
+        self.engine = engine or create_engine()
+        self.row_factory_mode = Config.DB_ROW_FACTORY
+        self._local = threading.local()
+        if self.engine.thread_local:
+            self.pool = ThreadLocalConnectionPool(self.get_connection)
+        else:
+            self.pool = self._create_pool(self.get_connection)
+
+        # 查詢結果快取（僅快取呼叫時指定 cache 的查詢）
+        self.cache = None
+        if Config.DB_CACHE_ENABLED:
+            self.cache = QueryCache(load_backend(Config.DB_CACHE_BACKEND), Config.DB_CACHE_DEFAULT_TTL)
+
+        # 唯讀副本（僅適用於網路數據庫引擎）
+        if replica_dsns is None:
+            replica_dsns = Config.DB_REPLICA_CONNECTION_STRINGS
+        self.replicas = None
+        if replica_dsns and not self.engine.thread_local:
+            self.replicas = ReplicaSet(
+                [
+                    _Replica(f'replica-{i + 1}', self._create_pool(self._replica_connector(dsn)))
+                    for i, dsn in enumerate(replica_dsns)
+                ],
+                retry_after=Config.DB_REPLICA_RETRY_SECONDS
+            )
+
+    @staticmethod
+    def _create_pool(connect):
+        return ConnectionPool(
+            connect,
+            min_size=Config.DB_POOL_MIN_SIZE,
+            max_size=Config.DB_POOL_MAX_SIZE,
+            timeout=Config.DB_POOL_TIMEOUT,
+            recycle=Config.DB_POOL_RECYCLE_SECONDS,
+            pre_ping=Config.DB_POOL_PRE_PING
+        )
+
+    def _replica_connector(self, dsn):
+        def connect():
+            return self.engine.connect(dsn)
+        return connect
+
+    def get_connection(self):
+        """獲取數據庫連接"""
+        try:
+            conn = self.engine.connect()
+            return conn
+        except Exception as e:
+            print(f"Database connection error: {e}")
+            raise
+
+    @contextmanager
+    def connection(self, pool=None):
+        """從連接池借出連接，使用完畢後自動歸還"""
+        pool = pool or self.pool
+        entry = pool.acquire()
+        broken = False
+        try:
+            yield entry.conn
+        except Exception as e:
+            # 連接層級的錯誤（如斷線）不應再放回連接池
+            broken = self.engine.is_disconnect(e)
+            raise
+        finally:
+            pool.release(entry, discard=broken)
+
+    def pool_stats(self):
+        """獲取連接池統計數據"""
+        stats = self.pool.stats()
+        if self.replicas is not None:
+            stats['replicas'] = self.replicas.stats()
+        return stats
+
+    def _mark_write(self):
+        """記錄當前請求已寫入，之後的讀取改走主庫以保證讀到自己的寫入"""
+        if has_request_context():
+            g._db_wrote = True
+
+    def _choose_replica(self, query):
+        """決定唯讀查詢是否可以送往副本"""
+        if self.replicas is None or self._current_transaction() is not None:
+            return None
+        # 背景任務（無請求上下文）與已寫入的請求一律讀主庫
+        if not has_request_context() or g.get('_db_wrote'):
+            return None
+        if not is_read_only(query):
+            return None
+        return self.replicas.choose()
+
+    def _is_replica_failure(self, error):
+        """連接失敗或斷線（而非 SQL 錯誤）才視為副本故障"""
+        return isinstance(error, PoolTimeoutError) or self.engine.is_disconnect(error)
+
+    def _read(self, method, query, *args, **kwargs):
+        """唯讀查詢：優先送往健康副本，副本不可用時退回主庫"""
+        replica = self._choose_replica(query)
+        if replica is not None:
+            try:
+                with self.connection(replica.pool) as conn:
+                    result = getattr(Transaction(self, conn), method)(query, *args, **kwargs)
+                self.replicas.mark_up(replica)
+                return result
+            except Exception as e:
+                if not self._is_replica_failure(e):
+                    raise
+                self.replicas.mark_down(replica, e)
+
+        return self._run(method, query, *args, commit=False, **kwargs)
+
+    def run_script(self, script):
+        """執行 SQL 腳本（如 database/schema.sql），依引擎轉換方言"""
+        with self.connection() as conn:
+            self.engine.run_script(conn, script)
+
+    @contextmanager
+    def transaction(self):
+        """開啟交易：區塊內所有語句共用同一連接，結束時只提交一次
+
+        在已開啟的交易中再次呼叫時，會建立巢狀儲存點（savepoint）。
+        """
+        tx = self._current_transaction()
+        if tx is not None:
+            with tx.savepoint():
+                yield tx
+            return
+
+        self._mark_write()
+        with self.connection() as conn:
+            tx = Transaction(self, conn)
+            self._local.transaction = tx
+            try:
+                self.engine.begin(conn)
+                yield tx
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Transaction rolled back: {e}")
+                raise
+            finally:
+                self._local.transaction = None
+
+        self._invalidate(tx.written_tables)
+        for callback in tx.after_commit:
+            callback()
+
+    def on_commit(self, callback):
+        """在當前交易提交後執行回呼；若無交易則立即執行"""
+        tx = self._current_transaction()
+        if tx is not None:
+            tx.on_commit(callback)
+        else:
+            callback()
+
+    def _current_transaction(self):
+        """獲取當前執行緒進行中的交易"""
+        return getattr(self._local, 'transaction', None)
+
+    def _run(self, method, *args, commit=True, **kwargs):
+        """在當前交易中執行；若無交易則借出連接單獨執行並提交"""
+        tx = self._current_transaction()
+        if tx is not None:
+            # 加入當前執行緒的交易，由交易統一提交
+            return getattr(tx, method)(*args, **kwargs)
+
+        if commit:
+            self._mark_write()
+        with self.connection() as conn:
+            try:
+                tx = Transaction(self, conn)
+                result = getattr(tx, method)(*args, **kwargs)
+                if commit:
+                    conn.commit()
+                    self._invalidate(tx.written_tables)
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+
+    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False, cache=False):
+        """執行查詢並返回結果
+
+        唯讀語句可送往副本且不提交；寫入語句（包括以 OUTPUT / RETURNING 返回結果行的寫入
+        與 WITH ... UPDATE）一律在主庫執行並提交，與是否取回結果行無關。
+
+        cache 為 True（使用預設 TTL）或秒數時，唯讀查詢的結果會被快取，
+        並在其讀取的資料表被寫入時自動失效。失效只發生在寫入的行程內（其他工作行程
+        等到 TTL 到期），因此只對不再變更的行使用。
+        """
+        if not is_read_only(query):
+            return self._run('execute_query', query, params, fetch_one=fetch_one, fetch_all=fetch_all)
+        if cache and (fetch_one or fetch_all) and self.cache is not None and self._current_transaction() is None:
+            return self._cached_query(query, params, fetch_one, cache)
+        return self._read('execute_query', query, params, fetch_one=fetch_one, fetch_all=fetch_all)
+
+    def _cached_query(self, query, params, fetch_one, ttl):
+        key = self.cache.make_key(query, params, fetch_one)
+        cached = self.cache.get(key)
+        if cached is None:
+            snapshot = self.cache.snapshot(query)
+            # 由主庫讀取，避免副本延遲使剛失效的舊資料再次被快取
+            cached = self._run('fetch_raw', query, params, fetch_one=fetch_one, commit=False)
+            self.cache.set(key, cached, ttl, snapshot)
+
+        # 每次命中都建立新的結果行，呼叫者修改結果不會影響快取
+        columns, rows = cached
+        make_row = self._row_factory(query, columns)
+        if fetch_one:
+            return make_row(rows[0]) if rows else None
+        return [make_row(row) for row in rows]
+
+    def _invalidate(self, tables):
+        if self.cache is not None and tables:
+            self.cache.invalidate(tables)
+
+    def execute_insert(self, query, params=None):
+        """執行 INSERT 並返回新插入的 ID"""
+        return self._run('execute_insert', query, params)
+
+    def execute_many(self, query, params_seq, chunk_size=None):
+        """批次執行同一語句並一次提交，返回影響的總行數"""
+        return self._run('execute_many', query, params_seq, chunk_size=chunk_size)
+
+    def bulk_insert(self, table, columns, rows, chunk_size=None):
+        """批量插入多行並一次提交，返回插入的行數
+
+        rows 為與 columns 順序對應的元組序列。
+        """
+        return self._run('bulk_insert', table, columns, rows, chunk_size=chunk_size)
+
+    def insert_returning(self, table, columns, rows, returning, chunk_size=None):
+        """批量插入多行並一次提交，返回指定欄位（如新 ID）"""
+        return self._run('insert_returning', table, columns, rows, returning, chunk_size=chunk_size)
+
+    def stream_query(self, query, params=None, batch_size=None):
+        """串流查詢：分批讀取並逐行產生結果行，記憶體用量與結果集大小無關
+
+        連接在迭代結束（或生成器被關閉）時才歸還連接池。
+        """
+        tx = self._current_transaction()
+        if tx is not None:
+            return tx.stream_query(query, params, batch_size)
+
+        # 在呼叫時（仍在請求上下文中）決定是否使用副本
+        return self._stream(self._choose_replica(query), query, params, batch_size)
+
+    def _stream(self, replica, query, params, batch_size):
+        if replica is not None:
+            yielded = False
+            try:
+                with self.connection(replica.pool) as conn:
+                    for row in Transaction(self, conn).stream_query(query, params, batch_size):
+                        yielded = True
+                        yield row
+                return
+            except Exception as e:
+                # 已輸出部分結果時無法改由主庫重試
+                if yielded or not self._is_replica_failure(e):
+                    raise
+                self.replicas.mark_down(replica, e)
+
+        with self.connection() as conn:
+            yield from Transaction(self, conn).stream_query(query, params, batch_size)
+
+    def row_factory(self, query, cursor):
+        """返回將原始行轉換為結果行的函數（每個結果集只建立一次）
+
+        record 模式下同一結果形狀共用一個 Record 類別，避免每行建立 dict；
+        dict 模式則返回一般字典。
+        """
+        return self._row_factory(query, tuple(column[0] for column in cursor.description))
+
+    def _row_factory(self, query, columns):
+        if self.row_factory_mode == 'record':
+            return record_class(query, columns)
+        return lambda row: dict(zip(columns, row))
 
     @staticmethod
     def _row_to_dict(cursor, row):
@@ -0,0 +1,159 @@
+import numpy as np
+from config import Config
+from app.utils.database import db
+from app.utils.elo import get_score_from_result
+
+
+class ReplayResult:
+    """重播結果：以用戶索引對應的評分與戰績陣列，以及每場比賽前後的評分"""
+
+    def __init__(self, user_ids, ratings, wins, losses, draws, match_ids, rating_before, rating_after):
+        self.user_ids = user_ids
+        self.ratings = ratings
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+        self.match_ids = match_ids
+        self.rating_before = rating_before
+        self.rating_after = rating_after
+
+    def users(self):
+        """逐一返回 (user_id, rating, wins, losses, draws)"""
+        return zip(self.user_ids.tolist(), self.ratings.tolist(), self.wins.tolist(),
+                   self.losses.tolist(), self.draws.tolist())
+
+
+def assign_waves(side_a, side_b, n_users):
+    """將比賽分配到波次：同一波次內每位用戶最多出現一次
+
+    用戶的比賽依時間順序落在遞增的波次，因此逐波次向量化計算與
+    逐場計算的結果相同；波次數約等於單一用戶的最多比賽場數。
+    """
+    last_wave = [-1] * n_users
+    waves = np.empty(len(side_a), dtype=np.int64)
+    for i, (a, b) in enumerate(zip(side_a.tolist(), side_b.tolist())):
+        wave = max(last_wave[a], last_wave[b]) + 1
+        last_wave[a] = last_wave[b] = wave
+        waves[i] = wave
+    return waves
+
+
+def replay_matches(side_a, side_b, score_a, n_users, k_factor, initial_rating):
+    """依時間順序重播比賽，返回 (最終評分, A 方賽前/賽後評分, B 方賽前/賽後評分)
+
+    side_a / side_b 為雙方的用戶索引，score_a 為 A 方得分（1、0.5、0）；
+    每場比賽後評分四捨五入為整數，與 calculate_elo 相同。
+    """
+    ratings = np.full(n_users, float(initial_rating))
+    before_a = np.empty(len(side_a))
+    before_b = np.empty(len(side_a))
+    after_a = np.empty(len(side_a))
+    after_b = np.empty(len(side_a))
+
+    waves = assign_waves(side_a, side_b, n_users)
+    order = np.argsort(waves, kind='stable')
+    bounds = np.searchsorted(waves[order], np.arange(waves.max() + 2 if len(waves) else 1))
+
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        idx = order[start:end]
+        a, b, s = side_a[idx], side_b[idx], score_a[idx]
+        rating_a, rating_b = ratings[a], ratings[b]
+
+        expected_a = 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+        expected_b = 1 / (1 + 10 ** ((rating_a - rating_b) / 400))
+        new_a = np.rint(rating_a + k_factor * (s - expected_a))
+        new_b = np.rint(rating_b + k_factor * ((1 - s) - expected_b))
+
+        before_a[idx], before_b[idx] = rating_a, rating_b
+        after_a[idx], after_b[idx] = new_a, new_b
+        ratings[a], ratings[b] = new_a, new_b
+
+    return ratings, (before_a, after_a), (before_b, after_b)
+
+
+def load_match_pairs():
+    """讀取 MatchHistory 並依辯論配對，按比賽時間排序
+
+    返回 [(debate_id, (match_id, user_id, result), (match_id, user_id, result)), ...]
+    """
+    debates = {}
+    for row in db.stream_query(
+        "SELECT match_id, debate_id, user_id, result, created_at FROM MatchHistory"
+    ):
+        entry = debates.setdefault(row['debate_id'], [row['created_at'], []])
+        entry[0] = min(entry[0], row['created_at'])
+        entry[1].append((row['match_id'], row['user_id'], row['result']))
+
+    pairs = []
+    for debate_id, (played_at, sides) in sorted(debates.items(), key=lambda item: (item[1][0], item[0])):
+        if len(sides) != 2 or sides[0][1] == sides[1][1]:
+            print(f"Skipping debate {debate_id}: expected two players in MatchHistory, found {sides}")
+            continue
+        pairs.append((debate_id, sides[0], sides[1]))
+    return pairs
+
+
+def rebuild_ratings(k_factor=None, initial_rating=None, pairs=None):
+    """以指定的 K 值與初始評分重新計算所有用戶的評分與戰績"""
+    k_factor = Config.ELO_K_FACTOR if k_factor is None else k_factor
+    initial_rating = Config.INITIAL_RATING if initial_rating is None else initial_rating
+    pairs = load_match_pairs() if pairs is None else pairs
+
+    user_ids = np.array(
+        [row['user_id'] for row in db.stream_query("SELECT user_id FROM Users ORDER BY user_id")],
+        dtype=np.int64
+    )
+    index = {user_id: i for i, user_id in enumerate(user_ids.tolist())}
+
+    side_a = np.array([index[a[1]] for _, a, _ in pairs], dtype=np.int64)
+    side_b = np.array([index[b[1]] for _, _, b in pairs], dtype=np.int64)
+    score_a = np.array([get_score_from_result(a[2]) for _, a, _ in pairs])
+
+    ratings, (before_a, after_a), (before_b, after_b) = replay_matches(
+        side_a, side_b, score_a, len(user_ids), k_factor, initial_rating
+    )
+
+    n_users = len(user_ids)
+    wins = np.bincount(side_a[score_a == 1], minlength=n_users) + np.bincount(side_b[score_a == 0], minlength=n_users)
+    losses = np.bincount(side_a[score_a == 0], minlength=n_users) + np.bincount(side_b[score_a == 1], minlength=n_users)
+    draws = np.bincount(side_a[score_a == 0.5], minlength=n_users) + np.bincount(side_b[score_a == 0.5], minlength=n_users)
+
+    match_ids = np.array([a[0] for _, a, _ in pairs] + [b[0] for _, _, b in pairs], dtype=np.int64)
+    return ReplayResult(
+        user_ids,
+        ratings.astype(np.int64),
+        wins, losses, draws,
+        match_ids,
+        np.concatenate([before_a, before_b]).astype(np.int64),
+        np.concatenate([after_a, after_b]).astype(np.int64)
+    )
+
+
+def rating_diff(result):
+    """比較重播結果與 Users 現值，返回有差異的 (user_id, 現值, 重播值) 列表"""
+    current = {
+        row['user_id']: (row['rating'], row['wins'], row['losses'], row['draws'])
+        for row in db.stream_query("SELECT user_id, rating, wins, losses, draws FROM Users")
+    }
+    diff = []
+    for user_id, rating, wins, losses, draws in result.users():
+        replayed = (rating, wins, losses, draws)
+        if current.get(user_id) != replayed:
+            diff.append((user_id, current.get(user_id), replayed))
+    return diff
+
+
+def apply_ratings(result, diff=None, rewrite_history=False):
+    """在單一交易中批量寫回評分與戰績；rewrite_history 時同時改寫 MatchHistory 的賽前/賽後評分"""
+    diff = rating_diff(result) if diff is None else diff
+    with db.transaction() as tx:
+        tx.execute_many(
+            "UPDATE Users SET rating = ?, wins = ?, losses = ?, draws = ? WHERE user_id = ?",
+            [(rating, wins, losses, draws, user_id) for user_id, _, (rating, wins, losses, draws) in diff]
+        )
+        if rewrite_history:
+            tx.execute_many(
+                "UPDATE MatchHistory SET rating_before = ?, rating_after = ? WHERE match_id = ?",
+                list(zip(result.rating_before.tolist(), result.rating_after.tolist(), result.match_ids.tolist()))
+            )
+    return len(diff)
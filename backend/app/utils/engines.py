@@ -0,0 +1,256 @@
+import re
+import sqlite3
+import datetime
+from functools import lru_cache
+from config import Config
+
+
+_INSERT_VALUES_RE = re.compile(r'\)\s*(VALUES|SELECT)\b', re.IGNORECASE)
+_UPDATE_RE = re.compile(r'^\s*UPDATE\b', re.IGNORECASE)
+_WHERE_RE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def with_output(query, columns):
+    """為 INSERT / UPDATE 語句加上 OUTPUT INSERTED.<欄位>，使寫入後的值隨同一語句返回
+
+    注意：OUTPUT 子句不可用於有啟用觸發器的資料表。
+    """
+    if re.search(r'\bOUTPUT\b', query, re.IGNORECASE):
+        return query
+    output = ', '.join(f'INSERTED.{column}' for column in columns)
+    if _UPDATE_RE.match(query):
+        # UPDATE ... SET ... OUTPUT ... WHERE ...（第一個 WHERE 即外層條件）
+        rewritten, count = _WHERE_RE.subn(f'OUTPUT {output} WHERE', query, count=1)
+        if not count:
+            raise ValueError("Unsupported UPDATE statement, expected a WHERE clause")
+        return rewritten
+    rewritten, count = _INSERT_VALUES_RE.subn(lambda match: f') OUTPUT {output} {match.group(1)}', query, count=1)
+    if not count:
+        raise ValueError("Unsupported INSERT statement, expected a column list before VALUES/SELECT")
+    return rewritten
+
+
+def with_output_identity(query):
+    """為 INSERT 語句加上 OUTPUT INSERTED.$IDENTITY，使新 ID 隨同一語句返回"""
+    return with_output(query, ('$IDENTITY',))
+
+
+class SqlServerEngine:
+    """SQL Server（pyodbc）引擎"""
+    name = 'sqlserver'
+    thread_local = False  # 使用共享連接池
+
+    SAVEPOINT_SQL = "IF @@TRANCOUNT = 0 BEGIN TRANSACTION; SAVE TRANSACTION {name}"
+    ROLLBACK_TO_SAVEPOINT_SQL = "ROLLBACK TRANSACTION {name}"
+    RELEASE_SAVEPOINT_SQL = None  # SQL Server 不需要釋放儲存點
+    MAX_PARAMS = 2000  # 單一語句參數上限為 2100
+
+    def __init__(self, connection_string):
+        import pyodbc
+        self.driver = pyodbc
+        self.connection_string = connection_string
+        self.IntegrityError = pyodbc.IntegrityError
+
+    def connect(self, connection_string=None):
+        return self.driver.connect(connection_string or self.connection_string)
+
+    def translate(self, query):
+        """T-SQL 原樣執行"""
+        return query
+
+    def prepare_insert(self, query):
+        return with_output_identity(query)
+
+    def returning(self, query, columns):
+        """讓 INSERT / UPDATE 語句返回寫入行的指定欄位"""
+        return with_output(query, tuple(columns))
+
+    def json_array(self, columns, from_clause):
+        """純量子查詢：將 from_clause 查得的多行聚合為 JSON 數組字串（無資料時為 NULL）
+
+        columns 為欄位或 "運算式 AS 別名"，JSON 物件以欄位名稱／別名為鍵。
+        """
+        return f"(SELECT {', '.join(columns)} {from_clause} FOR JSON PATH, INCLUDE_NULL_VALUES)"
+
+    def fetch_insert_id(self, cursor):
+        result = cursor.fetchone()
+        return result[0] if result else None
+
+    def prepare_executemany(self, cursor):
+        cursor.fast_executemany = True
+
+    def insert_returning_sql(self, table, columns, returning, row_count):
+        """多行 INSERT，並以 OUTPUT 返回指定欄位"""
+        values = ', '.join(['(' + ', '.join('?' for _ in columns) + ')'] * row_count)
+        output = ', '.join(f'INSERTED.{column}' for column in returning)
+        return f"INSERT INTO {table} ({', '.join(columns)}) OUTPUT {output} VALUES {values}"
+
+    def begin(self, conn):
+        """pyodbc 關閉 autocommit 時會自動開啟交易"""
+
+    def is_disconnect(self, error):
+        return isinstance(error, (self.driver.OperationalError, self.driver.InterfaceError))
+
+    def run_script(self, conn, script):
+        """逐條執行 SQL 腳本"""
+        cursor = conn.cursor()
+        try:
+            for statement in _split_script(script):
+                cursor.execute(statement)
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+# T-SQL → SQLite 的語法轉換規則（依序套用）
+_SQLITE_DDL_RULES = [
+    (re.compile(r'\bINT\s+PRIMARY\s+KEY\s+IDENTITY\s*\(\s*1\s*,\s*1\s*\)', re.IGNORECASE),
+     'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r'\bNVARCHAR\s*\(\s*MAX\s*\)', re.IGNORECASE), 'TEXT'),
+    (re.compile(r'\bDEFAULT\s+GETDATE\(\)', re.IGNORECASE), "DEFAULT (datetime('now', 'localtime'))"),
+    # DROP INDEX name ON table → DROP INDEX name（SQLite 索引名稱全庫唯一）
+    (re.compile(r'\bDROP\s+INDEX\s+(\w+)\s+ON\s+\w+', re.IGNORECASE), r'DROP INDEX \1'),
+]
+
+_SQLITE_QUERY_RULES = [
+    (re.compile(r'\bGETDATE\(\)', re.IGNORECASE), "datetime('now', 'localtime')"),
+    (re.compile(r'\bSCOPE_IDENTITY\(\)|@@IDENTITY', re.IGNORECASE), 'last_insert_rowid()'),
+    (re.compile(r'\bISNULL\(', re.IGNORECASE), 'IFNULL('),
+    (re.compile(r'\bLEN\(', re.IGNORECASE), 'LENGTH('),
+    (re.compile(r'\bSUBSTRING\(', re.IGNORECASE), 'SUBSTR('),
+    # SQLite 的日期時間為文字，參數不需轉型
+    (re.compile(r'\bCAST\(\s*\?\s+AS\s+DATETIME\s*\)', re.IGNORECASE), '?'),
+    (re.compile(r'\bWITH\s*\(\s*(?:UPDLOCK|ROWLOCK|HOLDLOCK|NOLOCK|READPAST)(?:\s*,\s*\w+)*\s*\)', re.IGNORECASE), ''),
+    # OFFSET m ROWS FETCH NEXT n ROWS ONLY → LIMIT m, n（保持參數順序）
+    (re.compile(r'\bOFFSET\s+(\?|\d+)\s+ROWS\s+FETCH\s+(?:NEXT|FIRST)\s+(\?|\d+)\s+ROWS\s+ONLY', re.IGNORECASE),
+     r'LIMIT \1, \2'),
+]
+
+
+@lru_cache(maxsize=512)
+def translate_tsql_to_sqlite(query):
+    """將 T-SQL 語句轉換為 SQLite 方言"""
+    for pattern, replacement in _SQLITE_DDL_RULES + _SQLITE_QUERY_RULES:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+def _split_script(script):
+    """將 SQL 腳本按分號切分為語句（略過空白與純註解）"""
+    statements = []
+    for chunk in script.split(';'):
+        lines = [line for line in chunk.splitlines() if not line.strip().startswith('--')]
+        statement = '\n'.join(lines).strip()
+        if statement:
+            statements.append(statement)
+    return statements
+
+
+def _convert_datetime(value):
+    return datetime.datetime.fromisoformat(value.decode())
+
+
+def _convert_bit(value):
+    return value not in (b'0', b'')
+
+
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DATETIME', _convert_datetime)
+sqlite3.register_converter('BIT', _convert_bit)
+
+
+class SqliteEngine:
+    """嵌入式 SQLite 引擎（WAL 模式，每個執行緒一個連接）"""
+    name = 'sqlite'
+    thread_local = True
+
+    SAVEPOINT_SQL = "SAVEPOINT {name}"
+    ROLLBACK_TO_SAVEPOINT_SQL = "ROLLBACK TO SAVEPOINT {name}"
+    RELEASE_SAVEPOINT_SQL = "RELEASE SAVEPOINT {name}"
+    MAX_PARAMS = 32766
+
+    IntegrityError = sqlite3.IntegrityError
+
+    def __init__(self, path, shared_cache=False, busy_timeout=5000):
+        self.path = path
+        # 記憶體資料庫必須使用共享快取，否則每個執行緒會各自擁有獨立的資料庫
+        self.memory = path == ':memory:'
+        self.shared_cache = shared_cache or self.memory
+        self.busy_timeout = busy_timeout
+
+    def _uri(self):
+        if self.memory:
+            return 'file:debate_platform?mode=memory&cache=shared'
+        uri = f'file:{self.path}'
+        if self.shared_cache:
+            uri += '?cache=shared'
+        return uri
+
+    def connect(self):
+        conn = sqlite3.connect(
+            self._uri(),
+            uri=True,
+            timeout=self.busy_timeout / 1000,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        if not self.memory:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        return conn
+
+    def translate(self, query):
+        return translate_tsql_to_sqlite(query)
+
+    def prepare_insert(self, query):
+        return translate_tsql_to_sqlite(query)
+
+    def returning(self, query, columns):
+        """讓 INSERT / UPDATE 語句返回寫入行的指定欄位（SQLite 3.35+）"""
+        return f"{query.rstrip().rstrip(';')} RETURNING {', '.join(columns)}"
+
+    def json_array(self, columns, from_clause):
+        """純量子查詢：將 from_clause 查得的多行聚合為 JSON 數組字串（JSON1 擴充）"""
+        names = [column.rsplit(' AS ', 1)[-1] for column in columns]
+        pairs = ', '.join(f"'{name}', {name}" for name in names)
+        return f"(SELECT json_group_array(json_object({pairs})) FROM (SELECT {', '.join(columns)} {from_clause}))"
+
+    def fetch_insert_id(self, cursor):
+        return cursor.lastrowid
+
+    def prepare_executemany(self, cursor):
+        """SQLite 在行程內執行，executemany 已無網路往返"""
+
+    def insert_returning_sql(self, table, columns, returning, row_count):
+        """多行 INSERT，並以 RETURNING 返回指定欄位（SQLite 3.35+）"""
+        values = ', '.join(['(' + ', '.join('?' for _ in columns) + ')'] * row_count)
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} RETURNING {', '.join(returning)}"
+
+    def begin(self, conn):
+        # 立即取得寫鎖，避免 WAL 下讀交易升級為寫交易時發生 SQLITE_BUSY
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+    def is_disconnect(self, error):
+        return False
+
+    def run_script(self, conn, script):
+        conn.executescript(translate_tsql_to_sqlite(script))
+        conn.commit()
+
+
+def create_engine(name=None):
+    """依配置建立數據庫引擎"""
+    name = (name or Config.DB_ENGINE).lower()
+    if name == 'sqlite':
+        return SqliteEngine(
+            Config.SQLITE_PATH,
+            shared_cache=Config.SQLITE_SHARED_CACHE,
+            busy_timeout=Config.SQLITE_BUSY_TIMEOUT_MS
+        )
+    if name == 'sqlserver':
+        return SqlServerEngine(Config.DB_CONNECTION_STRING)
+    raise ValueError(f"Unsupported DB_ENGINE: {name}")
@@ -0,0 +1,139 @@
+import json
+import threading
+from collections import OrderedDict
+from config import Config
+
+
+class Subscription:
+    """單一 SSE 連線的事件佇列
+
+    佇列有上限：帶有 key 的事件（如投票計數）會取代尚未送出的同 key 事件；
+    消費過慢使佇列滿時清空佇列，改送一個 resync 事件請客戶端重新載入。
+    """
+
+    def __init__(self, debate_id, max_queue=100):
+        self.debate_id = debate_id
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._queue = OrderedDict()  # key -> 已格式化的事件
+        self._seq = 0
+        self.dropped = 0
+
+    def put(self, message, key=None):
+        with self._cond:
+            if key is None:
+                self._seq += 1
+                key = self._seq
+            elif key in self._queue:
+                del self._queue[key]
+            if len(self._queue) >= self.max_queue:
+                self.dropped += len(self._queue)
+                self._queue.clear()
+                key, message = 'resync', format_event('resync', {'debate_id': self.debate_id})
+            self._queue[key] = message
+            self._cond.notify()
+
+    def get(self, timeout):
+        """取出所有待送事件；逾時返回空列表"""
+        with self._cond:
+            if not self._queue:
+                self._cond.wait(timeout)
+            messages = list(self._queue.values())
+            self._queue.clear()
+            return messages
+
+
+def format_event(event, data, event_id=None):
+    """格式化為 SSE 訊息"""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventBus:
+    """行程內的辯論事件發佈／訂閱
+
+    每個事件只序列化一次，再放入各訂閱者的佇列；每個工作行程最多
+    max_subscribers 個連線。事件只送達同一行程的訂閱者。
+    每個連線在開啟期間佔用一個工作執行緒，部署時需使用多執行緒 worker（見 gunicorn.conf.py）。
+    """
+
+    def __init__(self, max_subscribers=1000, max_queue=100):
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._channels = {}  # debate_id -> set(Subscription)
+        self._count = 0
+        self._event_id = 0
+        self.published = 0
+        self.rejected = 0
+
+    def subscribe(self, debate_id):
+        """建立訂閱；已達連線上限時返回 None"""
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            subscription = Subscription(debate_id, self.max_queue)
+            self._channels.setdefault(debate_id, set()).add(subscription)
+            self._count += 1
+            return subscription
+
+    def unsubscribe(self, subscription):
+        """取消訂閱（可重複呼叫）"""
+        with self._lock:
+            channel = self._channels.get(subscription.debate_id)
+            if channel is None or subscription not in channel:
+                return
+            channel.discard(subscription)
+            if not channel:
+                del self._channels[subscription.debate_id]
+            self._count -= 1
+
+    def has_subscribers(self, debate_id=None):
+        if debate_id is None:
+            return self._count > 0
+        return debate_id in self._channels
+
+    def publish(self, debate_id, event, data, key=None):
+        """發佈事件給辯論的所有訂閱者；key 相同的未送出事件會被取代"""
+        with self._lock:
+            channel = self._channels.get(debate_id)
+            if not channel:
+                return 0
+            subscribers = list(channel)
+            self._event_id += 1
+            event_id = self._event_id
+            self.published += 1
+
+        message = format_event(event, data, event_id)
+        for subscription in subscribers:
+            subscription.put(message, key)
+        return len(subscribers)
+
+    def stream(self, subscription, heartbeat=15):
+        """產生 SSE 串流；無事件時每 heartbeat 秒送出註解保持連線"""
+        try:
+            yield 'retry: 3000\n\n'
+            yield format_event('ready', {'debate_id': subscription.debate_id})
+            while True:
+                messages = subscription.get(heartbeat)
+                yield ''.join(messages) if messages else ': heartbeat\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': self._count,
+                'max_subscribers': self.max_subscribers,
+                'debates': len(self._channels),
+                'published': self.published,
+                'rejected': self.rejected,
+            }
+
+
+# 全局事件匯流排實例
+event_bus = EventBus(max_subscribers=Config.EVENTS_MAX_SUBSCRIBERS, max_queue=Config.EVENTS_QUEUE_SIZE)
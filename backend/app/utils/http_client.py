@@ -0,0 +1,48 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+
+
+class TimeoutSession(requests.Session):
+    """為每個請求套用預設 (connect, read) 逾時的 Session"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(connect_timeout, read_timeout, retries, pool_size):
+    """建立共用的 keep-alive HTTP Session
+
+    連線錯誤對所有方法重試；讀取逾時與 502/503/504 只對 GET 重試，
+    避免重送一次性的授權碼交換（POST）。
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = TimeoutSession((connect_timeout, read_timeout))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# LINE API 共用 Session（跨請求重用 TLS 連線）
+line_session = create_session(
+    Config.LINE_HTTP_CONNECT_TIMEOUT,
+    Config.LINE_HTTP_READ_TIMEOUT,
+    Config.LINE_HTTP_RETRIES,
+    Config.LINE_HTTP_POOL_SIZE
+)
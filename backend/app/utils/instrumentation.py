@@ -0,0 +1,137 @@
+import threading
+from flask import g, request, has_request_context, current_app
+from config import Config
+
+
+class RequestQueryStats:
+    """單一請求的查詢統計"""
+    __slots__ = ('count', 'total_time', 'rows', 'slowest_query', 'slowest_time',
+                 'statement_counts')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.rows = 0
+        self.slowest_query = None
+        self.slowest_time = 0.0
+        self.statement_counts = {}
+
+    def add(self, query, elapsed, rows):
+        self.count += 1
+        self.total_time += elapsed
+        self.rows += rows
+        if elapsed >= self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_query = query
+        self.statement_counts[query] = self.statement_counts.get(query, 0) + 1
+        return self.statement_counts[query]
+
+
+class QueryInstrumentation:
+    """記錄每個 Flask 請求的查詢次數、耗時與讀取行數，並彙總為端點報表"""
+
+    def __init__(self):
+        self.enabled = Config.DB_INSTRUMENTATION
+        self.repeat_threshold = Config.DB_REPEAT_QUERY_THRESHOLD
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._warned = set()  # 已警告的 (端點, 語句)，每個行程只警告一次
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        if self.enabled:
+            g._query_stats = RequestQueryStats()
+
+    def _after_request(self, response):
+        stats = g.pop('_query_stats', None)
+        if stats is None:
+            return response
+
+        # 串流回應在 after_request 之後才執行的查詢不計入
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries, {stats.rows} rows"'
+        )
+        if stats.count:
+            response.headers.add('Server-Timing', f'db-slowest;dur={stats.slowest_time * 1000:.2f}')
+
+        self._aggregate(request.endpoint or request.path, stats)
+        return response
+
+    def record(self, query, elapsed, rows=0):
+        """記錄一次語句執行（僅在請求上下文中統計）"""
+        if not self.enabled or not has_request_context():
+            return
+        stats = g.get('_query_stats')
+        if stats is None:
+            return
+
+        count = stats.add(query, elapsed, rows)
+        if self.repeat_threshold and count == self.repeat_threshold + 1:
+            self._warn_repeated(query)
+
+    def _warn_repeated(self, query):
+        """以應用程式日誌警告重複語句（可能為 N+1），同一端點的同一語句只警告一次"""
+        key = (request.endpoint or request.path, query)
+        with self._lock:
+            if key in self._warned:
+                return
+            self._warned.add(key)
+        current_app.logger.warning(
+            "Repeated query warning: %s %s ran the same statement more than %d times (possible N+1): %s",
+            request.method, request.path, self.repeat_threshold, ' '.join(query.split())
+        )
+
+    def _aggregate(self, endpoint, stats):
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = {
+                    'requests': 0,
+                    'queries': 0,
+                    'db_time': 0.0,
+                    'db_time_max': 0.0,
+                    'rows': 0,
+                    'max_queries': 0,
+                    'slowest_query': None,
+                    'slowest_time': 0.0,
+                }
+            entry['requests'] += 1
+            entry['queries'] += stats.count
+            entry['db_time'] += stats.total_time
+            entry['rows'] += stats.rows
+            entry['db_time_max'] = max(entry['db_time_max'], stats.total_time)
+            entry['max_queries'] = max(entry['max_queries'], stats.count)
+            if stats.slowest_query and stats.slowest_time >= entry['slowest_time']:
+                entry['slowest_time'] = stats.slowest_time
+                entry['slowest_query'] = ' '.join(stats.slowest_query.split())
+
+    def report(self):
+        """返回各端點的彙總統計"""
+        with self._lock:
+            report = {}
+            for endpoint, entry in self._endpoints.items():
+                requests = entry['requests']
+                report[endpoint] = {
+                    'requests': requests,
+                    'queries_avg': round(entry['queries'] / requests, 2),
+                    'queries_max': entry['max_queries'],
+                    'db_time_avg_ms': round(entry['db_time'] / requests * 1000, 3),
+                    'db_time_max_ms': round(entry['db_time_max'] * 1000, 3),
+                    'rows_avg': round(entry['rows'] / requests, 2),
+                    'slowest_query': entry['slowest_query'],
+                    'slowest_query_ms': round(entry['slowest_time'] * 1000, 3),
+                }
+            return report
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._warned.clear()
+
+
+# 全局查詢統計實例
+query_stats = QueryInstrumentation()
@@ -0,0 +1,286 @@
+import random
+import threading
+import time
+from config import Config
+from app.utils.database import db
+
+
+class _Node:
+    __slots__ = ('key', 'priority', 'left', 'right', 'size')
+
+    def __init__(self, key):
+        self.key = key
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.size = 1
+
+
+def _size(node):
+    return node.size if node is not None else 0
+
+
+def _update(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return node
+
+
+def _split(node, key):
+    """切分為 (< key, >= key) 兩棵樹"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        return _update(node), right
+    left, right = _split(node.left, key)
+    node.left = right
+    return left, _update(node)
+
+
+def _merge(left, right):
+    """合併兩棵樹（left 的所有鍵小於 right）"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+class OrderStatisticTree:
+    """以子樹大小增強的 treap：插入、刪除、排名與第 k 名查詢皆為 O(log n)"""
+
+    def __init__(self):
+        self.root = None
+
+    def __len__(self):
+        return _size(self.root)
+
+    def insert(self, key):
+        left, right = _split(self.root, key)
+        self.root = _merge(_merge(left, _Node(key)), right)
+
+    def remove(self, key):
+        node, parent = self.root, None
+        path = []
+        while node is not None and node.key != key:
+            path.append(node)
+            parent = node
+            node = node.left if key < node.key else node.right
+        if node is None:
+            return False
+        replacement = _merge(node.left, node.right)
+        if parent is None:
+            self.root = replacement
+        elif parent.left is node:
+            parent.left = replacement
+        else:
+            parent.right = replacement
+        for ancestor in path:
+            ancestor.size -= 1
+        return True
+
+    def rank(self, key):
+        """返回小於 key 的鍵數量（即 key 的 0 起始名次）"""
+        node, count = self.root, 0
+        while node is not None:
+            if node.key < key:
+                count += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    def select(self, index):
+        """返回第 index 個（0 起始）鍵"""
+        node = self.root
+        while node is not None:
+            left_size = _size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key
+            else:
+                index -= left_size + 1
+                node = node.right
+        raise IndexError(index)
+
+    def iter_from(self, index):
+        """由第 index 個鍵開始依序迭代"""
+        stack, node = [], self.root
+        # 沿路徑下降到第 index 個鍵，記錄之後仍需走訪的祖先
+        while node is not None:
+            left_size = _size(node.left)
+            if index < left_size:
+                stack.append(node)
+                node = node.left
+            elif index == left_size:
+                stack.append(node)
+                break
+            else:
+                index -= left_size + 1
+                node = node.right
+        while stack:
+            node = stack.pop()
+            yield node.key
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
+
+class Leaderboard:
+    """記憶體排行榜，排序為 rating DESC、wins DESC、user_id ASC
+
+    服務啟動時（start()）由數據庫載入，之後由評分更新增量維護；多個行程各自
+    持有一份，每 reload_interval 秒在背景重新載入以同步其他行程的變更。
+    重新載入在鎖外建立新樹後替換，讀取與評分更新不需等待數據庫查詢；
+    載入期間的評分更新會重播到新樹。
+    """
+
+    FIELDS = ('user_id', 'nickname', 'avatar', 'rating', 'wins', 'losses', 'draws')
+
+    def __init__(self, reload_interval=300):
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()  # 同一時間只有一次載入
+        self._tree = OrderStatisticTree()
+        self._users = {}  # user_id -> 排行榜資料
+        self._pending = None  # 載入期間的評分更新：user_id -> 排行榜資料
+        self._reloading = False
+        self._loaded_at = None
+
+    def __len__(self):
+        return len(self._tree)
+
+    @staticmethod
+    def _key(user):
+        return (-user['rating'], -user['wins'], user['user_id'])
+
+    def start(self):
+        """在背景載入排行榜（服務啟動時呼叫；載入完成前的讀取會等待這次載入）"""
+        self._reload_in_background()
+
+    def load(self):
+        """由數據庫重建排行榜"""
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        with self._lock:
+            self._pending = {}
+        try:
+            users = db.execute_query(
+                """
+                SELECT user_id, nickname, avatar, rating, wins, losses, draws
+                FROM Users
+                WHERE (wins + losses + draws) > 0
+                """,
+                fetch_all=True
+            )
+            tree, entries = OrderStatisticTree(), {}
+            for user in users:
+                self._apply(tree, entries, {field: user[field] for field in self.FIELDS})
+            with self._lock:
+                # 查詢後才提交的評分更新不在查詢結果中，重播到新樹
+                for entry in self._pending.values():
+                    self._apply(tree, entries, entry)
+                self._tree, self._users = tree, entries
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None:
+            # 尚未載入：等待進行中的載入，或自行載入
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self._load()
+        elif self.reload_interval and time.monotonic() - loaded_at >= self.reload_interval:
+            # 定期重新載入在背景執行，期間繼續使用目前的排行榜
+            self._reload_in_background()
+
+    def _reload_in_background(self):
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        # 先取得載入鎖，讓同時到達的首次讀取等待這次載入；已有載入進行中時不重複載入
+        if not self._load_lock.acquire(blocking=False):
+            with self._lock:
+                self._reloading = False
+            return
+        threading.Thread(target=self._reload, name='leaderboard-reload', daemon=True).start()
+
+    def _reload(self):
+        try:
+            self._load()
+        except Exception as e:
+            print(f"Leaderboard reload error: {e}")
+        finally:
+            self._load_lock.release()
+            with self._lock:
+                self._reloading = False
+
+    def update(self, user):
+        """寫入用戶最新的評分與戰績（尚未載入且未在載入中時略過，載入時會讀到最新資料）"""
+        entry = {field: user[field] for field in self.FIELDS}
+        with self._lock:
+            if self._pending is not None:
+                self._pending[entry['user_id']] = entry
+            if self._loaded_at is not None:
+                self._apply(self._tree, self._users, entry)
+
+    def _apply(self, tree, users, entry):
+        old = users.get(entry['user_id'])
+        if old is not None:
+            tree.remove(self._key(old))
+        if entry['wins'] + entry['losses'] + entry['draws'] > 0:
+            users[entry['user_id']] = entry
+            tree.insert(self._key(entry))
+        else:
+            users.pop(entry['user_id'], None)
+
+    def _entry(self, key, rank):
+        entry = dict(self._users[key[2]])
+        games = entry['wins'] + entry['losses'] + entry['draws']
+        entry['win_rate'] = round(entry['wins'] / games * 100, 2) if games else 0
+        entry['rank'] = rank + 1
+        return entry
+
+    def page(self, offset, limit):
+        """返回 (總人數, 第 offset 名起的 limit 位用戶)"""
+        self._ensure_loaded()
+        with self._lock:
+            return len(self._tree), self._page(offset, limit)
+
+    def _page(self, offset, limit):
+        entries = []
+        if offset < len(self._tree):
+            for rank, key in enumerate(self._tree.iter_from(offset), offset):
+                if len(entries) >= limit:
+                    break
+                entries.append(self._entry(key, rank))
+        return entries
+
+    def around(self, user_id, radius):
+        """返回 (用戶排名資料, 前後各 radius 位用戶)；用戶未上榜時返回 (None, [])"""
+        self._ensure_loaded()
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return None, []
+            rank = self._tree.rank(self._key(user))
+            start = max(rank - radius, 0)
+            neighbours = self._page(start, rank - start + radius + 1)
+            return neighbours[rank - start], neighbours
+
+
+# 全局排行榜實例
+leaderboard = Leaderboard(reload_interval=Config.LEADERBOARD_RELOAD_SECONDS)
@@ -0,0 +1,321 @@
+import time
+import atexit
+import random
+import bisect
+import datetime
+import threading
+from config import Config
+from app.utils.database import db
+from app.utils.scheduler import LeaderLease
+
+
+class MatchmakingQueue:
+    """單一話題的配對佇列
+
+    以 (rating, user_id) 排序的索引查找評分最接近的對手（相鄰項目），
+    另以加入順序記錄等待時間，配對時優先處理等待最久的用戶。
+    """
+
+    def __init__(self):
+        self._index = []    # 依 (rating, user_id) 排序
+        self._entries = {}  # user_id -> (rating, joined_at)，保持加入順序
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, user_id):
+        return user_id in self._entries
+
+    def add(self, user_id, rating, joined_at):
+        self._entries[user_id] = (rating, joined_at)
+        bisect.insort(self._index, (rating, user_id))
+
+    def remove(self, user_id):
+        rating, joined_at = self._entries.pop(user_id)
+        position = bisect.bisect_left(self._index, (rating, user_id))
+        del self._index[position]
+        return rating, joined_at
+
+    def entry(self, user_id):
+        return self._entries.get(user_id)
+
+    def take(self, *user_ids):
+        """將用戶移出佇列，返回各自的 (user_id, rating, joined_at)"""
+        return [(user_id, *self.remove(user_id)) for user_id in user_ids]
+
+    def find_opponent(self, user_id, now, tolerance):
+        """返回評分差在容許範圍內且最接近的對手；tolerance 為等待秒數到容許差的函數
+
+        兩人中任一方的容許範圍涵蓋評分差即可配對，等待越久範圍越寬。
+        """
+        rating, joined_at = self._entries[user_id]
+        position = bisect.bisect_left(self._index, (rating, user_id))
+        own_tolerance = tolerance(now - joined_at)
+        best = None
+        for neighbour in (position - 1, position + 1):
+            if not 0 <= neighbour < len(self._index):
+                continue
+            other_rating, other_id = self._index[neighbour]
+            diff = abs(other_rating - rating)
+            other_tolerance = tolerance(now - self._entries[other_id][1])
+            if diff <= max(own_tolerance, other_tolerance) and (best is None or diff < best[1]):
+                best = (other_id, diff)
+        return best[0] if best else None
+
+    def pair_all(self, now, tolerance):
+        """依等待順序配對所有可配對的用戶並移出佇列，返回 [(entry_a, entry_b), ...]"""
+        pairs = []
+        for user_id in list(self._entries):
+            if user_id not in self._entries:
+                continue
+            opponent = self.find_opponent(user_id, now, tolerance)
+            if opponent is not None:
+                pairs.append(tuple(self.take(user_id, opponent)))
+        return pairs
+
+
+class Matchmaker:
+    """辯論配對：用戶加入話題佇列，依評分與等待時間自動配對並建立辯論
+
+    佇列保存在 MatchmakingQueue 表中，所有工作行程共用。配對由持有領導者租約的
+    行程每 pass_interval 秒執行一次：載入佇列後以 MatchmakingQueue 索引配對，
+    在同一交易中標記用戶、建立辯論並記錄配對結果。配對結果在用戶查詢狀態時
+    讀取並刪除，未讀取者 result_ttl 秒後清除。
+    """
+
+    def __init__(self, enabled=True, base_tolerance=50, widen_per_second=5, max_tolerance=400, pass_interval=1.0,
+                 lease_seconds=30, result_ttl=600):
+        self.enabled = enabled
+        self.base_tolerance = base_tolerance
+        self.widen_per_second = widen_per_second
+        self.max_tolerance = max_tolerance
+        self.pass_interval = pass_interval
+        self.result_ttl = result_ttl
+        self.lease = LeaderLease('matchmaking', ttl=lease_seconds)
+        self.renew_interval = lease_seconds / 3
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.is_leader = False
+        self.created = 0
+        self.errors = 0
+
+    def tolerance(self, waited):
+        """等待 waited 秒後可接受的評分差"""
+        return min(self.base_tolerance + self.widen_per_second * waited, self.max_tolerance)
+
+    def join(self, topic_id, user_id, rating):
+        """加入佇列（取代先前的佇列位置與未讀取的配對結果），返回用戶狀態"""
+        try:
+            with db.transaction() as tx:
+                tx.execute_query("DELETE FROM MatchmakingQueue WHERE user_id = ?", (user_id,))
+                tx.execute_insert(
+                    "INSERT INTO MatchmakingQueue (user_id, topic_id, rating, joined_at) VALUES (?, ?, ?, ?)",
+                    (user_id, topic_id, rating, datetime.datetime.now())
+                )
+        except db.engine.IntegrityError:
+            # 同一用戶的另一個請求同時加入
+            pass
+        return self.status(user_id)
+
+    def leave(self, user_id):
+        """離開佇列；已配對（或配對中）的用戶無法離開"""
+        return db.execute_query(
+            "DELETE FROM MatchmakingQueue WHERE user_id = ? AND matched_at IS NULL",
+            (user_id,)
+        ) > 0
+
+    def status(self, user_id):
+        """返回用戶的配對狀態；配對結果返回一次後即刪除"""
+        with db.transaction() as tx:
+            entry = tx.execute_query(
+                "SELECT topic_id, joined_at, debate_id FROM MatchmakingQueue WHERE user_id = ?",
+                (user_id,),
+                fetch_one=True
+            )
+            if not entry:
+                return {'status': 'idle'}
+            if entry['debate_id'] is not None:
+                tx.execute_query("DELETE FROM MatchmakingQueue WHERE user_id = ?", (user_id,))
+                return {'status': 'matched', 'debate_id': entry['debate_id']}
+            queue_size = tx.execute_query(
+                "SELECT COUNT(*) AS count FROM MatchmakingQueue WHERE topic_id = ? AND matched_at IS NULL",
+                (entry['topic_id'],),
+                fetch_one=True
+            )['count']
+
+        waited = max((datetime.datetime.now() - entry['joined_at']).total_seconds(), 0)
+        return {
+            'status': 'queued',
+            'topic_id': entry['topic_id'],
+            'queue_size': queue_size,
+            'waited_seconds': round(waited, 1),
+            'tolerance': round(self.tolerance(waited)),
+        }
+
+    def start(self):
+        """啟動背景配對執行緒（多個工作行程中只有取得租約者執行配對）"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='matchmaking', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        next_renew = 0
+        while True:
+            with self._cond:
+                if self._stopping:
+                    break
+
+            try:
+                if time.monotonic() >= next_renew:
+                    next_renew = time.monotonic() + self.renew_interval
+                    self.is_leader = self.lease.acquire()
+                if self.is_leader:
+                    self.run_pass()
+            except Exception as e:
+                self.errors += 1
+                print(f"Matchmaking error: {e}")
+
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(self.pass_interval)
+
+        if self.is_leader:
+            self.lease.release()
+
+    def run_pass(self, topic_id=None):
+        """配對指定話題（或全部話題）佇列中的用戶並建立辯論，返回建立的辯論"""
+        now = datetime.datetime.now()
+        # 清除逾時未讀取的配對結果
+        db.execute_query(
+            "DELETE FROM MatchmakingQueue WHERE debate_id IS NOT NULL AND matched_at < ?",
+            (now - datetime.timedelta(seconds=self.result_ttl),)
+        )
+
+        query = "SELECT user_id, topic_id, rating, joined_at FROM MatchmakingQueue WHERE matched_at IS NULL"
+        params = ()
+        if topic_id is not None:
+            query += " AND topic_id = ?"
+            params = (topic_id,)
+        queues = {}
+        for entry in db.execute_query(query + " ORDER BY joined_at, user_id", params, fetch_all=True):
+            queue = queues.setdefault(entry['topic_id'], MatchmakingQueue())
+            queue.add(entry['user_id'], entry['rating'], entry['joined_at'].timestamp())
+
+        matches = []
+        for tid, queue in queues.items():
+            for first, second in queue.pair_all(now.timestamp(), self.tolerance):
+                # 隨機分配正反方
+                pros, cons = (first, second) if random.random() < 0.5 else (second, first)
+                matches.append((tid, pros[0], cons[0]))
+        if not matches:
+            return []
+
+        debates = self._create(matches, now)
+        self.created += len(debates)
+        return debates
+
+    def _create(self, matches, now):
+        """在同一交易中標記用戶、建立辯論並記錄配對結果；失敗時整批回滾，用戶留在佇列中
+
+        載入佇列後離開的用戶不會被標記，其對手放回佇列等待下一次配對。
+        """
+        with db.transaction() as tx:
+            claimed = self._claim(tx, [user_id for _, pros, cons in matches for user_id in (pros, cons)], now)
+            matches = [match for match in matches if match[1] in claimed and match[2] in claimed]
+            released = claimed - {user_id for _, pros, cons in matches for user_id in (pros, cons)}
+            if released:
+                tx.execute_many(
+                    "UPDATE MatchmakingQueue SET matched_at = NULL WHERE user_id = ?",
+                    [(user_id,) for user_id in released]
+                )
+            if not matches:
+                return []
+
+            debates = create_debates(matches)
+            tx.execute_many(
+                "UPDATE MatchmakingQueue SET debate_id = ? WHERE user_id = ?",
+                [(debate['debate_id'], user_id)
+                 for debate in debates for user_id in (debate['pros_user_id'], debate['cons_user_id'])]
+            )
+        return debates
+
+    def _claim(self, tx, user_ids, now):
+        """將仍在佇列中的用戶標記為配對中，返回成功標記的用戶"""
+        claimed = set()
+        chunk_size = db.engine.MAX_PARAMS - 1
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            query = (
+                "UPDATE MatchmakingQueue SET matched_at = ? "
+                f"WHERE user_id IN ({', '.join('?' * len(chunk))}) AND matched_at IS NULL"
+            )
+            rows = tx.execute_query(db.engine.returning(query, ('user_id',)), (now, *chunk), fetch_all=True)
+            claimed.update(row['user_id'] for row in rows)
+        return claimed
+
+    def stats(self):
+        queues = db.execute_query(
+            """
+            SELECT topic_id, COUNT(*) AS count FROM MatchmakingQueue
+            WHERE matched_at IS NULL GROUP BY topic_id
+            """,
+            fetch_all=True
+        )
+        return {
+            'enabled': self.enabled,
+            'is_leader': self.is_leader,
+            'topics': len(queues),
+            'queued': sum(queue['count'] for queue in queues),
+            'queues': {queue['topic_id']: queue['count'] for queue in queues},
+            'created': self.created,
+            'errors': self.errors,
+        }
+
+
+def create_debates(matches):
+    """批量建立辯論及其第一回合
+
+    matches 為 [(topic_id, pros_user_id, cons_user_id), ...]，同一批次中每位
+    用戶最多出現一次；辯論以多行 INSERT 建立並返回 ID，回合以 bulk_insert 寫入。
+    """
+    with db.transaction() as tx:
+        inserted = tx.insert_returning(
+            'Debates',
+            ('topic_id', 'pros_user_id', 'cons_user_id', 'status', 'round_count'),
+            [(topic_id, pros, cons, 'ONGOING', 1) for topic_id, pros, cons in matches],
+            ('debate_id', 'pros_user_id')
+        )
+        debate_ids = {row['pros_user_id']: row['debate_id'] for row in inserted}
+
+        tx.bulk_insert(
+            'Rounds',
+            ('debate_id', 'round_number', 'status'),
+            [(debate_ids[pros], 1, 'WAIT_PROS_STATEMENT') for _, pros, _ in matches]
+        )
+
+    return [
+        {'debate_id': debate_ids[pros], 'topic_id': topic_id, 'pros_user_id': pros, 'cons_user_id': cons}
+        for topic_id, pros, cons in matches
+    ]
+
+
+# 全局配對實例
+matchmaker = Matchmaker(
+    enabled=Config.MATCHMAKING_ENABLED,
+    base_tolerance=Config.MATCHMAKING_BASE_TOLERANCE,
+    widen_per_second=Config.MATCHMAKING_WIDEN_PER_SECOND,
+    max_tolerance=Config.MATCHMAKING_MAX_TOLERANCE,
+    pass_interval=Config.MATCHMAKING_PASS_INTERVAL,
+    lease_seconds=Config.MATCHMAKING_LEASE_SECONDS,
+    result_ttl=Config.MATCHMAKING_RESULT_TTL
+)
@@ -0,0 +1,90 @@
+import json
+import base64
+import datetime
+from flask import request
+from config import Config
+
+
+def encode_cursor(created_at, row_id):
+    """將 (created_at, id) 編碼為不透明游標"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解碼游標；格式錯誤時拋出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+class KeysetPage:
+    """以 (created_at, id) 為鍵的游標分頁（新到舊）
+
+    查詢需在 WHERE 條件後接上 where、結尾接上 order_by，並附加 params：
+
+        WHERE t.status = ? {page.where}
+        {page.order_by}
+
+    每頁多讀一行以判斷是否有下一頁，配合 (..., created_at DESC, id DESC)
+    複合索引時每頁都是一次索引搜尋。
+
+    游標保存數據庫返回的 created_at 原值，比較時轉回欄位的 DATETIME 型別：
+    pyodbc 以 datetime2 傳送參數，直接與約 3 毫秒精度的 DATETIME 欄位比較時，
+    捨入後相同（如批量建立時共用 GETDATE()）的行會被略過或重複。
+    """
+
+    def __init__(self, created_column, id_column, cursor=None, limit=None):
+        self.created_column = created_column
+        self.id_column = id_column
+        self.created_field = created_column.split('.')[-1]
+        self.id_field = id_column.split('.')[-1]
+        self.limit = min(max(limit or Config.PAGE_DEFAULT_LIMIT, 1), Config.PAGE_MAX_LIMIT)
+        self.after = decode_cursor(cursor) if cursor else None
+        self.next_cursor = None
+
+    @classmethod
+    def from_request(cls, created_column, id_column):
+        """由 ?cursor=&limit= 參數建立分頁；游標無效時拋出 ValueError"""
+        return cls(
+            created_column,
+            id_column,
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', type=int)
+        )
+
+    @property
+    def where(self):
+        if self.after is None:
+            return ''
+        # 前導的 <= 條件讓 SQL Server 能以索引搜尋定位起點
+        return (f"AND {self.created_column} <= CAST(? AS DATETIME) "
+                f"AND ({self.created_column} < CAST(? AS DATETIME) OR {self.id_column} < ?)")
+
+    @property
+    def order_by(self):
+        return (f"ORDER BY {self.created_column} DESC, {self.id_column} DESC "
+                f"OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY")
+
+    @property
+    def params(self):
+        if self.after is None:
+            return (self.limit + 1,)
+        created_at, row_id = self.after
+        return (created_at, created_at, row_id, self.limit + 1)
+
+    def rows(self, items):
+        """輸出本頁的行，並在有下一頁時設定 next_cursor"""
+        last = None
+        for count, row in enumerate(items):
+            if count < self.limit:
+                last = row
+                yield row
+            elif last is not None:
+                self.next_cursor = encode_cursor(last[self.created_field], last[self.id_field])
+
+    def trailer(self):
+        return {'next_cursor': self.next_cursor}
@@ -0,0 +1,87 @@
+from functools import lru_cache
+from flask.json.provider import DefaultJSONProvider
+
+
+class Record:
+    """緊湊的查詢結果行
+
+    以原始行元組儲存欄位值，欄位索引由同一結果形狀的類別共用；
+    介面與 dict 相容（[]、get、keys、items、in），寫入的鍵另存於 _extra。
+    """
+    __slots__ = ('_values', '_extra')
+    _fields = ()
+    _index = {}
+
+    def __init__(self, values):
+        self._values = values
+        self._extra = None
+
+    def __getitem__(self, key):
+        extra = self._extra
+        if extra is not None and key in extra:
+            return extra[key]
+        return self._values[self._index[key]]
+
+    def __setitem__(self, key, value):
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __contains__(self, key):
+        return key in self._index or (self._extra is not None and key in self._extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        if not self._extra:
+            return list(self._fields)
+        return list(self._fields) + [key for key in self._extra if key not in self._index]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def _asdict(self):
+        result = dict(zip(self._fields, self._values))
+        if self._extra:
+            result.update(self._extra)
+        return result
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self._asdict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Record({self._asdict()!r})"
+
+
+@lru_cache(maxsize=512)
+def record_class(query, fields):
+    """依查詢語句與欄位組合建立（並快取）結果行類別"""
+    index = {name: i for i, name in enumerate(fields)}
+    return type('Record', (Record,), {'__slots__': (), '_fields': fields, '_index': index})
+
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """支援 Record 的 JSON 序列化，輸出與 dict 相同"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Record):
+            return o._asdict()
+        return DefaultJSONProvider.default(o)
@@ -0,0 +1,114 @@
+import json
+import datetime
+from config import Config
+from app.utils.database import db
+from app.utils.scheduler import deadline_scheduler
+from app.utils.events import event_bus
+from app.utils.versions import bump_round_version
+
+
+# apply_transition() 的結果
+APPLIED = 'applied'
+NOT_FOUND = 'not_found'
+INVALID_STATUS = 'invalid_status'
+FORBIDDEN = 'forbidden'
+
+
+class _StatusChanged(Exception):
+    """回合已不在轉移前的狀態（回滾交易用）"""
+
+
+class RoundTransition:
+    """回合狀態轉移：在 status 時由 side 方提交 field 欄位，寫入 column 並進入 next_status"""
+
+    def __init__(self, status, column, side, next_status, field, is_list=False):
+        self.status = status
+        self.column = column
+        self.side = side
+        self.next_status = next_status
+        self.field = field
+        self.is_list = is_list
+        self.sets_deadline = next_status == 'WAIT_VOTING'
+        # 提交方已在遞增辯論版本時檢查（並鎖定辯論行）；狀態條件在這條語句上比對（compare-and-swap）
+        self.query = f"""
+            UPDATE Rounds
+            SET {column} = ?, status = ?{', voting_deadline = ?' if self.sets_deadline else ''}, version = ?
+            WHERE round_id = ? AND status = ?
+        """
+
+    def content(self, data):
+        """從請求資料取出提交內容；格式不正確時返回 None"""
+        value = (data or {}).get(self.field)
+        if self.is_list:
+            if not value or not isinstance(value, list):
+                return None
+            return json.dumps(value, ensure_ascii=False)
+        return value or None
+
+
+# 回合狀態轉移表：目前狀態 -> 轉移
+ROUND_TRANSITIONS = {
+    transition.status: transition
+    for transition in (
+        RoundTransition('WAIT_PROS_STATEMENT', 'pros_statement', 'pros', 'WAIT_CONS_QUESTIONS', 'statement'),
+        RoundTransition('WAIT_CONS_QUESTIONS', 'cons_questions', 'cons', 'WAIT_PROS_REPLY', 'questions', is_list=True),
+        RoundTransition('WAIT_PROS_REPLY', 'pros_reply', 'pros', 'WAIT_CONS_STATEMENT', 'reply'),
+        RoundTransition('WAIT_CONS_STATEMENT', 'cons_statement', 'cons', 'WAIT_PROS_QUESTIONS', 'statement'),
+        RoundTransition('WAIT_PROS_QUESTIONS', 'pros_questions', 'pros', 'WAIT_CONS_REPLY', 'questions', is_list=True),
+        RoundTransition('WAIT_CONS_REPLY', 'cons_reply', 'cons', 'WAIT_VOTING', 'reply'),
+    )
+}
+
+
+def apply_transition(round_id, transition, user_id, content):
+    """以條件式 UPDATE 寫入內容並推進回合狀態，返回 APPLIED / NOT_FOUND / INVALID_STATUS / FORBIDDEN
+
+    同一交易中的兩條語句：先以提交方為條件遞增辯論版本（並鎖定辯論行，一律先鎖辯論、再鎖回合），
+    再以回合狀態為條件寫入內容並推進狀態（compare-and-swap）。狀態不符時回滾整個交易，
+    同時重複提交時只有一個請求會成功，其餘返回 INVALID_STATUS。
+    """
+    deadline = None
+    try:
+        with db.transaction() as tx:
+            bumped = bump_round_version(tx, round_id, user_column=f'{transition.side}_user_id', user_id=user_id)
+            if bumped:
+                debate_id, version = bumped
+                params = [content, transition.next_status]
+                if transition.sets_deadline:
+                    # 設置投票截止時間
+                    deadline = datetime.datetime.now() + datetime.timedelta(hours=Config.DEFAULT_VOTING_HOURS)
+                    params.append(deadline)
+                params += [version, round_id, transition.status]
+                if not tx.execute_query(transition.query, params):
+                    raise _StatusChanged(f"Round {round_id} is no longer {transition.status}")
+    except _StatusChanged:
+        # 提交方與回合已在遞增版本時確認，只是狀態已被其他請求推進
+        return INVALID_STATUS
+
+    if bumped:
+        if deadline is not None:
+            deadline_scheduler.schedule(round_id, deadline)
+        event_bus.publish(debate_id, 'round', {
+            'round_id': round_id,
+            'status': transition.next_status,
+            'field': transition.column,
+            'version': version,
+        })
+        return APPLIED
+
+    # 未更新：查明原因以返回對應的錯誤
+    round_data = db.execute_query(
+        """
+        SELECT r.status, d.pros_user_id, d.cons_user_id
+        FROM Rounds r
+        JOIN Debates d ON d.debate_id = r.debate_id
+        WHERE r.round_id = ?
+        """,
+        (round_id,),
+        fetch_one=True
+    )
+    if not round_data:
+        return NOT_FOUND
+    if round_data['status'] != transition.status:
+        return INVALID_STATUS
+    return FORBIDDEN
@@ -0,0 +1,57 @@
+import json
+import datetime
+from config import Config
+
+
+# 回合的提交內容欄位（摘要模式不返回全文）
+CONTENT_FIELDS = ('pros_statement', 'cons_questions', 'pros_reply',
+                  'cons_statement', 'pros_questions', 'cons_reply')
+# JSON 數組欄位
+LIST_FIELDS = ('cons_questions', 'pros_questions')
+
+# 摘要模式返回的回合欄位
+SUMMARY_COLUMNS = ('round_id', 'debate_id', 'round_number', 'status', 'winner_side',
+                   'pros_votes', 'cons_votes', 'pros_vote_count', 'cons_vote_count',
+                   'version', 'voting_deadline', 'created_at', 'updated_at')
+# 完整模式返回的回合欄位
+ROUND_COLUMNS = SUMMARY_COLUMNS + CONTENT_FIELDS
+# 回合中的日期時間欄位（經 JSON 聚合取得時為字串）
+DATETIME_FIELDS = ('voting_deadline', 'created_at', 'updated_at')
+
+
+def summary_columns(excerpt_chars=None):
+    """回合摘要的欄位：中繼資料、各內容欄位的長度（未提交為 NULL）與文字欄位的開頭摘錄"""
+    if excerpt_chars is None:
+        excerpt_chars = Config.ROUND_EXCERPT_CHARS
+    columns = list(SUMMARY_COLUMNS)
+    for field in CONTENT_FIELDS:
+        columns.append(f'LEN({field}) AS {field}_length')
+        if field not in LIST_FIELDS and excerpt_chars > 0:
+            columns.append(f'SUBSTRING({field}, 1, {int(excerpt_chars)}) AS {field}_excerpt')
+    return columns
+
+
+def summary_select(excerpt_chars=None):
+    """回合摘要的 SELECT 欄位列表"""
+    return ', '.join(summary_columns(excerpt_chars))
+
+
+def load_rounds_json(value):
+    """解析 JSON 聚合的回合數組，日期時間欄位還原為 datetime（與逐行查詢的序列化結果一致）"""
+    rounds = json.loads(value) if value else []
+    for round_data in rounds:
+        for field in DATETIME_FIELDS:
+            if round_data.get(field):
+                round_data[field] = datetime.datetime.fromisoformat(round_data[field])
+    return rounds
+
+
+def parse_round(round_data):
+    """解析回合中的 JSON 數組欄位"""
+    for field in LIST_FIELDS:
+        if round_data.get(field):
+            try:
+                round_data[field] = json.loads(round_data[field])
+            except:
+                round_data[field] = []
+    return round_data
@@ -0,0 +1,256 @@
+import os
+import time
+import uuid
+import heapq
+import atexit
+import socket
+import datetime
+import threading
+from config import Config
+from app.utils.database import db
+
+
+class LeaderLease:
+    """以 SchedulerLeases 表實作的領導者租約，同一時間只有一個工作行程持有"""
+
+    def __init__(self, name, ttl=30):
+        self.name = name
+        self.ttl = ttl
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def acquire(self):
+        """取得或續約租約，返回是否為領導者"""
+        now = datetime.datetime.now()
+        expires_at = now + datetime.timedelta(seconds=self.ttl)
+        try:
+            with db.transaction() as tx:
+                updated = tx.execute_query(
+                    """
+                    UPDATE SchedulerLeases
+                    SET owner = ?, expires_at = ?
+                    WHERE name = ? AND (owner = ? OR expires_at < ?)
+                    """,
+                    (self.owner, expires_at, self.name, self.owner, now)
+                )
+                if updated:
+                    return True
+                held = tx.execute_query(
+                    "SELECT owner FROM SchedulerLeases WHERE name = ?",
+                    (self.name,),
+                    fetch_one=True
+                )
+                if held:
+                    return False
+                tx.execute_insert(
+                    "INSERT INTO SchedulerLeases (name, owner, expires_at) VALUES (?, ?, ?)",
+                    (self.name, self.owner, expires_at)
+                )
+                return True
+        except db.engine.IntegrityError:
+            # 其他行程同時建立了租約
+            return False
+
+    def release(self):
+        db.execute_query(
+            "UPDATE SchedulerLeases SET expires_at = ? WHERE name = ? AND owner = ?",
+            (datetime.datetime.now(), self.name, self.owner)
+        )
+
+
+class DeadlineScheduler:
+    """投票截止排程：到期時自動關閉回合
+
+    以最小堆積依 voting_deadline 排序。取得領導者租約時載入所有投票中的回合，
+    之後由本行程新開放投票的回合經 schedule() 加入；其他行程建立的回合
+    每 sync_interval 秒以 (status, voting_deadline) 索引查詢下一段時間內到期者補入。
+    到期的回合每批最多 batch_size 個交給 close_rounds 關閉；整批失敗時改為逐個關閉，
+    失敗的回合以指數退避重試，連續失敗 max_failures 次後隔離（不再排程，見 stats()），
+    不會阻塞同批的其他回合。
+    """
+
+    def __init__(self, enabled=True, lease_seconds=30, sync_interval=60, batch_size=100, retry_seconds=5,
+                 max_retry_seconds=300, max_failures=5):
+        self.enabled = enabled
+        self.lease = LeaderLease('voting_deadlines', ttl=lease_seconds)
+        self.renew_interval = lease_seconds / 3
+        self.sync_interval = sync_interval
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.max_failures = max_failures
+        self._cond = threading.Condition()
+        self._heap = []         # (deadline, round_id)
+        self._deadlines = {}    # round_id -> 排程中的截止時間
+        self._failures = {}     # round_id -> 連續關閉失敗次數（退避中）
+        self._quarantined = {}  # round_id -> 最後一次錯誤
+        self._close_rounds = None
+        self._thread = None
+        self._stopping = False
+        self.is_leader = False
+        self.closed = 0
+        self.errors = 0
+
+    def start(self, close_rounds):
+        """啟動背景執行緒；close_rounds(round_ids) 負責關閉一批回合"""
+        self._close_rounds = close_rounds
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='deadline-scheduler', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def schedule(self, round_id, deadline):
+        """加入（或更新）回合的截止時間；非領導者行程忽略，由領導者同步時補入"""
+        with self._cond:
+            if not self.is_leader:
+                return
+            self._push(round_id, deadline)
+            self._cond.notify_all()
+
+    def _push(self, round_id, deadline, retry=False):
+        if round_id in self._quarantined or self._deadlines.get(round_id) == deadline:
+            return
+        if not retry and round_id in self._failures and round_id in self._deadlines:
+            # 退避中：同步時不以原截止時間覆蓋重試時間
+            return
+        self._deadlines[round_id] = deadline
+        heapq.heappush(self._heap, (deadline, round_id))
+
+    def _pop_due(self, now):
+        """取出已到期的回合（略過已被更新的舊項目）"""
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            deadline, round_id = heapq.heappop(self._heap)
+            if self._deadlines.get(round_id) == deadline:
+                del self._deadlines[round_id]
+                due.append(round_id)
+        return due
+
+    def _sync(self, horizon=None):
+        """由數據庫補入投票中的回合；horizon 為秒數時只載入該時間內到期者"""
+        query = "SELECT round_id, voting_deadline FROM Rounds WHERE status = 'WAIT_VOTING' AND voting_deadline IS NOT NULL"
+        params = ()
+        if horizon is not None:
+            query += " AND voting_deadline <= ?"
+            params = (datetime.datetime.now() + datetime.timedelta(seconds=horizon),)
+        rounds = db.execute_query(query, params, fetch_all=True)
+        with self._cond:
+            for round_data in rounds:
+                self._push(round_data['round_id'], round_data['voting_deadline'])
+
+    def _run(self):
+        next_renew = next_sync = 0
+        while True:
+            with self._cond:
+                if self._stopping:
+                    break
+
+            now = time.monotonic()
+            try:
+                if now >= next_renew:
+                    next_renew = now + self.renew_interval
+                    self._renew()
+                if self.is_leader and now >= next_sync:
+                    # 每次同步涵蓋到下次同步之前到期的回合
+                    next_sync = now + self.sync_interval
+                    self._sync(horizon=self.sync_interval * 2)
+            except Exception as e:
+                print(f"Deadline scheduler error: {e}")
+
+            with self._cond:
+                due = self._pop_due(datetime.datetime.now()) if self.is_leader else []
+            if due:
+                self._close(due)
+                continue
+
+            with self._cond:
+                timeout = min(next_renew, next_sync if self.is_leader else next_renew) - time.monotonic()
+                if self._heap:
+                    timeout = min(timeout, (self._heap[0][0] - datetime.datetime.now()).total_seconds())
+                if timeout > 0 and not self._stopping:
+                    self._cond.wait(timeout)
+
+        if self.is_leader:
+            self.lease.release()
+
+    def _renew(self):
+        leader = self.lease.acquire()
+        if leader and not self.is_leader:
+            with self._cond:
+                self.is_leader = True
+            # 成為領導者：載入所有投票中的回合
+            self._sync()
+        elif not leader and self.is_leader:
+            with self._cond:
+                self.is_leader = False
+                self._heap.clear()
+                self._deadlines.clear()
+                self._failures.clear()
+
+    def _close(self, round_ids):
+        """關閉一批到期回合；整批失敗時逐個關閉，找出失敗的回合"""
+        try:
+            self._close_rounds(round_ids)
+            failed = {}
+        except Exception as e:
+            if len(round_ids) == 1:
+                failed = {round_ids[0]: e}
+            else:
+                print(f"Deadline scheduler failed to close rounds {round_ids}, closing one by one: {e}")
+                failed = {}
+                for round_id in round_ids:
+                    try:
+                        self._close_rounds([round_id])
+                    except Exception as round_error:
+                        failed[round_id] = round_error
+
+        now = datetime.datetime.now()
+        with self._cond:
+            self.closed += len(round_ids) - len(failed)
+            for round_id in round_ids:
+                if round_id not in failed:
+                    self._failures.pop(round_id, None)
+
+            for round_id, error in failed.items():
+                self.errors += 1
+                failures = self._failures.pop(round_id, 0) + 1
+                if failures >= self.max_failures:
+                    self._quarantined[round_id] = str(error)
+                    self._deadlines.pop(round_id, None)
+                    print(f"Deadline scheduler quarantined round {round_id} after {failures} failures: {error}")
+                    continue
+                self._failures[round_id] = failures
+                delay = min(self.retry_seconds * 2 ** (failures - 1), self.max_retry_seconds)
+                print(f"Deadline scheduler failed to close round {round_id} (attempt {failures}), retrying in {delay}s: {error}")
+                self._push(round_id, now + datetime.timedelta(seconds=delay), retry=True)
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'enabled': self.enabled,
+                'leader': self.is_leader,
+                'scheduled': len(self._deadlines),
+                'next_deadline': self._heap[0][0].isoformat() if self._heap else None,
+                'closed': self.closed,
+                'errors': self.errors,
+                'retrying': len(self._failures),
+                'quarantined': {round_id: error for round_id, error in self._quarantined.items()},
+            }
+
+
+# 全局投票截止排程實例
+deadline_scheduler = DeadlineScheduler(
+    enabled=Config.DEADLINE_SCHEDULER_ENABLED,
+    lease_seconds=Config.DEADLINE_SCHEDULER_LEASE_SECONDS,
+    sync_interval=Config.DEADLINE_SCHEDULER_SYNC_SECONDS,
+    batch_size=Config.DEADLINE_SCHEDULER_BATCH_SIZE,
+    max_retry_seconds=Config.DEADLINE_SCHEDULER_MAX_RETRY_SECONDS,
+    max_failures=Config.DEADLINE_SCHEDULER_MAX_FAILURES
+)
@@ -0,0 +1,82 @@
+import time
+import threading
+from collections import OrderedDict
+from config import Config
+
+
+class SnapshotCache:
+    """已序列化回應的快取（如辯論詳情），依鍵（辯論 ID）失效
+
+    每個鍵可有多個變體（如完整／摘要模式）。寫入方在交易提交後呼叫 invalidate()
+    （只變更投票計數的寫入不失效，由讀取方覆蓋即時計數）；
+    建立期間發生失效的結果不會存入，避免快取舊資料。失效只及於本行程，
+    其他工作行程的寫入最多延遲 ttl 秒可見。
+    """
+
+    def __init__(self, enabled=True, ttl=5, max_entries=1000):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> {variant: (到期時間, 內容)}
+        self._building = {}            # (key, variant) -> 建立中的憑證
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, variant, build):
+        """返回快取的內容；未命中時呼叫 build() 建立，build() 返回 None 時不快取"""
+        if not self.enabled:
+            return build()
+
+        now = time.monotonic()
+        token = object()
+        with self._lock:
+            entry = self._entries.get(key, {}).get(variant)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            self._building[(key, variant)] = token
+
+        body = None
+        try:
+            body = build()
+        finally:
+            with self._lock:
+                # 建立期間已失效（或有較新的建立）時不存入
+                if self._building.get((key, variant)) is token:
+                    del self._building[(key, variant)]
+                    if body is not None:
+                        self._entries.setdefault(key, {})[variant] = (now + self.ttl, body)
+                        self._entries.move_to_end(key)
+                        while len(self._entries) > self.max_entries:
+                            self._entries.popitem(last=False)
+        return body
+
+    def invalidate(self, key):
+        with self._lock:
+            self.invalidations += 1
+            self._entries.pop(key, None)
+            for building_key in [k for k in self._building if k[0] == key]:
+                del self._building[building_key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+            }
+
+
+# 全局辯論詳情快照實例
+debate_snapshots = SnapshotCache(
+    enabled=Config.DEBATE_SNAPSHOT_ENABLED,
+    ttl=Config.DEBATE_SNAPSHOT_TTL,
+    max_entries=Config.DEBATE_SNAPSHOT_MAX_ENTRIES
+)
@@ -0,0 +1,29 @@
+import json
+from flask import Response, current_app
+
+
+def stream_json_list(key, items, chunk_size=100, extra=None):
+    """串流輸出 {"<key>": [...], ...} 格式的 JSON 回應
+
+    items 可為生成器（如 db.stream_query），每累積 chunk_size 個元素輸出一次，
+    序列化方式與 jsonify 相同。extra 為可選的回呼，在 items 輸出完畢後呼叫，
+    返回的 dict 會附加在列表之後（如下一頁游標）。
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '{' + json.dumps(key) + ': ['
+        buffer = []
+        first = True
+        for item in items:
+            buffer.append(dumps(item))
+            if len(buffer) >= chunk_size:
+                yield ('' if first else ',') + ','.join(buffer)
+                first = False
+                buffer = []
+        if buffer:
+            yield ('' if first else ',') + ','.join(buffer)
+        trailer = extra() if extra else {}
+        yield ']' + ''.join(f', {json.dumps(name)}: {dumps(value)}' for name, value in trailer.items()) + '}\n'
+
+    return Response(generate(), mimetype='application/json')
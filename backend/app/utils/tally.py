@@ -0,0 +1,145 @@
+import time
+import threading
+from collections import OrderedDict
+from config import Config
+from app.utils.database import db
+from app.utils.events import event_bus
+
+
+# 投票方 -> Rounds 計數欄位（加權票數, 投票人數）
+TALLY_COLUMNS = {
+    'pros': ('pros_votes', 'pros_vote_count'),
+    'cons': ('cons_votes', 'cons_vote_count'),
+}
+# 隨投票變更的回合欄位
+TALLY_FIELDS = ('pros_votes', 'cons_votes', 'pros_vote_count', 'cons_vote_count')
+
+
+class VoteTally:
+    """回合的即時投票計數（加權票數與投票人數）
+
+    以 Rounds 的計數欄位為準載入，本行程提交的投票增量累加；
+    其他行程的投票最多延遲 ttl 秒可見。
+    """
+
+    def __init__(self, ttl=2, max_rounds=10000):
+        self.ttl = ttl
+        self.max_rounds = max_rounds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # round_id -> (loaded_at, tally)
+
+    def get(self, round_id):
+        """返回回合計數；回合不存在時返回 None"""
+        with self._lock:
+            entry = self._entries.get(round_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(round_id)
+                return dict(entry[1])
+
+        tally = db.execute_query(
+            """
+            SELECT round_id, debate_id, status, pros_votes, cons_votes, pros_vote_count, cons_vote_count
+            FROM Rounds
+            WHERE round_id = ?
+            """,
+            (round_id,),
+            fetch_one=True
+        )
+        if not tally:
+            return None
+        tally = dict(tally)
+        with self._lock:
+            self._entries[round_id] = (time.monotonic(), tally)
+            self._entries.move_to_end(round_id)
+            while len(self._entries) > self.max_rounds:
+                self._entries.popitem(last=False)
+        return dict(tally)
+
+    def add(self, round_id, side, weight, count=1):
+        """累加已提交的投票（count 張，加權合計 weight）"""
+        votes_column, count_column = TALLY_COLUMNS[side]
+        with self._lock:
+            entry = self._entries.get(round_id)
+            if entry is not None:
+                entry[1][votes_column] += weight
+                entry[1][count_column] += count
+
+    def publish(self, round_id):
+        """向觀看辯論的連線發佈最新計數（同一回合未送出的計數會被取代）"""
+        if not event_bus.has_subscribers():
+            return
+        tally = self.get(round_id)
+        if tally and event_bus.has_subscribers(tally['debate_id']):
+            event_bus.publish(tally['debate_id'], 'tally', {'round_id': round_id, **tally_summary(tally)},
+                              key=f'tally:{round_id}')
+
+    def discard(self, round_id):
+        with self._lock:
+            self._entries.pop(round_id, None)
+
+
+def record_vote(tx, round_id, voter_id, side_voted):
+    """在交易中寫入一張投票並更新回合計數，返回票的權重；回合未開放投票時返回 None（不留下任何寫入）
+
+    先以帶狀態條件的語句更新計數並鎖定回合行，再寫入投票：與關閉投票競爭時，
+    這裡會等待並看到已關閉的狀態，關閉投票讀取計數前，進行中的投票已提交或被拒絕。
+    投票只鎖定回合行，不遞增辯論版本：投票期間的計數由即時計數（SSE、快照覆蓋）提供，
+    關閉投票時遞增一次版本，增量同步在關閉後取得最終計數。
+    重複投票由 UQ_Vote_Per_Round 約束攔截（拋出 IntegrityError）。
+    """
+    votes_column, count_column = TALLY_COLUMNS[side_voted]
+    updated = tx.execute_query(
+        f"""
+        UPDATE Rounds
+        SET {votes_column} = {votes_column} + CASE WHEN EXISTS (
+                SELECT 1 FROM JudgeAssignments ja WHERE ja.debate_id = Rounds.debate_id AND ja.user_id = ?
+            ) THEN ? ELSE ? END,
+            {count_column} = {count_column} + 1
+        WHERE round_id = ? AND status = 'WAIT_VOTING'
+        """,
+        (voter_id, Config.JUDGE_VOTE_WEIGHT, Config.REGULAR_VOTE_WEIGHT, round_id)
+    )
+    if not updated:
+        return None
+
+    inserted = tx.execute_query(
+        db.engine.returning(
+            """
+            INSERT INTO Votes (round_id, voter_id, side_voted, is_judge, weight)
+            SELECT r.round_id, ?, ?,
+                   CASE WHEN ja.user_id IS NULL THEN 0 ELSE 1 END,
+                   CASE WHEN ja.user_id IS NULL THEN ? ELSE ? END
+            FROM Rounds r
+            LEFT JOIN JudgeAssignments ja ON ja.debate_id = r.debate_id AND ja.user_id = ?
+            WHERE r.round_id = ?
+            """,
+            ('weight',)
+        ),
+        (voter_id, side_voted, Config.REGULAR_VOTE_WEIGHT, Config.JUDGE_VOTE_WEIGHT, voter_id, round_id),
+        fetch_one=True
+    )
+
+    weight = inserted['weight']
+    tx.on_commit(lambda: vote_tally.add(round_id, side_voted, weight))
+    tx.on_commit(lambda: vote_tally.publish(round_id))
+    return weight
+
+
+def tally_summary(tally):
+    """由計數欄位計算總票數與百分比"""
+    pros_votes = tally['pros_votes']
+    cons_votes = tally['cons_votes']
+    total_votes = pros_votes + cons_votes
+    return {
+        'pros_votes': pros_votes,
+        'cons_votes': cons_votes,
+        'pros_vote_count': tally['pros_vote_count'],
+        'cons_vote_count': tally['cons_vote_count'],
+        'total_votes': total_votes,
+        'pros_percentage': round(pros_votes / total_votes * 100, 2) if total_votes else 0,
+        'cons_percentage': round(cons_votes / total_votes * 100, 2) if total_votes else 0,
+    }
+
+
+# 全局投票計數實例
+vote_tally = VoteTally(ttl=Config.LIVE_TALLY_TTL)
@@ -0,0 +1,54 @@
+from app.utils.database import db
+from app.utils.snapshots import debate_snapshots
+
+
+# 增量同步回應中的辯論欄位（其餘欄位建立後不再變更）
+DELTA_FIELDS = ('debate_id', 'status', 'round_count', 'winner_id',
+                'pros_consecutive_wins', 'cons_consecutive_wins', 'version')
+
+
+def bump_round_version(tx, round_id, user_column=None, user_id=None):
+    """在交易中遞增回合所屬辯論的版本，返回 (debate_id, 新版本)；無符合的辯論時返回 None
+
+    會鎖定辯論行：同一辯論的寫入依序進行，且一律先鎖辯論、再鎖回合。
+    交易提交後使辯論詳情快照失效。可附加條件：辯論的 user_column 欄位為 user_id。
+    """
+    query = "UPDATE Debates SET version = version + 1 WHERE debate_id = (SELECT r.debate_id FROM Rounds r WHERE r.round_id = ?)"
+    params = [round_id]
+    if user_column is not None:
+        query += f" AND {user_column} = ?"
+        params.append(user_id)
+
+    row = tx.execute_query(db.engine.returning(query, ('debate_id', 'version')), params, fetch_one=True)
+    if not row:
+        return None
+    debate_id = row['debate_id']
+    tx.on_commit(lambda: debate_snapshots.invalidate(debate_id))
+    return debate_id, row['version']
+
+
+def bump_open_round_versions(tx, round_ids, invalidate=True):
+    """遞增投票中回合所屬進行中辯論的版本，返回 {debate_id: 新版本}；invalidate 為 True 時交易提交後使快照失效"""
+    rows = tx.execute_query(
+        db.engine.returning(
+            f"""
+            UPDATE Debates SET version = version + 1
+            WHERE status = 'ONGOING' AND debate_id IN (
+                SELECT r.debate_id FROM Rounds r
+                WHERE r.status = 'WAIT_VOTING' AND r.round_id IN ({', '.join('?' for _ in round_ids)})
+            )
+            """,
+            ('debate_id', 'version')
+        ),
+        list(round_ids),
+        fetch_all=True
+    )
+    versions = {row['debate_id']: row['version'] for row in rows}
+    if not invalidate:
+        return versions
+
+    def invalidate_snapshots():
+        for debate_id in versions:
+            debate_snapshots.invalidate(debate_id)
+    tx.on_commit(invalidate_snapshots)
+    return versions
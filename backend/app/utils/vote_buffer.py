@@ -0,0 +1,348 @@
+import time
+import atexit
+import threading
+from collections import deque, OrderedDict
+from config import Config
+from app.utils.database import db
+from app.utils.tally import vote_tally, record_vote, TALLY_COLUMNS
+
+
+# submit() 的結果
+ACCEPTED = 'accepted'        # 已寫入數據庫
+DUPLICATE = 'duplicate'
+NOT_FOUND = 'not_found'
+CLOSED = 'closed'
+BUSY = 'busy'
+FAILED = 'failed'            # 重試用盡仍未寫入，可重新投票
+UNCONFIRMED = 'unconfirmed'  # 等待寫入逾時，投票仍在佇列中
+
+VOTE_COLUMNS = ('round_id', 'voter_id', 'side_voted', 'is_judge', 'weight')
+
+
+class PendingVotesError(Exception):
+    """關閉投票時緩衝中的投票未能在時限內寫入"""
+
+
+class _Ticket:
+    """一張投票的寫入結果，由背景執行緒在批次提交後設定"""
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+    def resolve(self, result):
+        self.result = result
+        self.event.set()
+
+
+class _RoundState:
+    """回合的投票資格快照：法官名單與已投票用戶"""
+    __slots__ = ('open', 'judges', 'voters')
+
+    def __init__(self, judges, voters):
+        self.open = True
+        self.judges = judges
+        self.voters = voters
+
+
+class VoteBuffer:
+    """批次寫入的投票接收（group commit）
+
+    投票經記憶體重複檢查後放入有界佇列，由背景執行緒每 flush_interval 秒
+    或累積 batch_size 張時批量寫入；請求等待所屬批次提交後才返回結果，
+    不會在寫入前確認投票。佇列滿時請求最多等待 put_timeout 秒，仍無空位則返回 BUSY；
+    等待寫入超過 confirm_timeout 秒返回 UNCONFIRMED。關閉投票前以 close_rounds()
+    寫入本行程佇列中的投票。
+
+    重複檢查只涵蓋本行程接受的投票，其他行程的重複投票在寫入時由唯一約束攔截（DUPLICATE）；
+    回合在寫入前已被其他行程關閉時返回 CLOSED。
+    """
+
+    def __init__(self, enabled=False, max_pending=10000, batch_size=500, flush_interval=0,
+                 put_timeout=0.5, confirm_timeout=10, max_rounds=1000, max_retries=3):
+        self.enabled = enabled
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.confirm_timeout = confirm_timeout
+        self.max_rounds = max_rounds
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._rounds = OrderedDict()  # round_id -> _RoundState
+        self._enqueued = 0
+        self._written = 0
+        self._flush_requests = 0
+        self._thread = None
+        self._stopping = False
+        self.inserted = 0
+        self.duplicates = 0
+        self.closed = 0
+        self.lost = 0
+        self.unconfirmed = 0
+        self.batches = 0
+
+    def submit(self, round_id, voter_id, side_voted):
+        """提交一張投票並等待寫入，返回 ACCEPTED / DUPLICATE / NOT_FOUND / CLOSED / BUSY / FAILED / UNCONFIRMED"""
+        state = self._round_state(round_id)
+        if not isinstance(state, _RoundState):
+            return state
+
+        deadline = time.monotonic() + self.put_timeout
+        with self._cond:
+            while len(self._pending) >= self.max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return BUSY
+                self._cond.wait(remaining)
+
+            # 在同一把鎖內檢查，避免與 close_rounds 交錯
+            if not state.open:
+                return CLOSED
+            if voter_id in state.voters:
+                return DUPLICATE
+            state.voters.add(voter_id)
+
+            is_judge = voter_id in state.judges
+            weight = Config.JUDGE_VOTE_WEIGHT if is_judge else Config.REGULAR_VOTE_WEIGHT
+            ticket = _Ticket()
+            self._pending.append(((round_id, voter_id, side_voted, is_judge, weight), ticket))
+            self._enqueued += 1
+            self._ensure_started()
+            self._cond.notify_all()
+
+        if not ticket.event.wait(self.confirm_timeout):
+            print(f"Vote buffer: vote of user {voter_id} in round {round_id} not confirmed within {self.confirm_timeout}s")
+            with self._cond:
+                self.unconfirmed += 1
+            return UNCONFIRMED
+        return ticket.result
+
+    def _round_state(self, round_id):
+        """返回回合的投票資格快照（首次投票時載入）；回合不可投票時返回結果代碼"""
+        with self._cond:
+            state = self._rounds.get(round_id)
+            if state is not None:
+                self._rounds.move_to_end(round_id)
+                return state
+
+        round_data = db.execute_query(
+            "SELECT debate_id, status FROM Rounds WHERE round_id = ?",
+            (round_id,),
+            fetch_one=True
+        )
+        if not round_data:
+            return NOT_FOUND
+        # 只快取投票中的回合；回合關閉後不會再開放投票
+        if round_data['status'] != 'WAIT_VOTING':
+            return CLOSED
+
+        judges = db.execute_query(
+            "SELECT user_id FROM JudgeAssignments WHERE debate_id = ?",
+            (round_data['debate_id'],),
+            fetch_all=True
+        )
+        voters = db.execute_query(
+            "SELECT voter_id FROM Votes WHERE round_id = ?",
+            (round_id,),
+            fetch_all=True
+        )
+        loaded = _RoundState({row['user_id'] for row in judges}, {row['voter_id'] for row in voters})
+
+        with self._cond:
+            state = self._rounds.setdefault(round_id, loaded)
+            self._rounds.move_to_end(round_id)
+            while len(self._rounds) > self.max_rounds:
+                self._rounds.popitem(last=False)
+            return state
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='vote-buffer-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # 等待批次累積，或到達寫入間隔（請求在等待結果，間隔即為增加的延遲）
+                if self.flush_interval > 0:
+                    self._cond.wait_for(
+                        lambda: len(self._pending) >= self.batch_size or self._stopping or self._flush_requests,
+                        timeout=self.flush_interval
+                    )
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._cond.notify_all()
+
+            self._write(batch)
+
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+
+    def _write(self, batch):
+        """寫入一批投票並通知等待的請求；數據庫錯誤時重試，重試用盡則逐張記錄遺失並允許重新投票"""
+        votes = [vote for vote, _ in batch]
+        results = None
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                try:
+                    results = self._insert_batch(votes)
+                except db.engine.IntegrityError:
+                    # 批次中有其他行程已寫入的投票，逐張寫入並標記重複
+                    results = self._insert_each(votes)
+                break
+            except Exception as e:
+                print(f"Vote buffer flush error (attempt {attempt}): {e}")
+                time.sleep(0.1 * attempt)
+
+        if results is None:
+            print(f"Vote buffer failed to write {len(batch)} votes after {self.max_retries} attempts")
+            for round_id, voter_id, side_voted, _, _ in votes:
+                print(f"Vote buffer lost vote: round {round_id}, user {voter_id}, side {side_voted}")
+            results = [FAILED] * len(batch)
+
+        with self._cond:
+            self.batches += 1
+            for (vote, ticket), result in zip(batch, results):
+                round_id, voter_id = vote[0], vote[1]
+                if result == ACCEPTED:
+                    self.inserted += 1
+                elif result == DUPLICATE:
+                    self.duplicates += 1
+                elif result == CLOSED:
+                    self.closed += 1
+                else:
+                    self.lost += 1
+                if result in (CLOSED, FAILED):
+                    # 未寫入：釋放重複檢查，回合已關閉時停止接受投票
+                    state = self._rounds.get(round_id)
+                    if state is not None:
+                        state.voters.discard(voter_id)
+                        if result == CLOSED:
+                            state.open = False
+                ticket.resolve(result)
+
+    def _insert_batch(self, batch):
+        """以一個交易寫入整批投票，並一次更新各回合計數，返回每張投票的結果"""
+        round_ids = sorted({vote[0] for vote in batch})
+        with db.transaction() as tx:
+            # 鎖定回合行並只寫入仍在投票中的回合（與 close_voting 互斥；與單張投票相同不遞增辯論版本）
+            open_rounds = tx.execute_query(
+                f"""
+                SELECT round_id FROM Rounds WITH (UPDLOCK)
+                WHERE status = 'WAIT_VOTING' AND round_id IN ({', '.join('?' for _ in round_ids)})
+                """,
+                round_ids,
+                fetch_all=True
+            )
+            open_rounds = {row['round_id'] for row in open_rounds}
+            rows = [vote for vote in batch if vote[0] in open_rounds]
+            results = [ACCEPTED if vote[0] in open_rounds else CLOSED for vote in batch]
+            if not rows:
+                return results
+
+            totals = {}  # (round_id, side) -> [加權票數, 張數]
+            for round_id, _, side_voted, _, weight in rows:
+                total = totals.setdefault((round_id, side_voted), [0, 0])
+                total[0] += weight
+                total[1] += 1
+
+            tx.bulk_insert('Votes', VOTE_COLUMNS, rows)
+            for side, (votes_column, count_column) in TALLY_COLUMNS.items():
+                updates = [(weight, count, round_id)
+                           for (round_id, s), (weight, count) in totals.items() if s == side]
+                if updates:
+                    tx.execute_many(
+                        f"""
+                        UPDATE Rounds
+                        SET {votes_column} = {votes_column} + ?, {count_column} = {count_column} + ?
+                        WHERE round_id = ?
+                        """,
+                        updates
+                    )
+
+            def apply_totals():
+                for (round_id, side), (weight, count) in totals.items():
+                    vote_tally.add(round_id, side, weight, count)
+                for round_id in {round_id for round_id, _ in totals}:
+                    vote_tally.publish(round_id)
+            tx.on_commit(apply_totals)
+        return results
+
+    def _insert_each(self, batch):
+        results = []
+        for round_id, voter_id, side_voted, _, _ in batch:
+            try:
+                with db.transaction() as tx:
+                    weight = record_vote(tx, round_id, voter_id, side_voted)
+                results.append(CLOSED if weight is None else ACCEPTED)
+            except db.engine.IntegrityError:
+                results.append(DUPLICATE)
+        return results
+
+    def flush(self, timeout=None):
+        """等待目前已接受的投票全部寫入，返回是否在時限內完成"""
+        with self._cond:
+            target = self._enqueued
+            self._flush_requests += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: self._written >= target, timeout=timeout)
+            finally:
+                self._flush_requests -= 1
+
+    def close_rounds(self, round_ids, timeout=None):
+        """停止接受回合的投票，並等待已接受的投票寫入（在計票前呼叫）
+
+        逾時拋出 PendingVotesError。
+        """
+        with self._cond:
+            for round_id in round_ids:
+                state = self._rounds.get(round_id)
+                if state is not None:
+                    state.open = False
+        if not self.flush(timeout):
+            raise PendingVotesError(f"Pending votes for rounds {list(round_ids)} were not written within {timeout}s")
+
+    def stop(self, timeout=None):
+        """寫入剩餘投票並停止背景執行緒"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'enabled': self.enabled,
+                'pending': len(self._pending),
+                'max_pending': self.max_pending,
+                'rounds': len(self._rounds),
+                'inserted': self.inserted,
+                'duplicates': self.duplicates,
+                'closed': self.closed,
+                'lost': self.lost,
+                'unconfirmed': self.unconfirmed,
+                'batches': self.batches,
+            }
+
+
+# 全局投票緩衝實例
+vote_buffer = VoteBuffer(
+    enabled=Config.VOTE_INGEST_MODE == 'buffered',
+    max_pending=Config.VOTE_BUFFER_MAX_PENDING,
+    batch_size=Config.VOTE_BUFFER_BATCH_SIZE,
+    flush_interval=Config.VOTE_BUFFER_FLUSH_MS / 1000,
+    put_timeout=Config.VOTE_BUFFER_PUT_TIMEOUT,
+    confirm_timeout=Config.VOTE_BUFFER_CONFIRM_TIMEOUT
+)
+atexit.register(vote_buffer.stop, Config.VOTE_BUFFER_FLUSH_TIMEOUT)
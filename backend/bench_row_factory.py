@@ -0,0 +1,115 @@
+"""
+結果行格式微基準測試：比較逐行 dict、dict 模式與 Record 模式的結果行
+
+使用記憶體 SQLite 產生與排行榜查詢相同形狀的結果集，分別量測
+建立結果行、JSON 序列化的耗時與記憶體峰值，並確認輸出相同。
+
+50000 行的量測結果（總耗時取最佳值，多次執行）：Record 建立快 3 至 5 倍、記憶體約為 1/5，
+但 JSON 序列化時每行經 default() 轉回 dict，整體與 dict 模式相當甚至較慢，
+因此 DB_ROW_FACTORY 預設為 dict，record 只適合在記憶體中保留大量結果行的情況。
+
+python bench_row_factory.py            # 預設 50000 行
+python bench_row_factory.py --rows 200000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+os.environ.setdefault('DB_ENGINE', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', ':memory:')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+from flask import Flask
+from app.utils.database import Database
+from app.utils.records import record_class, RecordJSONProvider
+
+QUERY = """
+    SELECT user_id, nickname, avatar, rating, wins, losses, draws,
+           CAST(wins AS FLOAT) / (wins + losses + draws) * 100 as win_rate
+    FROM Users
+    ORDER BY rating DESC, wins DESC
+"""
+
+
+def build_cursor(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute(
+        "CREATE TABLE Users (user_id INTEGER PRIMARY KEY, nickname TEXT, avatar TEXT, "
+        "rating INT, wins INT, losses INT, draws INT)"
+    )
+    conn.executemany(
+        "INSERT INTO Users VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((i, f'user{i}', f'https://example.com/{i}.png', 1000 + i % 1000, i % 50 + 1, i % 30, i % 5)
+         for i in range(rows))
+    )
+    cursor = conn.cursor()
+    cursor.execute(QUERY)
+    return cursor, cursor.fetchall()
+
+
+def row_to_dict_path(cursor, rows):
+    """原本的做法：每行重建欄位列表並建立 dict"""
+    return [Database._row_to_dict(cursor, row) for row in rows]
+
+
+def dict_path(cursor, rows):
+    """dict 模式：欄位元組每個結果集只建立一次"""
+    columns = tuple(column[0] for column in cursor.description)
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def record_path(cursor, rows):
+    make_row = record_class(QUERY, tuple(column[0] for column in cursor.description))
+    return [make_row(row) for row in rows]
+
+
+def measure(name, build, cursor, rows, dumps, repeat):
+    best_build = best_dump = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = build(cursor, rows)
+        best_build = min(best_build, time.perf_counter() - start)
+        start = time.perf_counter()
+        output = dumps({'ranking': result})
+        best_dump = min(best_dump, time.perf_counter() - start)
+        del result
+
+    tracemalloc.start()
+    result = build(cursor, rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    print(f"{name:<8} build {best_build * 1000:8.1f} ms   json {best_dump * 1000:8.1f} ms   "
+          f"total {(best_build + best_dump) * 1000:8.1f} ms   rows memory {current / 1024 / 1024:7.1f} MB")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='結果行格式微基準測試')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    cursor, rows = build_cursor(args.rows)
+    app = Flask(__name__)
+    app.json = RecordJSONProvider(app)
+
+    print(f"rows: {args.rows}")
+    with app.app_context():
+        dumps = app.json.dumps
+        outputs = [
+            measure('per-row', row_to_dict_path, cursor, rows, dumps, args.repeat),
+            measure('dict', dict_path, cursor, rows, dumps, args.repeat),
+            measure('record', record_path, cursor, rows, dumps, args.repeat),
+        ]
+
+    print("JSON 輸出一致" if len(set(outputs)) == 1 else "❌ JSON 輸出不一致")
+
+
+if __name__ == '__main__':
+    main()
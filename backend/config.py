@@ -4,7 +4,25 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _sqlserver_connection_strings(servers, database, user, password):
+    """為多台 SQL Server 構建連接字符串"""
+    return [
+        f'DRIVER={{ODBC Driver 17 for SQL Server}};'
+        f'SERVER={server};'
+        f'DATABASE={database};'
+        f'UID={user};'
+        f'PWD={password}'
+        for server in servers
+    ]
+
+
 class Config:
+    # 數據庫引擎：sqlserver（預設）或 sqlite（單機部署 / 本機壓測）
+    DB_ENGINE = os.getenv('DB_ENGINE', 'sqlserver')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'debate_platform.db')  # ':memory:' 為記憶體資料庫
+    SQLITE_SHARED_CACHE = os.getenv('SQLITE_SHARED_CACHE', 'False') == 'True'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
     # 數據庫配置
     DB_SERVER = os.getenv('DB_SERVER', 'localhost')
     DB_NAME = os.getenv('DB_NAME', 'DebatePlatform')
@@ -20,11 +38,79 @@ class Config:
         f'PWD={DB_PASSWORD}'
     )
 
+    # 唯讀副本（逗號分隔的伺服器列表），唯讀查詢會輪詢送往副本
+    DB_REPLICA_SERVERS = [server.strip() for server in os.getenv('DB_REPLICA_SERVERS', '').split(',') if server.strip()]
+    DB_REPLICA_CONNECTION_STRINGS = _sqlserver_connection_strings(DB_REPLICA_SERVERS, DB_NAME, DB_USER, DB_PASSWORD)
+    DB_REPLICA_RETRY_SECONDS = int(os.getenv('DB_REPLICA_RETRY_SECONDS', 30))  # 故障副本暫停使用的秒數
+
+    # 連接池配置
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))  # 等待可用連接的秒數
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv('DB_POOL_RECYCLE_SECONDS', 1800))  # 連接最長存活時間
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True') == 'True'  # 借出前檢查連接是否有效
+
+    # 批量寫入每批行數
+    DB_BULK_CHUNK_SIZE = int(os.getenv('DB_BULK_CHUNK_SIZE', 1000))
+
+    # 串流查詢每批讀取行數
+    DB_STREAM_BATCH_SIZE = int(os.getenv('DB_STREAM_BATCH_SIZE', 500))
+
+    # 查詢結果行格式：dict（預設）或 record（緊湊結果行，建立快、佔用記憶體少，
+    # 但 JSON 序列化時需逐行轉回 dict，整體沒有較快，見 bench_row_factory.py）
+    DB_ROW_FACTORY = os.getenv('DB_ROW_FACTORY', 'dict')
+
+    # 查詢結果快取（memory 或 'package.module:ClassName' 共享後端）；預設停用，
+    # 只快取不再變更的資料（已批准話題、已產生結果的回合），失效只發生在寫入的行程內
+    DB_CACHE_ENABLED = os.getenv('DB_CACHE_ENABLED', 'False') == 'True'
+    DB_CACHE_BACKEND = os.getenv('DB_CACHE_BACKEND', 'memory')
+    DB_CACHE_MAX_ENTRIES = int(os.getenv('DB_CACHE_MAX_ENTRIES', 10000))
+    DB_CACHE_DEFAULT_TTL = int(os.getenv('DB_CACHE_DEFAULT_TTL', 30))
+
+    # 查詢統計（Server-Timing 標頭與端點報表）
+    DB_INSTRUMENTATION = os.getenv('DB_INSTRUMENTATION', 'True') == 'True'
+    # 同一請求中相同語句執行超過此次數時以應用程式日誌發出 N+1 警告（每個端點的同一語句只警告一次；0 表示停用）
+    DB_REPEAT_QUERY_THRESHOLD = int(os.getenv('DB_REPEAT_QUERY_THRESHOLD', 0))
+
     # JWT 配置
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
     JWT_ALGORITHM = os.getenv('JWT_ALGORITHM', 'HS256')
     JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', 24))
 
+    # 已驗證用戶快取（TTL 為 0 表示停用）
+    AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv('AUTH_PRINCIPAL_CACHE_TTL', 30))
+    AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv('AUTH_PRINCIPAL_CACHE_SIZE', 10000))
+
+    # 驗證模式：lookup（每個請求載入用戶）或 claims（信任 token 內的用戶資料）
+    AUTH_MODE = os.getenv('AUTH_MODE', 'lookup')
+    AUTH_CLAIMS_TTL_MINUTES = int(os.getenv('AUTH_CLAIMS_TTL_MINUTES', 15))
+    AUTH_REVOCATION_REFRESH_SECONDS = int(os.getenv('AUTH_REVOCATION_REFRESH_SECONDS', 10))
+
+    # 列表端點的游標分頁
+    PAGE_DEFAULT_LIMIT = int(os.getenv('PAGE_DEFAULT_LIMIT', 50))
+    PAGE_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', 200))
+
+    # 記憶體排行榜背景重新載入間隔（秒，同步其他行程的評分變更；0 表示只在啟動時載入一次）
+    LEADERBOARD_RELOAD_SECONDS = int(os.getenv('LEADERBOARD_RELOAD_SECONDS', 300))
+    LEADERBOARD_PAGE_SIZE = int(os.getenv('LEADERBOARD_PAGE_SIZE', 100))
+    LEADERBOARD_MAX_PAGE_SIZE = int(os.getenv('LEADERBOARD_MAX_PAGE_SIZE', 500))
+
+    # 辯論配對：評分容許差由 BASE 起每秒放寬 WIDEN，最多 MAX；
+    # 佇列存於數據庫，持有租約的行程每 PASS_INTERVAL 秒配對一次，未讀取的配對結果保留 RESULT_TTL 秒
+    MATCHMAKING_ENABLED = os.getenv('MATCHMAKING_ENABLED', 'True') == 'True'
+    MATCHMAKING_BASE_TOLERANCE = int(os.getenv('MATCHMAKING_BASE_TOLERANCE', 50))
+    MATCHMAKING_WIDEN_PER_SECOND = float(os.getenv('MATCHMAKING_WIDEN_PER_SECOND', 5))
+    MATCHMAKING_MAX_TOLERANCE = int(os.getenv('MATCHMAKING_MAX_TOLERANCE', 400))
+    MATCHMAKING_PASS_INTERVAL = float(os.getenv('MATCHMAKING_PASS_INTERVAL', 1))
+    MATCHMAKING_LEASE_SECONDS = int(os.getenv('MATCHMAKING_LEASE_SECONDS', 30))
+    MATCHMAKING_RESULT_TTL = int(os.getenv('MATCHMAKING_RESULT_TTL', 600))
+
+    # 辯論即時事件（SSE）：每個工作行程的連線上限、每個連線的待送事件上限與心跳間隔（秒）；
+    # 每個連線佔用一個執行緒，gunicorn.conf.py 依連線上限設定每個行程的執行緒數
+    EVENTS_MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', 200))
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
+    EVENTS_HEARTBEAT_SECONDS = int(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+
     # Line Login 配置
     LINE_CHANNEL_ID = os.getenv('LINE_CHANNEL_ID', '')
     LINE_CHANNEL_SECRET = os.getenv('LINE_CHANNEL_SECRET', '')
@@ -35,6 +121,12 @@ class Config:
     LINE_TOKEN_URL = 'https://api.line.me/oauth2/v2.1/token'
     LINE_PROFILE_URL = 'https://api.line.me/v2/profile'
 
+    # LINE API 連線（共用 keep-alive Session）
+    LINE_HTTP_CONNECT_TIMEOUT = float(os.getenv('LINE_HTTP_CONNECT_TIMEOUT', 3.05))
+    LINE_HTTP_READ_TIMEOUT = float(os.getenv('LINE_HTTP_READ_TIMEOUT', 10))
+    LINE_HTTP_RETRIES = int(os.getenv('LINE_HTTP_RETRIES', 2))
+    LINE_HTTP_POOL_SIZE = int(os.getenv('LINE_HTTP_POOL_SIZE', 10))
+
     # Flask 配置
     DEBUG = os.getenv('FLASK_DEBUG', 'True') == 'True'
     PORT = int(os.getenv('PORT', 5000))
@@ -46,8 +138,39 @@ class Config:
 
     # 辯論配置
     MAX_ROUNDS = 5
+    # 回合摘要（?rounds=summary）中文字欄位的摘錄長度（字元，0 為不摘錄）
+    ROUND_EXCERPT_CHARS = int(os.getenv('ROUND_EXCERPT_CHARS', 120))
+    # 批量獲取回合全文（GET /api/rounds?ids=）每次最多的回合數
+    ROUNDS_FETCH_MAX_IDS = int(os.getenv('ROUNDS_FETCH_MAX_IDS', 50))
+    # 辯論詳情快照：序列化後的回應快取在記憶體中，寫入時失效（其他行程的寫入最多延遲 TTL 秒可見）
+    DEBATE_SNAPSHOT_ENABLED = os.getenv('DEBATE_SNAPSHOT_ENABLED', 'True') == 'True'
+    DEBATE_SNAPSHOT_TTL = float(os.getenv('DEBATE_SNAPSHOT_TTL', 5))
+    DEBATE_SNAPSHOT_MAX_ENTRIES = int(os.getenv('DEBATE_SNAPSHOT_MAX_ENTRIES', 1000))
     INSTANT_WIN_PERCENTAGE = 0.70  # 70% 得票率即時獲勝
     CONSECUTIVE_WINS_FOR_VICTORY = 3  # 連續 3 輪獲勝
     DEFAULT_VOTING_HOURS = 24
+    # 投票截止排程：到期自動關閉回合（租約確保只有一個工作行程執行）
+    DEADLINE_SCHEDULER_ENABLED = os.getenv('DEADLINE_SCHEDULER_ENABLED', 'True') == 'True'
+    DEADLINE_SCHEDULER_LEASE_SECONDS = int(os.getenv('DEADLINE_SCHEDULER_LEASE_SECONDS', 30))
+    # 同步其他行程開放投票的回合的間隔（秒）
+    DEADLINE_SCHEDULER_SYNC_SECONDS = int(os.getenv('DEADLINE_SCHEDULER_SYNC_SECONDS', 60))
+    DEADLINE_SCHEDULER_BATCH_SIZE = int(os.getenv('DEADLINE_SCHEDULER_BATCH_SIZE', 100))
+    # 關閉失敗的回合以指數退避重試（最長間隔秒數），連續失敗次數達上限後隔離
+    DEADLINE_SCHEDULER_MAX_RETRY_SECONDS = int(os.getenv('DEADLINE_SCHEDULER_MAX_RETRY_SECONDS', 300))
+    DEADLINE_SCHEDULER_MAX_FAILURES = int(os.getenv('DEADLINE_SCHEDULER_MAX_FAILURES', 5))
     JUDGE_VOTE_WEIGHT = 10
     REGULAR_VOTE_WEIGHT = 1
+    # 即時計數的記憶體有效期（秒，其他行程的投票最多延遲此時間可見）
+    LIVE_TALLY_TTL = float(os.getenv('LIVE_TALLY_TTL', 2))
+    # 投票接收模式：direct（每張投票一個交易）或 buffered（多個請求的投票合併為一個交易寫入）
+    VOTE_INGEST_MODE = os.getenv('VOTE_INGEST_MODE', 'direct')
+    VOTE_BUFFER_MAX_PENDING = int(os.getenv('VOTE_BUFFER_MAX_PENDING', 10000))
+    VOTE_BUFFER_BATCH_SIZE = int(os.getenv('VOTE_BUFFER_BATCH_SIZE', 500))
+    # 每批最長等待累積的毫秒數；0 為寫入執行緒空閒即寫入，寫入期間到達的投票合併為下一批
+    VOTE_BUFFER_FLUSH_MS = int(os.getenv('VOTE_BUFFER_FLUSH_MS', 0))
+    # 佇列滿時請求最多等待的秒數，逾時返回 503
+    VOTE_BUFFER_PUT_TIMEOUT = float(os.getenv('VOTE_BUFFER_PUT_TIMEOUT', 0.5))
+    # 請求等待投票寫入的秒數，逾時返回 503（投票仍在佇列中）
+    VOTE_BUFFER_CONFIRM_TIMEOUT = float(os.getenv('VOTE_BUFFER_CONFIRM_TIMEOUT', 10))
+    # 關閉投票或停止服務時等待緩衝寫入的秒數
+    VOTE_BUFFER_FLUSH_TIMEOUT = float(os.getenv('VOTE_BUFFER_FLUSH_TIMEOUT', 30))
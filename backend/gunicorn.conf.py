@@ -0,0 +1,30 @@
+"""
+Gunicorn 設定
+
+gunicorn -c gunicorn.conf.py wsgi:app
+
+SSE 連線（/api/debates/<id>/events）在開啟期間佔用一個執行緒，同步 worker 下
+少數觀看者即可佔滿所有行程。因此固定使用 gthread worker，每個行程的執行緒數
+為 EVENTS_MAX_SUBSCRIBERS 加上處理一般請求的 GUNICORN_REQUEST_THREADS，
+SSE 連線達到上限時仍有執行緒處理其他請求。
+
+每個工作行程載入應用後啟動背景工作（投票截止排程、辯論配對、排行榜）；
+排程與配對以數據庫租約協調，多個行程中只有一個執行。
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+worker_class = 'gthread'
+threads = Config.EVENTS_MAX_SUBSCRIBERS + int(os.getenv('GUNICORN_REQUEST_THREADS', 16))
+
+
+def post_worker_init(worker):
+    import wsgi
+    wsgi.start_background_tasks()
@@ -0,0 +1,100 @@
+"""
+數據庫初始化工具
+
+依 DB_ENGINE 配置執行 database/schema.sql 建立資料表。
+SQLite 會自動將 T-SQL 語法轉換為 SQLite 方言。
+
+升級以舊版 schema 建立的數據庫時，以 --migrate 依序執行 database/migrations 中
+尚未套用的遷移（已套用者記錄於 SchemaMigrations 表）。schema.sql 已包含所有遷移的變更，
+並在末尾將它們標記為已套用。
+
+python init_db.py                       # 使用 .env 中的配置
+python init_db.py --schema path/to.sql  # 指定 schema 檔案
+python init_db.py --migrate             # 套用尚未執行的遷移
+"""
+
+import sys
+import os
+import argparse
+
+# 添加父目錄到路徑，以便導入 config 和 database
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.database import db
+
+DEFAULT_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database', 'schema.sql')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database', 'migrations')
+
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE SchemaMigrations (
+    name NVARCHAR(100) PRIMARY KEY,
+    applied_at DATETIME NOT NULL DEFAULT GETDATE()
+)
+"""
+
+
+def init_schema(schema_path):
+    """執行 schema 腳本"""
+    with open(schema_path, encoding='utf-8') as f:
+        script = f.read()
+
+    db.run_script(script)
+    print(f"✅ 已使用 {db.engine.name} 引擎初始化數據庫 ({schema_path})")
+
+
+def migration_files():
+    """依檔名排序的遷移腳本"""
+    if not os.path.isdir(MIGRATIONS_DIR):
+        return []
+    return sorted(name for name in os.listdir(MIGRATIONS_DIR) if name.endswith('.sql'))
+
+
+def applied_migrations():
+    """已套用的遷移；舊數據庫沒有 SchemaMigrations 表時先建立"""
+    try:
+        with db.transaction() as tx:
+            rows = tx.execute_query("SELECT name FROM SchemaMigrations", fetch_all=True)
+    except Exception:
+        db.run_script(SCHEMA_MIGRATIONS_DDL)
+        return set()
+    return {row['name'] for row in rows}
+
+
+def record_migrations(names):
+    if names:
+        db.execute_many("INSERT INTO SchemaMigrations (name) VALUES (?)", [(name,) for name in names])
+
+
+def migrate():
+    """依序執行尚未套用的遷移"""
+    applied = applied_migrations()
+    pending = [name for name in migration_files() if name not in applied]
+    if not pending:
+        print("✅ 數據庫已是最新版本")
+        return
+
+    for name in pending:
+        with open(os.path.join(MIGRATIONS_DIR, name), encoding='utf-8') as f:
+            db.run_script(f.read())
+        record_migrations([name])
+        print(f"✅ 已套用遷移 {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='數據庫初始化工具')
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA, help='schema.sql 路徑')
+    parser.add_argument('--migrate', action='store_true', help='升級既有數據庫：套用尚未執行的遷移')
+    args = parser.parse_args()
+
+    try:
+        if args.migrate:
+            migrate()
+        else:
+            init_schema(args.schema)
+    except Exception as e:
+        print(f"❌ 初始化失敗: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+投票接收負載測試：比較 direct（每張投票一個交易）與 buffered（批次寫入）模式
+
+在暫存的 SQLite 數據庫建立一個投票中的回合，以多個執行緒透過 Flask 測試客戶端
+並發提交投票，量測每秒接受的投票數與全部寫入數據庫後的持續吞吐量，
+並確認 Votes 行數與 Rounds 計數欄位一致。
+
+python loadtest_votes.py                       # 預設 5000 位投票者、8 個執行緒
+python loadtest_votes.py --voters 20000 --threads 16 --mode buffered
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import threading
+import importlib.util
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_DIR = tempfile.mkdtemp(prefix='loadtest_votes_')
+
+os.environ['DB_ENGINE'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(DB_DIR, 'loadtest.db')
+os.environ.setdefault('DB_INSTRUMENTATION', 'False')
+sys.path.insert(0, BACKEND_DIR)
+
+from app.utils.database import db
+from app.utils.auth import generate_jwt_token
+from app.utils.vote_buffer import vote_buffer
+
+
+def load_app():
+    """載入 app.py（app 套件與其同名，無法直接 import）"""
+    spec = importlib.util.spec_from_file_location('debate_app', os.path.join(BACKEND_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def setup(voters):
+    with open(os.path.join(BACKEND_DIR, '..', 'database', 'schema.sql'), encoding='utf-8') as f:
+        db.run_script(f.read())
+    db.bulk_insert('Users', ('line_id', 'nickname'), [(f'loadtest-{i}', f'voter{i}') for i in range(voters)])
+    user_ids = [row['user_id'] for row in db.execute_query("SELECT user_id FROM Users ORDER BY user_id", fetch_all=True)]
+    topic_id = db.execute_insert(
+        """
+        INSERT INTO DebateTopics (title, description, side_pros, side_cons, created_by, status)
+        VALUES ('負載測試', '負載測試', '正方', '反方', ?, 'approved')
+        """,
+        (user_ids[0],)
+    )
+    debate_id = db.execute_insert(
+        "INSERT INTO Debates (topic_id, pros_user_id, cons_user_id, status) VALUES (?, ?, ?, 'ONGOING')",
+        (topic_id, user_ids[0], user_ids[1])
+    )
+    tokens = [generate_jwt_token(user_id) for user_id in user_ids]
+    return debate_id, tokens
+
+
+def new_round(debate_id, round_number):
+    return db.execute_insert(
+        "INSERT INTO Rounds (debate_id, round_number, status) VALUES (?, ?, 'WAIT_VOTING')",
+        (debate_id, round_number)
+    )
+
+
+def run(app, mode, round_id, tokens, threads):
+    vote_buffer.enabled = mode == 'buffered'
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(chunk):
+        client = app.test_client()
+        counts = {}
+        for i, token in chunk:
+            response = client.post(
+                f'/api/votes/{round_id}/vote',
+                json={'side_voted': 'pros' if i % 3 else 'cons'},
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        with lock:
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    indexed = list(enumerate(tokens))
+    workers = [threading.Thread(target=worker, args=(indexed[n::threads],)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    accepted_time = time.perf_counter() - start
+    vote_buffer.flush()
+    durable_time = time.perf_counter() - start
+
+    stored = db.execute_query(
+        "SELECT COUNT(*) AS votes, SUM(weight) AS weight FROM Votes WHERE round_id = ?",
+        (round_id,),
+        fetch_one=True
+    )
+    counters = db.execute_query(
+        "SELECT pros_votes + cons_votes AS weight, pros_vote_count + cons_vote_count AS votes FROM Rounds WHERE round_id = ?",
+        (round_id,),
+        fetch_one=True
+    )
+    consistent = stored['votes'] == counters['votes'] and (stored['weight'] or 0) == counters['weight']
+
+    print(f"{mode:<9} accepted {len(tokens) / accepted_time:8.0f} votes/s   "
+          f"durable {stored['votes'] / durable_time:8.0f} votes/s   "
+          f"stored {stored['votes']}/{len(tokens)}   status {dict(sorted(statuses.items()))}   "
+          f"{'計數一致' if consistent else '❌ 計數不一致'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='投票接收負載測試')
+    parser.add_argument('--voters', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--mode', choices=('direct', 'buffered', 'both'), default='both')
+    args = parser.parse_args()
+
+    app = load_app()
+    debate_id, tokens = setup(args.voters)
+    print(f"voters: {args.voters}   threads: {args.threads}   db: {os.environ['SQLITE_PATH']}")
+
+    modes = ('direct', 'buffered') if args.mode == 'both' else (args.mode,)
+    for round_number, mode in enumerate(modes, start=1):
+        run(app, mode, new_round(debate_id, round_number), tokens, args.threads)
+    vote_buffer.stop()
+
+
+if __name__ == '__main__':
+    main()
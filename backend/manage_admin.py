@@ -20,6 +20,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config import Config
 from app.utils.database import db
+from app.utils.auth import revoke_tokens
 
 
 def list_users():
@@ -64,11 +65,13 @@ def set_admin(user_id, is_admin=True):
         print(f"❌ 找不到 ID 為 {user_id} 的使用者")
         return False
     
-    # 更新管理員狀態
-    db.execute_query(
-        "UPDATE Users SET is_admin = ? WHERE user_id = ?",
-        (1 if is_admin else 0, user_id)
-    )
+    # 更新管理員狀態，並使該使用者已簽發的 token claims 失效
+    with db.transaction():
+        db.execute_query(
+            "UPDATE Users SET is_admin = ? WHERE user_id = ?",
+            (1 if is_admin else 0, user_id)
+        )
+        revoke_tokens(user_id)
     
     action = "設置為管理員" if is_admin else "移除管理員權限"
     print(f"✅ 成功將使用者 '{user['nickname']}' (ID: {user_id}) {action}")
@@ -0,0 +1,73 @@
+"""
+Elo 評分重建工具
+
+依時間順序重播全部 MatchHistory，以指定的 K 值與初始評分重新計算
+每位使用者的評分與戰績（NumPy 向量化），並列出與目前數據的差異。
+
+python rebuild_ratings.py                          # 以目前配置重播，只列出差異
+python rebuild_ratings.py --k-factor 24            # 試算新的 K 值
+python rebuild_ratings.py --apply                  # 寫回 Users（單一交易、批量更新）
+python rebuild_ratings.py --apply --rewrite-history  # 同時改寫 MatchHistory 的賽前/賽後評分
+"""
+
+import sys
+import os
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from app.utils.elo_replay import load_match_pairs, rebuild_ratings, rating_diff, apply_ratings
+
+
+def print_diff(diff, limit):
+    print("-" * 90)
+    print(f"{'ID':<8} {'目前 (rating/W/L/D)':<36} {'重播 (rating/W/L/D)':<36}")
+    print("-" * 90)
+    for user_id, current, replayed in diff[:limit]:
+        current_text = '/'.join(map(str, current)) if current else 'N/A'
+        print(f"{user_id:<8} {current_text:<36} {'/'.join(map(str, replayed)):<36}")
+    if len(diff) > limit:
+        print(f"... 另有 {len(diff) - limit} 位使用者")
+    print("-" * 90)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Elo 評分重建工具')
+    parser.add_argument('--k-factor', type=float, default=Config.ELO_K_FACTOR, help='Elo K 值')
+    parser.add_argument('--initial-rating', type=int, default=Config.INITIAL_RATING, help='初始評分')
+    parser.add_argument('--apply', action='store_true', help='將重播結果寫回數據庫')
+    parser.add_argument('--rewrite-history', action='store_true', help='同時改寫 MatchHistory 的賽前/賽後評分')
+    parser.add_argument('--show', type=int, default=20, metavar='N', help='最多列出 N 筆差異')
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        pairs = load_match_pairs()
+        loaded = time.perf_counter()
+        result = rebuild_ratings(args.k_factor, args.initial_rating, pairs)
+        replayed = time.perf_counter()
+        print(f"📊 重播 {len(pairs)} 場比賽、{len(result.user_ids)} 位使用者 "
+              f"(K={args.k_factor}, 初始評分={args.initial_rating})")
+        print(f"   讀取 {loaded - start:.2f} 秒，計算 {replayed - loaded:.2f} 秒")
+
+        diff = rating_diff(result)
+        if not diff:
+            print("✅ 評分與戰績與重播結果一致")
+        else:
+            print(f"⚠️ {len(diff)} 位使用者與重播結果不同")
+            print_diff(diff, args.show)
+
+        if args.apply and (diff or args.rewrite_history):
+            updated = apply_ratings(result, diff, rewrite_history=args.rewrite_history)
+            print(f"✅ 已更新 {updated} 位使用者" + ("，並改寫比賽歷史" if args.rewrite_history else ""))
+
+    except Exception as e:
+        print(f"❌ 發生錯誤: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
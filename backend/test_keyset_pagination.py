@@ -0,0 +1,116 @@
+"""
+游標分頁測試：created_at 相同（批量建立共用 GETDATE()）的行不會被略過或重複（使用 SQLite，不需要 SQL Server）
+
+python test_keyset_pagination.py
+
+驗證：
+1. 同一條 INSERT 以 GETDATE() 建立的辯論逐頁讀取時每筆恰好出現一次，順序為 (created_at, id) 新到舊
+2. created_at 帶毫秒且大量相同的話題，與不同時間的話題混合時逐頁讀取結果完整
+3. 游標以 created_at 原值編碼，SQL Server 以 CAST(? AS DATETIME) 與欄位同型別比較
+"""
+
+import os
+import sys
+import datetime
+import tempfile
+import importlib.util
+
+_db_dir = tempfile.mkdtemp()
+os.environ['DB_ENGINE'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(_db_dir, 'keyset.db')
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from app.utils.database import db
+from app.utils.engines import translate_tsql_to_sqlite
+from app.utils.pagination import KeysetPage, decode_cursor
+
+
+def check(condition, message):
+    print(f"{'✅' if condition else '❌'} {message}")
+    return condition
+
+
+def read_all_pages(client, url, key, limit):
+    """依 next_cursor 讀完所有頁，返回 (所有行, 頁數)"""
+    rows, pages, cursor = [], 0, None
+    while True:
+        query = f'{url}?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(query).get_json()
+        rows.extend(body[key])
+        pages += 1
+        cursor = body['next_cursor']
+        if not cursor or pages > 100:
+            return rows, pages
+
+
+def is_descending(rows, created_field, id_field):
+    keys = [(row[created_field], row[id_field]) for row in rows]
+    return keys == sorted(keys, reverse=True)
+
+
+def main():
+    schema_path = os.path.join(BASE_DIR, '..', 'database', 'schema.sql')
+    with open(schema_path, encoding='utf-8') as f:
+        db.run_script(f.read())
+
+    # app.py 與 app 套件同名，需依路徑載入
+    spec = importlib.util.spec_from_file_location('debate_app', os.path.join(BASE_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    client = module.app.test_client()
+
+    results = []
+
+    users = [db.execute_insert("INSERT INTO Users (line_id, nickname) VALUES (?, ?)", (f'U{i}', f'user{i}'))
+             for i in range(2)]
+    topic_id = db.execute_insert(
+        "INSERT INTO DebateTopics (title, description, side_pros, side_cons, created_by, status) "
+        "VALUES ('t', 'd', 'p', 'c', ?, 'approved')",
+        (users[0],)
+    )
+
+    # 1. 同一條多行 INSERT 建立的辯論共用 GETDATE()
+    with db.transaction() as tx:
+        tx.bulk_insert(
+            'Debates',
+            ('topic_id', 'pros_user_id', 'cons_user_id', 'status'),
+            [(topic_id, users[0], users[1], 'ONGOING') for _ in range(30)]
+        )
+    created = db.execute_query("SELECT COUNT(DISTINCT created_at) AS n FROM Debates", fetch_one=True)['n']
+    debates, pages = read_all_pages(client, '/api/debates', 'debates', 7)
+    ids = [debate['debate_id'] for debate in debates]
+    results.append(check(created == 1 and sorted(ids) == list(range(1, 31)) and len(ids) == 30,
+                         f"相同 created_at 的 30 筆辯論分 {pages} 頁讀取，無遺漏與重複（讀到 {len(ids)} 筆）"))
+    results.append(check(is_descending(debates, 'created_at', 'debate_id'), "辯論依 (created_at, id) 新到舊排列"))
+
+    # 2. 帶毫秒的相同時間與其他時間混合
+    tied = datetime.datetime(2024, 1, 1, 12, 0, 0, 3000)
+    times = [tied] * 12 + [tied - datetime.timedelta(seconds=1)] * 5 + [tied + datetime.timedelta(milliseconds=7)] * 4
+    with db.transaction() as tx:
+        tx.bulk_insert(
+            'DebateTopics',
+            ('title', 'description', 'side_pros', 'side_cons', 'created_by', 'status', 'created_at'),
+            [(f'tied {i}', 'd', 'p', 'c', users[0], 'approved', created_at) for i, created_at in enumerate(times)]
+        )
+    topics, pages = read_all_pages(client, '/api/topics', 'topics', 4)
+    ids = [topic['topic_id'] for topic in topics]
+    results.append(check(len(ids) == len(set(ids)) == len(times) + 1,
+                         f"毫秒相同的話題分 {pages} 頁讀取，無遺漏與重複（讀到 {len(ids)}/{len(times) + 1} 筆）"))
+
+    # 3. 游標保存原值，比較時轉回 DATETIME
+    page = KeysetPage('t.created_at', 't.topic_id', limit=4)
+    rows = list(page.rows(iter([{'created_at': tied, 'topic_id': n} for n in range(10, 5, -1)])))
+    after = decode_cursor(page.next_cursor)
+    results.append(check(len(rows) == 4 and after == (tied, 7), f"游標保存 created_at 原值（{after[0].isoformat()}）"))
+    page = KeysetPage('t.created_at', 't.topic_id', cursor=page.next_cursor)
+    results.append(check(page.where.count('CAST(? AS DATETIME)') == 2 and 'CAST' not in translate_tsql_to_sqlite(page.where),
+                         "SQL Server 以 CAST(? AS DATETIME) 比較，SQLite 直接比較參數"))
+
+    print()
+    print("✅ 全部通過" if all(results) else "❌ 有測試失敗")
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
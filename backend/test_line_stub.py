@@ -0,0 +1,152 @@
+"""
+LINE Login 回調測試（使用本地 LINE API 模擬伺服器，不需要網路與 SQL Server）
+
+python test_line_stub.py
+
+驗證：
+1. 多次登入重用同一條 keep-alive 連線
+2. 個人資料未變更時不執行 UPDATE Users
+3. 個人資料 GET 遇到 503 時會重試
+4. LINE API 回應過慢時在讀取逾時後放棄
+"""
+
+import os
+import sys
+import time
+import json
+import tempfile
+import importlib.util
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_db_dir = tempfile.mkdtemp()
+os.environ['DB_ENGINE'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(_db_dir, 'line_stub.db')
+os.environ['LINE_HTTP_READ_TIMEOUT'] = '1'
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from config import Config
+from app.utils.database import db
+from app.utils.instrumentation import query_stats
+
+
+class StubState:
+    profile = {'userId': 'U-stub', 'displayName': 'Stub User', 'pictureUrl': 'https://example.com/a.png'}
+    profile_failures = 0   # 接下來幾次個人資料請求返回 503
+    token_delay = 0        # 授權碼交換的延遲秒數
+    connections = set()
+    requests = []
+
+
+class LineStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        StubState.connections.add(self.client_address)
+        StubState.requests.append('token')
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if StubState.token_delay:
+            time.sleep(StubState.token_delay)
+        self._send_json(200, {'access_token': 'stub-access-token'})
+
+    def do_GET(self):
+        StubState.connections.add(self.client_address)
+        StubState.requests.append('profile')
+        if StubState.profile_failures:
+            StubState.profile_failures -= 1
+            self._send_json(503, {'message': 'unavailable'})
+            return
+        self._send_json(200, StubState.profile)
+
+
+def count_user_updates(client):
+    """執行一次登入回調，返回 UPDATE Users 的執行次數"""
+    updates = []
+    original = query_stats.record
+
+    def record(query, elapsed, rows=0):
+        if query.strip().upper().startswith('UPDATE USERS'):
+            updates.append(query)
+        original(query, elapsed, rows)
+
+    query_stats.record = record
+    try:
+        response = client.get('/api/auth/callback?code=stub-code')
+    finally:
+        query_stats.record = original
+    return response, len(updates)
+
+
+def check(condition, message):
+    print(f"{'✅' if condition else '❌'} {message}")
+    return condition
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), LineStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    Config.LINE_TOKEN_URL = f'{base_url}/oauth2/v2.1/token'
+    Config.LINE_PROFILE_URL = f'{base_url}/v2/profile'
+
+    schema_path = os.path.join(BASE_DIR, '..', 'database', 'schema.sql')
+    with open(schema_path, encoding='utf-8') as f:
+        db.run_script(f.read())
+
+    # app.py 與 app 套件同名，需依路徑載入
+    spec = importlib.util.spec_from_file_location('debate_app', os.path.join(BASE_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    client = module.app.test_client()
+    results = []
+
+    response, _ = count_user_updates(client)
+    results.append(check('token=' in response.headers.get('Location', ''), "首次登入建立用戶並返回 token"))
+
+    StubState.connections.clear()
+    response, updates = count_user_updates(client)
+    results.append(check(updates == 0, f"個人資料未變更時不更新（UPDATE 次數: {updates}）"))
+
+    StubState.profile = dict(StubState.profile, displayName='Renamed User')
+    response, updates = count_user_updates(client)
+    results.append(check(updates == 1, f"暱稱變更時更新一次（UPDATE 次數: {updates}）"))
+
+    results.append(check(len(StubState.connections) == 1,
+                         f"兩次登入共用連線（建立的連線數: {len(StubState.connections)}）"))
+
+    StubState.profile_failures = 1
+    StubState.requests.clear()
+    response, _ = count_user_updates(client)
+    results.append(check('token=' in response.headers.get('Location', '') and StubState.requests.count('profile') == 2,
+                         f"個人資料 503 後重試成功（請求: {StubState.requests}）"))
+
+    StubState.token_delay = Config.LINE_HTTP_READ_TIMEOUT + 0.5
+    StubState.requests.clear()
+    start = time.perf_counter()
+    response, _ = count_user_updates(client)
+    elapsed = time.perf_counter() - start
+    StubState.token_delay = 0
+    results.append(check('error=line_auth_failed' in response.headers.get('Location', '')
+                         and StubState.requests == ['token'],
+                         f"授權碼交換逾時後放棄且不重送（耗時 {elapsed:.2f} 秒，請求: {StubState.requests}）"))
+
+    server.shutdown()
+    print()
+    print("✅ 全部通過" if all(results) else "❌ 有測試失敗")
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""
+WSGI 入口：gunicorn -c gunicorn.conf.py wsgi:app
+
+app.py 與 app 套件同名，`import app` 取得的是套件，因此依路徑載入 app.py。
+背景工作（投票截止排程、辯論配對、排行榜）由 gunicorn.conf.py 的 post_worker_init
+在每個工作行程中啟動。
+"""
+
+import os
+import importlib.util
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_spec = importlib.util.spec_from_file_location('debate_app', os.path.join(BASE_DIR, 'app.py'))
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+
+app = _module.app
+start_background_tasks = _module.start_background_tasks
@@ -0,0 +1,54 @@
+-- 升級以舊版 schema.sql 建立的數據庫（python init_db.py --migrate）
+-- 新增投票計數與版本欄位、Token 撤銷與排程租約表、分頁索引，並由 Votes 回填投票計數
+
+-- 投票計數（關閉投票與投票結果直接讀取）
+ALTER TABLE Rounds ADD pros_votes INT NOT NULL DEFAULT 0;
+ALTER TABLE Rounds ADD cons_votes INT NOT NULL DEFAULT 0;
+ALTER TABLE Rounds ADD pros_vote_count INT NOT NULL DEFAULT 0;
+ALTER TABLE Rounds ADD cons_vote_count INT NOT NULL DEFAULT 0;
+
+-- 增量同步版本
+ALTER TABLE Rounds ADD version INT NOT NULL DEFAULT 0;
+ALTER TABLE Debates ADD version INT NOT NULL DEFAULT 0;
+
+CREATE TABLE TokenRevocations (
+    user_id INT PRIMARY KEY,
+    token_version INT NOT NULL DEFAULT 1,
+    revoked_at DATETIME NOT NULL DEFAULT GETDATE(),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id)
+);
+
+CREATE TABLE SchedulerLeases (
+    name NVARCHAR(50) PRIMARY KEY,
+    owner NVARCHAR(100) NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+
+-- 以分頁與排程用的複合索引取代單欄索引
+DROP INDEX IDX_DebateTopics_Status ON DebateTopics;
+DROP INDEX IDX_Debates_Status ON Debates;
+DROP INDEX IDX_Rounds_Status ON Rounds;
+DROP INDEX IDX_MatchHistory_User ON MatchHistory;
+CREATE INDEX IDX_DebateTopics_Status_Created ON DebateTopics(status, created_at DESC, topic_id DESC);
+CREATE INDEX IDX_Debates_Status_Created ON Debates(status, created_at DESC, debate_id DESC);
+CREATE INDEX IDX_Rounds_Status_Deadline ON Rounds(status, voting_deadline);
+CREATE INDEX IDX_Rounds_Debate_Version ON Rounds(debate_id, version);
+CREATE INDEX IDX_MatchHistory_User_Created ON MatchHistory(user_id, created_at DESC, match_id DESC);
+CREATE INDEX IDX_TokenRevocations_RevokedAt ON TokenRevocations(revoked_at);
+
+-- 回填既有回合（含已關閉回合）的投票計數
+UPDATE Rounds
+SET pros_votes = v.pros_votes,
+    cons_votes = v.cons_votes,
+    pros_vote_count = v.pros_vote_count,
+    cons_vote_count = v.cons_vote_count
+FROM (
+    SELECT round_id,
+           SUM(CASE WHEN side_voted = 'pros' THEN weight ELSE 0 END) AS pros_votes,
+           SUM(CASE WHEN side_voted = 'cons' THEN weight ELSE 0 END) AS cons_votes,
+           SUM(CASE WHEN side_voted = 'pros' THEN 1 ELSE 0 END) AS pros_vote_count,
+           SUM(CASE WHEN side_voted = 'cons' THEN 1 ELSE 0 END) AS cons_vote_count
+    FROM Votes
+    GROUP BY round_id
+) v
+WHERE Rounds.round_id = v.round_id;
@@ -0,0 +1,14 @@
+-- 配對佇列由行程記憶體移至數據庫，所有工作行程共用（python init_db.py --migrate）
+
+CREATE TABLE MatchmakingQueue (
+    user_id INT PRIMARY KEY,
+    topic_id INT NOT NULL,
+    rating INT NOT NULL,
+    joined_at DATETIME NOT NULL DEFAULT GETDATE(),
+    matched_at DATETIME NULL,
+    debate_id INT NULL,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id),
+    FOREIGN KEY (topic_id) REFERENCES DebateTopics(topic_id)
+);
+
+CREATE INDEX IDX_MatchmakingQueue_Topic ON MatchmakingQueue(topic_id, matched_at);
@@ -48,6 +48,7 @@ CREATE TABLE Debates (
     winner_id INT,
     pros_consecutive_wins INT NOT NULL DEFAULT 0,
     cons_consecutive_wins INT NOT NULL DEFAULT 0,
+    version INT NOT NULL DEFAULT 0,  -- 每次辯論或其回合變更時遞增（增量同步）
     created_at DATETIME NOT NULL DEFAULT GETDATE(),
     updated_at DATETIME NOT NULL DEFAULT GETDATE(),
     FOREIGN KEY (topic_id) REFERENCES DebateTopics(topic_id),
@@ -72,6 +73,12 @@ CREATE TABLE Rounds (
     --       WAIT_CONS_STATEMENT, WAIT_PROS_QUESTIONS, WAIT_CONS_REPLY,
     --       WAIT_VOTING, VOTING_CLOSED, ROUND_RESULT
     winner_side NVARCHAR(10),  -- pros, cons, draw
+    -- 投票計數（投票時增量更新，關閉投票時直接讀取）
+    pros_votes INT NOT NULL DEFAULT 0,       -- 正方加權票數
+    cons_votes INT NOT NULL DEFAULT 0,       -- 反方加權票數
+    pros_vote_count INT NOT NULL DEFAULT 0,  -- 正方投票人數
+    cons_vote_count INT NOT NULL DEFAULT 0,  -- 反方投票人數
+    version INT NOT NULL DEFAULT 0,  -- 最後變更時的辯論版本
     voting_deadline DATETIME,
     created_at DATETIME NOT NULL DEFAULT GETDATE(),
     updated_at DATETIME NOT NULL DEFAULT GETDATE(),
@@ -117,11 +124,53 @@ CREATE TABLE MatchHistory (
     FOREIGN KEY (user_id) REFERENCES Users(user_id)
 );
 
+-- Token 撤銷表（權限變更時提升版本，使無狀態 token 的 claims 失效）
+CREATE TABLE TokenRevocations (
+    user_id INT PRIMARY KEY,
+    token_version INT NOT NULL DEFAULT 1,
+    revoked_at DATETIME NOT NULL DEFAULT GETDATE(),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id)
+);
+
+-- 排程租約表（多個工作行程中只有持有租約者執行排程）
+CREATE TABLE SchedulerLeases (
+    name NVARCHAR(50) PRIMARY KEY,
+    owner NVARCHAR(100) NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+
+-- 配對佇列（所有工作行程共用；配對後保留結果直到用戶讀取或逾時）
+CREATE TABLE MatchmakingQueue (
+    user_id INT PRIMARY KEY,
+    topic_id INT NOT NULL,
+    rating INT NOT NULL,
+    joined_at DATETIME NOT NULL DEFAULT GETDATE(),
+    matched_at DATETIME NULL,
+    debate_id INT NULL,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id),
+    FOREIGN KEY (topic_id) REFERENCES DebateTopics(topic_id)
+);
+
+-- 已套用的遷移（database/migrations；本檔已包含其變更，於末尾全部標記為已套用）
+CREATE TABLE SchemaMigrations (
+    name NVARCHAR(100) PRIMARY KEY,
+    applied_at DATETIME NOT NULL DEFAULT GETDATE()
+);
+
 -- 創建索引以提升查詢性能
 CREATE INDEX IDX_Users_Rating ON Users(rating DESC);
-CREATE INDEX IDX_DebateTopics_Status ON DebateTopics(status);
-CREATE INDEX IDX_Debates_Status ON Debates(status);
-CREATE INDEX IDX_Rounds_Status ON Rounds(status);
+-- 列表分頁索引：(篩選欄位, created_at, id)，每頁為一次索引搜尋
+CREATE INDEX IDX_DebateTopics_Status_Created ON DebateTopics(status, created_at DESC, topic_id DESC);
+CREATE INDEX IDX_Debates_Status_Created ON Debates(status, created_at DESC, debate_id DESC);
+-- 依狀態篩選，並供投票截止排程查詢即將到期的回合
+CREATE INDEX IDX_Rounds_Status_Deadline ON Rounds(status, voting_deadline);
+CREATE INDEX IDX_Rounds_Debate_Version ON Rounds(debate_id, version);
 CREATE INDEX IDX_Votes_Round ON Votes(round_id);
 CREATE INDEX IDX_JudgeAssignments_Debate ON JudgeAssignments(debate_id);
-CREATE INDEX IDX_MatchHistory_User ON MatchHistory(user_id);
+CREATE INDEX IDX_MatchHistory_User_Created ON MatchHistory(user_id, created_at DESC, match_id DESC);
+CREATE INDEX IDX_TokenRevocations_RevokedAt ON TokenRevocations(revoked_at);
+CREATE INDEX IDX_MatchmakingQueue_Topic ON MatchmakingQueue(topic_id, matched_at);
+
+-- 新增遷移時，同時更新上方的表定義並在此登記
+INSERT INTO SchemaMigrations (name) VALUES ('001_vote_counters_and_versions.sql');
+INSERT INTO SchemaMigrations (name) VALUES ('002_matchmaking_queue.sql');
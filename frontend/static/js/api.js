@@ -65,6 +65,17 @@ async function apiRequest(endpoint, options = {}) {
         console.log(`[API] ${fetchOptions.method} ${url}`, fetchOptions.headers);
         const response = await fetch(url, fetchOptions);
 
+        // 伺服器換發的 token（claims 模式下 claims 過期或被撤銷時）
+        const refreshedToken = response.headers.get('X-Refreshed-Token');
+        if (refreshedToken) {
+            setToken(refreshedToken);
+        }
+
+        // 304：自上次同步後沒有變更
+        if (response.status === 304) {
+            return null;
+        }
+
         const data = await response.json();
 
         if (!response.ok) {
@@ -80,6 +91,11 @@ async function apiRequest(endpoint, options = {}) {
     }
 }
 
+// 分頁游標參數（列表回應的 next_cursor）
+function cursorQuery(cursor, prefix = '&') {
+    return cursor ? `${prefix}cursor=${encodeURIComponent(cursor)}` : '';
+}
+
 // API 方法
 
 // 認證相關
@@ -109,15 +125,15 @@ const UserAPI = {
         return await apiRequest(`/users/${userId}`);
     },
 
-    async getUserMatches(userId) {
-        return await apiRequest(`/users/${userId}/matches`);
+    async getUserMatches(userId, cursor = null) {
+        return await apiRequest(`/users/${userId}/matches${cursorQuery(cursor, '?')}`);
     }
 };
 
 // 話題相關
 const TopicAPI = {
-    async getTopics(status = 'approved') {
-        return await apiRequest(`/topics?status=${status}`);
+    async getTopics(status = 'approved', cursor = null) {
+        return await apiRequest(`/topics?status=${status}${cursorQuery(cursor)}`);
     },
 
     async getTopic(topicId) {
@@ -134,12 +150,30 @@ const TopicAPI = {
 
 // 辯論相關
 const DebateAPI = {
-    async getDebates(status = 'ONGOING') {
-        return await apiRequest(`/debates?status=${status}`);
+    async getDebates(status = 'ONGOING', cursor = null, limit = null) {
+        return await apiRequest(`/debates?status=${status}${cursorQuery(cursor)}${limit ? `&limit=${limit}` : ''}`);
     },
 
-    async getDebate(debateId) {
-        return await apiRequest(`/debates/${debateId}`);
+    // rounds 為 'summary' 時回合只含狀態、內容長度與摘錄，全文以 RoundAPI.getRounds 按需載入
+    async getDebate(debateId, rounds = 'full') {
+        return await apiRequest(`/debates/${debateId}${rounds === 'summary' ? '?rounds=summary' : ''}`);
+    },
+
+    // 增量同步：只返回 since 版本之後變更的欄位與回合，無變更時返回 null
+    async getDebateChanges(debateId, since) {
+        return await apiRequest(`/debates/${debateId}?since=${since}`);
+    },
+
+    // 訂閱辯論即時事件（SSE），handlers 為 { 事件名稱: 回呼 }；瀏覽器不支援時返回 null
+    subscribe(debateId, handlers) {
+        if (!window.EventSource) {
+            return null;
+        }
+        const source = new EventSource(`${API_BASE_URL}/debates/${debateId}/events`);
+        Object.entries(handlers).forEach(([event, handler]) => {
+            source.addEventListener(event, e => handler(JSON.parse(e.data)));
+        });
+        return source;
     },
 
     async createDebate(debateData) {
@@ -156,6 +190,12 @@ const RoundAPI = {
         return await apiRequest(`/rounds/${roundId}`);
     },
 
+    // 批量獲取回合全文
+    async getRounds(roundIds) {
+        const data = await apiRequest(`/rounds?ids=${roundIds.join(',')}`);
+        return data.rounds;
+    },
+
     async submitProsStatement(roundId, statement) {
         return await apiRequest(`/rounds/${roundId}/pros_statement`, {
             method: 'POST',
@@ -215,15 +255,39 @@ const VoteAPI = {
 
 // 排行榜相關
 const RankingAPI = {
-    async getRanking() {
-        return await apiRequest('/ranking');
+    async getRanking(offset = 0, limit = 100) {
+        return await apiRequest(`/ranking?offset=${offset}&limit=${limit}`);
+    },
+
+    async getMyRank(radius = 5) {
+        return await apiRequest(`/ranking/me?radius=${radius}`);
+    }
+};
+
+// 配對相關
+const MatchmakingAPI = {
+    async join(topicId) {
+        return await apiRequest('/matchmaking/queue', {
+            method: 'POST',
+            body: JSON.stringify({ topic_id: topicId })
+        });
+    },
+
+    async leave() {
+        return await apiRequest('/matchmaking/queue', {
+            method: 'DELETE'
+        });
+    },
+
+    async getStatus() {
+        return await apiRequest('/matchmaking/status');
     }
 };
 
 // 管理員相關
 const AdminAPI = {
-    async getPendingTopics() {
-        return await apiRequest('/admin/topics/pending');
+    async getPendingTopics(cursor = null) {
+        return await apiRequest(`/admin/topics/pending${cursorQuery(cursor, '?')}`);
     },
 
     async approveTopic(topicId) {